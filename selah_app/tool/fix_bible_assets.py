@@ -1,144 +1,238 @@
 #!/usr/bin/env python3
 """
 Script pour corriger les fichiers JSON bibliques au format JavaScript/JSON non standard.
+
+Les chemins peuvent être des fichiers, des dossiers (tous les *.json) ou des
+motifs glob ; plusieurs fichiers sont traités en parallèle (un processus par
+fichier) et chaque fichier est réécrit de façon atomique.
+
+Usage:
+    python tool/fix_bible_assets.py <chemin1.json> <chemin2.json> ...
+    python tool/fix_bible_assets.py assets/bibles --workers 8
+    python tool/fix_bible_assets.py 'assets/bibles/*.json'
+    python tool/fix_bible_assets.py assets/bibles --binary --compress zstd
+
+Avec --binary, chaque Bible validée est aussi exportée au format binaire
+compact de tools/bible_binary.py (.sbib), lisible verset par verset.
 """
+import argparse
+import glob
 import json
-import re
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+from bible_binary import COMPRESSIONS, export_bible  # noqa: E402
+from bible_validator import iter_tree_events, load_canon, validate_events  # noqa: E402
+from json_repair import print_report, repair_file, repair_text  # noqa: E402
+
+
 def fix_json_format(content):
-    """Corrige le format JavaScript/JSON non standard vers JSON valide."""
-    
-    # Étape 1: Corriger les objets malformés {Text:"...",ID:2,Text:"..."}
-    # Les remplacer par des tableaux [{Text:"...",ID:2},{Text:"...",ID:3}]
-    
-    # D'abord, échapper les guillemets dans les valeurs Text
-    def escape_text_quotes(match):
-        text_content = match.group(1)
-        # Échapper tous les guillemets dans le contenu
-        escaped_content = text_content.replace('"', '\\"')
-        return f'Text:"{escaped_content}"'
-    
-    content = re.sub(r'Text:"([^"]*(?:"[^"]*)*[^"]*)"', escape_text_quotes, content)
-    
-    # Étape 2: Ajouter des guillemets autour des clés non-quotées
-    def quote_keys(match):
-        key = match.group(1).strip()
-        if key.startswith('"') and key.endswith('"'):
-            return match.group(0)  # Déjà quoté
-        return f' "{key}":'
-    
-    content = re.sub(r'(?<=\{|,)\s*([A-Za-zÀ-ÿ0-9 _\-]+)\s*:', quote_keys, content)
-    
-    return content
+    """Corrige le format JavaScript/JSON non standard vers JSON valide.
+
+    Un seul passage de l'automate de tools/json_repair.py (clés non quotées,
+    guillemets internes, sauts de ligne et caractères de contrôle dans les
+    chaînes, virgules en trop) au lieu de substitutions regex successives.
+    """
+    fixed, _ = repair_text(content)
+    return fixed
 
 def validate_structure(data, path):
-    """Valide la structure attendue du JSON."""
-    if 'Testaments' not in data:
-        raise ValueError(f'❌ {path}: "Testaments" absent')
-    
-    testaments = data['Testaments']
-    if not isinstance(testaments, list) or len(testaments) == 0:
-        raise ValueError(f'❌ {path}: Testaments[] vide ou invalide')
-    
-    # Vérifier la structure du premier testament
-    t0 = testaments[0]
-    if not isinstance(t0, dict) or 'Books' not in t0:
-        raise ValueError(f'❌ {path}: testaments[0].Books manquant')
-    
-    books = t0['Books']
-    if not isinstance(books, list):
-        raise ValueError(f'❌ {path}: testaments[0].Books n\'est pas une liste')
-    
-    if len(books) == 0:
-        print(f'⚠️ {path}: Books[] vide dans le premier testament')
-        return
-    
-    # Vérifier la structure du premier livre
-    b0 = books[0]
-    if not isinstance(b0, dict) or 'Chapters' not in b0:
-        raise ValueError(f'❌ {path}: testaments[0].books[0].Chapters manquant')
-    
-    chapters = b0['Chapters']
-    if not isinstance(chapters, list):
-        raise ValueError(f'❌ {path}: testaments[0].books[0].Chapters n\'est pas une liste')
-    
-    if len(chapters) == 0:
-        print(f'⚠️ {path}: Chapters[] vide pour le premier Book')
-        return
-    
-    # Vérifier la structure du premier chapitre
-    c0 = chapters[0]
-    if not isinstance(c0, dict) or 'Verses' not in c0:
-        raise ValueError(f'❌ {path}: ...Chapters[0].Verses manquant')
-    
-    verses = c0['Verses']
-    if not isinstance(verses, list):
-        raise ValueError(f'❌ {path}: ...Chapters[0].Verses n\'est pas une liste')
-    
-    if len(verses) == 0:
-        print(f'⚠️ {path}: Verses[] vide pour le premier chapitre')
-        return
-    
-    # Vérifier la structure du premier verset
-    v0 = verses[0]
-    if not isinstance(v0, dict) or 'Text' not in v0:
-        raise ValueError(f'❌ {path}: ...Verses[0].Text manquant')
-    
-    if not isinstance(v0['Text'], str):
-        raise ValueError(f'❌ {path}: ...Verses[0].Text n\'est pas une chaîne')
+    """Valide toute la structure du JSON (tools/bible_validator.py) et la compare au canon.
+
+    Lève ValueError s'il y a des erreurs ; renvoie un avertissement par type de problème.
+    """
+    report = validate_events(iter_tree_events(data), load_canon())
+    if report['errors']:
+        first = next(issue for issue in report['issues'] if issue['severity'] == 'error')
+        raise ValueError(f'❌ {path}: {report["errors"]} erreurs, dont {first["path"]}: {first["message"]}')
+    
+    warnings = []
+    for code, count in report['codes'].items():
+        example = next(issue for issue in report['issues'] if issue['code'] == code)
+        where = example['ref'] or example['path']
+        warnings.append(f'⚠️ {path}: {count} × {code} (ex. {where}: {example["message"]})')
+    return warnings
+
+def write_json_atomic(data, path):
+    """Écrit le JSON dans un fichier temporaire voisin puis le renomme (jamais de fichier à moitié écrit)"""
+    temp_path = f'{path}.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def binary_path(file_path, binary_dir=None):
+    """Chemin du .sbib exporté : à côté du JSON, ou dans binary_dir"""
+    path = Path(file_path).with_suffix('.sbib')
+    return str(Path(binary_dir) / path.name if binary_dir else path)
+
+def fix_file(file_path, verbose=True, binary=False, binary_dir=None, compression='none'):
+    """Corrige un fichier JSON biblique.
 
-def fix_file(file_path):
-    """Corrige un fichier JSON biblique."""
+    Avec binary, exporte aussi la Bible validée au format tools/bible_binary.py.
+    Renvoie un résumé {path, seconds, size, corrections, guesses, warnings, binary_size}.
+    """
+    start = time.perf_counter()
     path = Path(file_path)
     
     if not path.exists():
         raise FileNotFoundError(f'Fichier introuvable: {file_path}')
     
-    # Lire le contenu (gérer le BOM UTF-8)
-    with open(path, 'r', encoding='utf-8-sig') as f:
-        raw_content = f.read()
-    
-    # Essayer de parser directement
+    corrections = guesses = 0
+    # Essayer de parser directement (gérer le BOM UTF-8)
     try:
-        data = json.loads(raw_content)
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
     except json.JSONDecodeError:
-        # Corriger le format
-        fixed_content = fix_json_format(raw_content)
+        # Corriger le format en streaming vers un fichier temporaire
+        fixed_path = str(path) + '.repaired'
         try:
-            data = json.loads(fixed_content)
+            repairer = repair_file(str(path), fixed_path)
+            corrections, guesses = sum(repairer.counts.values()), repairer.guess_count
+            if verbose:
+                print_report(repairer, file_path)
+            with open(fixed_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         except json.JSONDecodeError as e:
-            # Afficher le contenu partiel pour debug
-            print(f'❌ {file_path}: JSON invalide même après correction')
-            print(f'Erreur: {e}')
-            print(f'Contenu partiel (200 chars): {fixed_content[:200]}...')
+            if verbose:
+                print(f'❌ {file_path}: JSON invalide même après correction')
+                print(f'Erreur: {e}')
+                print(f'Contexte (200 chars): {e.doc[max(0, e.pos - 100):e.pos + 100]}...')
             raise ValueError(f'❌ {file_path}: JSON invalide même après correction: {e}')
+        finally:
+            if os.path.exists(fixed_path):
+                os.remove(fixed_path)
     
     # Valider la structure
-    validate_structure(data, file_path)
+    warnings = validate_structure(data, file_path)
     
     # Réécrire en JSON propre
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
-    print(f'✅ Corrigé et validé: {file_path}')
+    write_json_atomic(data, path)
+    
+    binary_size = None
+    if binary:
+        output = binary_path(path, binary_dir)
+        verse_count, binary_size = export_bible(data, output, compression)
+        if verbose:
+            print(f'📦 Export binaire: {output} ({verse_count} versets, {binary_size / 1024:.1f} KB)')
+    
+    if verbose:
+        for warning in warnings:
+            print(warning)
+        print(f'✅ Corrigé et validé: {file_path}')
+    return {
+        'path': str(file_path),
+        'seconds': time.perf_counter() - start,
+        'size': path.stat().st_size,
+        'corrections': corrections,
+        'guesses': guesses,
+        'warnings': warnings,
+        'binary_size': binary_size,
+    }
+
+def _fix_file_job(file_path, **options):
+    """Job de processus : corrige un fichier sans afficher, l'erreur éventuelle fait partie du résumé"""
+    start = time.perf_counter()
+    try:
+        return dict(fix_file(file_path, verbose=False, **options), error=None)
+    except Exception as e:
+        return {'path': str(file_path), 'seconds': time.perf_counter() - start, 'size': 0,
+                'corrections': 0, 'guesses': 0, 'warnings': [], 'binary_size': None, 'error': str(e)}
+
+def expand_paths(paths):
+    """Fichiers à traiter : fichiers tels quels, dossiers -> *.json, motifs glob développés"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(str(p) for p in Path(path).glob('*.json')))
+        elif glob.has_magic(path):
+            files.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            files.append(path)
+    # Sans doublons, dans l'ordre
+    return list(dict.fromkeys(files))
+
+def fix_files(files, workers=None, **options):
+    """Corrige les fichiers en parallèle ; renvoie les résumés dans l'ordre des fichiers
+
+    options est passé à fix_file (binary, binary_dir, compression).
+    """
+    job = partial(_fix_file_job, **options)
+    if len(files) == 1 or workers == 1:
+        return [job(file_path) for file_path in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(job, files))
+
+def print_summary(results, elapsed):
+    """Tableau récapitulatif : durée, taille, corrections et problèmes par fichier"""
+    width = max([len(Path(result['path']).name) for result in results] + [7])
+    binary = any(result['binary_size'] is not None for result in results)
+    binary_header = f"  {'Binaire':>9}" if binary else ''
+    rule = '-' * (width + 48 + len(binary_header))
+    print(f"\n{'Fichier':<{width}}  {'Durée':>7}  {'Taille':>9}{binary_header}  {'Corr.':>7}  {'Supp.':>6}  Statut")
+    print(rule)
+    for result in results:
+        if result['error']:
+            status = result['error']
+        elif result['warnings']:
+            status = '⚠️ ' + '; '.join(warning.split(': ', 1)[-1] for warning in result['warnings'])
+        else:
+            status = '✅'
+        binary_size = ''
+        if binary:
+            binary_size = f"  {result['binary_size'] / 1024 / 1024:>6.2f} MB" if result['binary_size'] else f"  {'-':>9}"
+        print(f"{Path(result['path']).name:<{width}}  {result['seconds']:>6.2f}s  "
+              f"{result['size'] / 1024 / 1024:>6.2f} MB{binary_size}  {result['corrections']:>7}  "
+              f"{result['guesses']:>6}  {status}")
+    failed = sum(1 for result in results if result['error'])
+    total = sum(result['seconds'] for result in results)
+    print(rule)
+    print(f"{len(results)} fichiers, {failed} en échec, {elapsed:.2f}s ({total:.2f}s cumulées)")
 
 def main():
-    if len(sys.argv) < 2:
-        print('Usage: python tool/fix_bible_assets.py <chemin1.json> <chemin2.json> ...')
+    parser = argparse.ArgumentParser(description='Corriger et valider les fichiers JSON bibliques')
+    parser.add_argument('paths', nargs='+', help='Fichiers, dossiers ou motifs glob (ex: assets/bibles/*.json)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Nombre de processus (défaut: nombre de cœurs, 1: séquentiel)')
+    parser.add_argument('--binary', action='store_true',
+                        help='Exporter aussi chaque Bible au format binaire compact (.sbib)')
+    parser.add_argument('--binary-dir', default=None, help='Dossier des .sbib (défaut: à côté du JSON)')
+    parser.add_argument('--compress', choices=sorted(COMPRESSIONS), default='none',
+                        help='Compression par chapitre du .sbib (défaut: %(default)s)')
+    args = parser.parse_args()
+    options = {'binary': args.binary, 'binary_dir': args.binary_dir, 'compression': args.compress}
+    if args.binary_dir:
+        os.makedirs(args.binary_dir, exist_ok=True)
+    
+    files = expand_paths(args.paths)
+    if not files:
+        print('❌ Aucun fichier JSON trouvé')
         sys.exit(1)
     
-    success = True
-    for file_path in sys.argv[1:]:
+    # Un seul fichier : mode détaillé, comme avant
+    if len(files) == 1:
         try:
-            fix_file(file_path)
+            fix_file(files[0], **options)
         except Exception as e:
             print(e)
-            success = False
+            sys.exit(1)
+        return
+    
+    start = time.perf_counter()
+    results = fix_files(files, args.workers, **options)
+    print_summary(results, time.perf_counter() - start)
     
-    if not success:
+    if any(result['error'] for result in results):
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
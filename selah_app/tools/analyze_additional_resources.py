@@ -3,11 +3,14 @@
 Script pour analyser les ressources supplémentaires disponibles
 """
 
-import pandas as pd
 import json
 import os
+from collections import Counter
 from pathlib import Path
 
+from bible_index import CONCORDANCE_FILE, TOPICS_FILE, MappedIndex
+from bsb_excel_stream import iter_sheet_rows
+
 def analyze_bibles_excel():
     """Analyse le fichier bibles.xlsx"""
     print("🔍 Analyse de bibles.xlsx")
@@ -15,20 +18,31 @@ def analyze_bibles_excel():
     
     try:
         excel_path = "/Users/gafardgnane/Downloads/Bibles versions/bibles.xlsx"
-        df = pd.read_excel(excel_path)
-        
-        print(f"📊 Dimensions: {df.shape[0]} lignes x {df.shape[1]} colonnes")
-        print(f"📝 Colonnes: {list(df.columns)}")
+        # Lecture en streaming (curseur openpyxl), sans DataFrame
+        rows = iter_sheet_rows(excel_path)
+        columns = list(next(rows, ()))
+        print(f"📝 Colonnes: {columns}")
         
-        # Afficher les premières lignes
+        # Compter lignes, valeurs et types par colonne en un seul passage
+        row_count = 0
+        non_null = Counter()
+        types = {}
         print("\n📋 Premières 5 lignes:")
-        print(df.head().to_string())
+        for values in rows:
+            if row_count < 5:
+                print(f"  {values}")
+            row_count += 1
+            for col, value in zip(columns, values):
+                if value is not None:
+                    non_null[col] += 1
+                    types.setdefault(col, type(value).__name__)
+        
+        print(f"📊 Dimensions: {row_count} lignes x {len(columns)} colonnes")
         
         # Analyser les types de données
         print(f"\n🏷️ Types de données:")
-        for col in df.columns:
-            non_null_count = df[col].count()
-            print(f"  {col}: {df[col].dtype} ({non_null_count} valeurs non-null)")
+        for col in columns:
+            print(f"  {col}: {types.get(col, '-')} ({non_null[col]} valeurs non-null)")
         
         return True
         
@@ -111,6 +125,19 @@ def check_pdf_outlines():
         print("❌ Fichier PDF non trouvé")
         return False
 
+def check_generated_indexes(data_dir="assets/data"):
+    """Résume les index binaires générés (mappés : seul l'en-tête est lu)"""
+    print("\n🔍 Index générés")
+    print("=" * 50)
+    
+    for filename, unit in ((CONCORDANCE_FILE, 'lemmes'), (TOPICS_FILE, 'thèmes')):
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            print(f"❌ {filename} non trouvé (python tools/bible_index.py build {data_dir})")
+            continue
+        with MappedIndex(path) as index:
+            print(f"📇 {filename}: {len(index)} {unit} ({os.path.getsize(path) / 1024:.1f} KB)")
+
 def main():
     print("🎯 ANALYSE DES RESSOURCES SUPPLÉMENTAIRES")
     print("=" * 60)
@@ -124,6 +151,9 @@ def main():
     # Vérifier le PDF
     check_pdf_outlines()
     
+    # Résumer les index déjà générés
+    check_generated_indexes()
+    
     print("\n" + "=" * 60)
     print("📊 RÉSUMÉ DES RESSOURCES DISPONIBLES")
     print("=" * 60)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Format binaire compact d'une version de la Bible (arbre
+Testaments/Books/Chapters/Verses des assets), lisible verset par verset.
+
+Disposition du fichier (little-endian) :
+
+    En-tête (HEADER, 36 octets)
+        magic         4s   b'SBIB'
+        version       u16
+        compression   u16  0 : aucune, 1 : zlib, 2 : zstd (par bloc de chapitre)
+        book_count    u32
+        chapter_count u32
+        verse_count   u32  nombre d'emplacements de versets
+        meta_offset   u32  métadonnées (JSON UTF-8 : champs scalaires de la racine)
+        meta_size     u32
+        blob_offset   u32  début des blocs de texte
+        blob_size     u32
+    Livres (BOOK, 8 octets) : first_chapter u32, chapter_count u32
+    Chapitres (CHAPTER, 16 octets) : first_verse u32, verse_count u32,
+        block_offset u32 (relatif au blob), block_size u32
+    Versets (u32) : fin du texte du verset dans le bloc (décompressé) de son
+        chapitre ; le verset commence à la fin du précédent (0 pour le premier)
+    Métadonnées, puis blob : un bloc UTF-8 par chapitre, compressé ou non
+
+Comme l'importeur de l'application, les livres sont numérotés par position
+(ordre canonique) et les chapitres aussi ; le numéro de verset est son ID
+s'il est entier, sinon sa position. Un verset absent ou vide occupe un
+emplacement de longueur nulle. Un chapitre dont un ID dépasse MAX_VERSE
+(ID aberrant qui ferait allouer des milliers d'emplacements vides) est
+numéroté par position.
+
+Accès à un verset : livre -> chapitre -> emplacement, trois lectures de
+table en O(1), puis une tranche du blob (ou la décompression d'un seul
+chapitre). Rien d'autre n'est lu ni analysé.
+
+Usage:
+    python tools/bible_binary.py export assets/bibles/lsg.json assets/bibles/lsg.sbib [--compress zstd]
+    python tools/bible_binary.py verse assets/bibles/lsg.sbib 43 3 16
+    python tools/bible_binary.py chapter assets/bibles/lsg.sbib 19 23
+"""
+
+import json
+import os
+import struct
+import zlib
+from array import array
+
+from bible_refs import CHAPTER_FACTOR, decode_verse_id
+
+try:
+    import zstandard
+except ImportError:  # zstd optionnel, zlib reste disponible
+    zstandard = None
+
+MAGIC = b'SBIB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIIIII')
+BOOK = struct.Struct('<II')
+CHAPTER = struct.Struct('<IIII')
+VERSE = struct.Struct('<I')
+# Plus grand numéro de verset accepté (disposition BBCCCVVV des IDs)
+MAX_VERSE = CHAPTER_FACTOR - 1
+
+COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_ZSTD = 0, 1, 2
+COMPRESSIONS = {'none': COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB, 'zstd': COMPRESSION_ZSTD}
+DEFAULT_LEVELS = {COMPRESSION_ZLIB: 9, COMPRESSION_ZSTD: 19}
+
+
+def _children(node, key):
+    """Liste enfant d'un nœud ('Books' ou 'books'), vide si absente"""
+    if not isinstance(node, dict):
+        return []
+    children = node.get(key, node.get(key.lower()))
+    return children if isinstance(children, list) else []
+
+
+def _verse_number(verse, position):
+    verse_id = verse.get('ID', verse.get('id')) if isinstance(verse, dict) else None
+    try:
+        return int(verse_id)
+    except (TypeError, ValueError):
+        return position
+
+
+def _verse_text(verse):
+    if isinstance(verse, dict):
+        text = verse.get('Text', verse.get('text'))
+        return text if isinstance(text, str) else ''
+    return verse if isinstance(verse, str) else ''
+
+
+def iter_tree_books(data):
+    """Livres d'un arbre Testaments/Books/Chapters/Verses : pour chaque livre, [[(verset, texte)] par chapitre]"""
+    for testament in _children(data, 'Testaments'):
+        for book in _children(testament, 'Books'):
+            chapters = []
+            for chapter in _children(book, 'Chapters'):
+                verses = _children(chapter, 'Verses')
+                chapters.append([(_verse_number(verse, position), _verse_text(verse))
+                                 for position, verse in enumerate(verses, 1)])
+            yield chapters
+
+
+def _compressor(compression, level):
+    if compression == COMPRESSION_ZLIB:
+        return lambda data: zlib.compress(data, level)
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("Compression zstd demandée mais le module zstandard n'est pas installé")
+        return zstandard.ZstdCompressor(level=level).compress
+    return None
+
+
+class BibleBinaryWriter:
+    """Accumule les livres d'une version puis écrit le conteneur binaire"""
+
+    def __init__(self, compression=COMPRESSION_NONE, level=None):
+        self.compression = COMPRESSIONS.get(compression, compression)
+        self.level = level if level is not None else DEFAULT_LEVELS.get(self.compression)
+        self._compress = _compressor(self.compression, self.level)
+        self.metadata = {}
+        self.books = array('I')
+        self.chapters = array('I')
+        self.verse_ends = array('I')
+        self.blob = bytearray()
+        self.text_size = 0
+        self.text_count = 0
+        self.renumbered_chapters = 0
+
+    def __len__(self):
+        return len(self.verse_ends)
+
+    def add_book(self, chapters):
+        """Ajoute un livre : liste de chapitres, chacun liste de (numéro de verset, texte)"""
+        self.books.extend((len(self.chapters) // 4, len(chapters)))
+        for verses in chapters:
+            self.add_chapter(verses)
+
+    def add_chapter(self, verses):
+        if any(number > MAX_VERSE for number, _ in verses):
+            verses = [(position, text) for position, (_, text) in enumerate(verses, 1)]
+            self.renumbered_chapters += 1
+        slots = max((number for number, _ in verses if number >= 1), default=0)
+        texts = [b''] * slots
+        for number, text in verses:
+            if number >= 1 and text:
+                texts[number - 1] = text.encode('utf-8')
+
+        block = bytearray()
+        first_verse = len(self.verse_ends)
+        for text in texts:
+            block += text
+            self.verse_ends.append(len(block))
+        self.text_size += len(block)
+        self.text_count += sum(1 for text in texts if text)
+        if self._compress is not None and block:
+            block = self._compress(bytes(block))
+        self.chapters.extend((first_verse, slots, len(self.blob), len(block)))
+        self.blob += block
+
+    def add_tree(self, data):
+        """Ajoute tous les livres d'un arbre Testaments/Books/Chapters/Verses et ses métadonnées"""
+        if isinstance(data, dict):
+            self.metadata = {key: value for key, value in data.items()
+                             if isinstance(value, (str, int, float, bool)) or value is None}
+        for chapters in iter_tree_books(data):
+            self.add_book(chapters)
+        return self
+
+    def to_bytes(self):
+        meta = json.dumps(self.metadata, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        tables = self.books.tobytes() + self.chapters.tobytes() + self.verse_ends.tobytes()
+        meta_offset = HEADER.size + len(tables)
+        blob_offset = meta_offset + len(meta)
+        header = HEADER.pack(MAGIC, VERSION, self.compression, len(self.books) // 2, len(self.chapters) // 4,
+                             len(self.verse_ends), meta_offset, len(meta), blob_offset, len(self.blob))
+        return header + tables + meta + bytes(self.blob)
+
+    def write(self, path):
+        """Écrit le conteneur de façon atomique et renvoie sa taille en octets"""
+        data = self.to_bytes()
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return len(data)
+
+
+def export_bible(data, path, compression=COMPRESSION_NONE, level=None):
+    """Exporte un arbre biblique validé au format binaire ; renvoie (versets, octets)"""
+    writer = BibleBinaryWriter(compression, level).add_tree(data)
+    if writer.renumbered_chapters:
+        print(f"⚠️  {writer.renumbered_chapters} chapitres numérotés par position "
+              f"(numéro de verset > {MAX_VERSE})")
+    return writer.text_count, writer.write(path)
+
+
+class BibleBinary:
+    """Lecteur du conteneur binaire (bytes ou mmap) : verset ou chapitre en O(1)"""
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        (magic, version, self.compression, self.book_count, self.chapter_count, self.verse_count,
+         meta_offset, meta_size, self.blob_offset, self.blob_size) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Bible binaire invalide (magic {magic!r})")
+        if version != VERSION:
+            raise ValueError(f"Version de Bible binaire non supportée: {version}")
+        self.books_offset = HEADER.size
+        self.chapters_offset = self.books_offset + self.book_count * BOOK.size
+        self.verses_offset = self.chapters_offset + self.chapter_count * CHAPTER.size
+        self.metadata = json.loads(bytes(self.buffer[meta_offset:meta_offset + meta_size]).decode('utf-8'))
+        self._decompress = self._decompressor()
+        self._cached_block = (None, None)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return self.verse_count
+
+    def _decompressor(self):
+        if self.compression == COMPRESSION_ZLIB:
+            return zlib.decompress
+        if self.compression == COMPRESSION_ZSTD:
+            if zstandard is None:
+                raise ValueError("Bible compressée en zstd mais le module zstandard n'est pas installé")
+            return zstandard.ZstdDecompressor().decompress
+        return None
+
+    def _chapter_index(self, book, chapter):
+        """Index global du chapitre (livre et chapitre numérotés à partir de 1), -1 si absent"""
+        if not 1 <= book <= self.book_count:
+            return -1
+        first_chapter, chapter_count = BOOK.unpack_from(self.buffer, self.books_offset + (book - 1) * BOOK.size)
+        if not 1 <= chapter <= chapter_count:
+            return -1
+        return first_chapter + chapter - 1
+
+    def _block(self, index):
+        """Texte UTF-8 (décompressé) d'un chapitre et son premier emplacement de verset"""
+        first_verse, verse_count, block_offset, block_size = CHAPTER.unpack_from(
+            self.buffer, self.chapters_offset + index * CHAPTER.size)
+        start = self.blob_offset + block_offset
+        block = self.buffer[start:start + block_size]
+        if self._decompress is not None and block_size:
+            if self._cached_block[0] != index:
+                self._cached_block = (index, self._decompress(block))
+            block = self._cached_block[1]
+        return block, first_verse, verse_count
+
+    def _verse_end(self, slot):
+        return VERSE.unpack_from(self.buffer, self.verses_offset + slot * VERSE.size)[0]
+
+    def chapter_count(self, book):
+        """Nombre de chapitres d'un livre (0 si absent)"""
+        if not 1 <= book <= self.book_count:
+            return 0
+        return BOOK.unpack_from(self.buffer, self.books_offset + (book - 1) * BOOK.size)[1]
+
+    def verse(self, book, chapter, verse):
+        """Texte d'un verset, None s'il est absent ou vide"""
+        index = self._chapter_index(book, chapter)
+        if index < 0:
+            return None
+        block, first_verse, verse_count = self._block(index)
+        if not 1 <= verse <= verse_count:
+            return None
+        slot = first_verse + verse - 1
+        start = self._verse_end(slot - 1) if verse > 1 else 0
+        end = self._verse_end(slot)
+        return bytes(block[start:end]).decode('utf-8') if end > start else None
+
+    def verse_by_id(self, verse_id):
+        """Texte d'un verset d'après son ID BBCCCVVV (voir bible_refs)"""
+        return self.verse(*decode_verse_id(verse_id))
+
+    def chapter(self, book, chapter):
+        """Versets d'un chapitre : [(numéro, texte)] sans les emplacements vides"""
+        index = self._chapter_index(book, chapter)
+        if index < 0:
+            return []
+        block, first_verse, verse_count = self._block(index)
+        ends = array('I')
+        ends.frombytes(self.buffer[self.verses_offset + first_verse * VERSE.size:
+                                   self.verses_offset + (first_verse + verse_count) * VERSE.size])
+        text = bytes(block)
+        verses = []
+        start = 0
+        for number, end in enumerate(ends, 1):
+            if end > start:
+                verses.append((number, text[start:end].decode('utf-8')))
+            start = end
+        return verses
+
+    def release(self):
+        """Libère le memoryview (nécessaire avant de fermer un mmap)"""
+        self._cached_block = (None, None)
+        self.buffer.release()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Bible au format binaire compact (export et lecture)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export = subparsers.add_parser('export', help='Convertir une Bible JSON (Testaments/Books/...) en binaire')
+    export.add_argument('input', help='Fichier JSON valide (voir tool/fix_bible_assets.py)')
+    export.add_argument('output', help='Fichier binaire de sortie (.sbib)')
+    export.add_argument('--compress', choices=sorted(COMPRESSIONS), default='none',
+                        help='Compression par chapitre (défaut: %(default)s)')
+    verse = subparsers.add_parser('verse', help='Afficher un verset')
+    verse.add_argument('path')
+    verse.add_argument('book', type=int)
+    verse.add_argument('chapter', type=int)
+    verse.add_argument('verse', type=int)
+    chapter = subparsers.add_parser('chapter', help='Afficher un chapitre')
+    chapter.add_argument('path')
+    chapter.add_argument('book', type=int)
+    chapter.add_argument('chapter', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        with open(args.input, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
+        verse_count, size = export_bible(data, args.output, args.compress)
+        print(f"✅ {verse_count} versets -> {args.output} ({size / 1024:.1f} KB, "
+              f"JSON: {os.path.getsize(args.input) / 1024:.1f} KB)")
+        return
+
+    bible = BibleBinary.open(args.path)
+    if args.command == 'verse':
+        text = bible.verse(args.book, args.chapter, args.verse)
+        print(text if text is not None else '❌ Verset introuvable')
+    else:
+        for number, text in bible.chapter(args.book, args.chapter):
+            print(f"{number}. {text}")
+
+
+if __name__ == "__main__":
+    main()
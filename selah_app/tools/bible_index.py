@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Bibliothèque de requêtes sur les index générés, via mmap.
+
+Les fichiers binaires (concordance.bin et topics.bin au format
+concordance_binary, verse_topics.idx et verse_lemmas.idx au format
+verse_index, concordance_prefix.idx au format prefix_index,
+concordance_fuzzy.idx au format fuzzy_index, bible_versions.bin au format
+parallel_versions) sont mappés en lecture seule : l'ouverture ne lit que
+l'en-tête, les pages utiles sont chargées par le système à la demande et
+partagées entre tous les processus qui interrogent les mêmes fichiers.
+
+Usage:
+    python tools/bible_index.py build assets/data
+    python tools/bible_index.py lemma aimer [--dir assets/data]
+    python tools/bible_index.py topic 12
+    python tools/bible_index.py verse "Romains 8:28"
+    python tools/bible_index.py words "Jean 3:16"
+    python tools/bible_index.py complete eter
+    python tools/bible_index.py correct esperence
+"""
+
+import argparse
+import gzip
+import json
+import mmap
+import os
+
+from bible_refs import reference_to_verse_id, verse_id_to_reference
+from concordance_binary import ConcordanceIndex
+from fuzzy_index import FUZZY_INDEX_FILE, FuzzyIndex, write_fuzzy_index
+from parallel_versions import PARALLEL_VERSIONS_FILE, ParallelVersions
+from prefix_index import PREFIX_INDEX_FILE, TOP_N, PrefixIndex, write_prefix_index
+from verse_index import (
+    VERSE_LEMMAS_FILE,
+    VERSE_TOPICS_FILE,
+    VerseIndex,
+    write_concordance_indexes,
+    write_topic_indexes,
+)
+
+CONCORDANCE_FILE = 'concordance.bin'
+TOPICS_FILE = 'topics.bin'
+
+
+class MappedIndex:
+    """Index binaire mappé en mémoire (lecture seule, sans copie)"""
+
+    def __init__(self, path, index_class=ConcordanceIndex):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = index_class(self._map)
+
+    def lookup(self, key):
+        return self.index.lookup(key)
+
+    def count(self, key):
+        return self.index.count(key)
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        if self._map is not None:
+            self.index.release()
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BibleIndexReader:
+    """Point d'entrée des requêtes : lemme -> versets, thème -> versets, verset -> thèmes/lemmes
+
+    Chaque index est ouvert (mappé) au premier appel qui en a besoin.
+    """
+
+    def __init__(self, data_dir='assets/data'):
+        self.data_dir = data_dir
+        self._indexes = {}
+
+    def _index(self, filename, index_class=ConcordanceIndex):
+        if filename not in self._indexes:
+            self._indexes[filename] = MappedIndex(os.path.join(self.data_dir, filename), index_class)
+        return self._indexes[filename]
+
+    def verses_for_lemma(self, lemma):
+        """IDs de versets (BBCCCVVV) contenant le lemme"""
+        return self._index(CONCORDANCE_FILE).lookup(lemma)
+
+    def verses_for_topic(self, topic_id):
+        """IDs de versets liés au thème"""
+        return self._index(TOPICS_FILE).lookup(topic_id)
+
+    def topics_for_verse(self, verse):
+        """IDs des thèmes couvrant un verset (ID entier ou référence 'Romains 8:28')"""
+        vid = verse if isinstance(verse, int) else reference_to_verse_id(verse)
+        if vid is None:
+            return []
+        return self._index(VERSE_TOPICS_FILE, VerseIndex).lookup(vid)
+
+    def lemmas_for_verse(self, verse):
+        """Lemmes présents dans un verset (ID entier ou référence 'Jean 3:16')"""
+        vid = verse if isinstance(verse, int) else reference_to_verse_id(verse)
+        if vid is None:
+            return []
+        return self._index(VERSE_LEMMAS_FILE, VerseIndex).lookup(vid)
+
+    def complete(self, prefix, limit=TOP_N):
+        """Lemmes les plus fréquents commençant par prefix : [(lemme, fréquence)]"""
+        return self._index(PREFIX_INDEX_FILE, PrefixIndex).index.complete(prefix, limit)
+
+    def correct(self, word, limit=TOP_N):
+        """Lemmes à au plus 2 fautes de word (accents ignorés) : [(lemme, distance, fréquence)]"""
+        return self._index(FUZZY_INDEX_FILE, FuzzyIndex).index.lookup(word, limit)
+
+    def compare(self, verse, versions=None):
+        """Textes {version: texte} d'un verset (ID entier ou référence), limités aux versions demandées"""
+        return self._index(PARALLEL_VERSIONS_FILE, ParallelVersions).index.verse(verse, versions)
+
+    def close(self):
+        for index in self._indexes.values():
+            index.close()
+        self._indexes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_jsonl_gz(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def build_indexes(data_dir):
+    """Construit les index binaires à partir de concordance.jsonl.gz et topics_links.jsonl.gz"""
+    concordance_path = os.path.join(data_dir, 'concordance.jsonl.gz')
+    if os.path.exists(concordance_path):
+        lemma_count, verse_count = write_concordance_indexes(_read_jsonl_gz(concordance_path),
+                                                             os.path.join(data_dir, CONCORDANCE_FILE),
+                                                             os.path.join(data_dir, VERSE_LEMMAS_FILE))
+        print(f"✅ {CONCORDANCE_FILE}: {lemma_count} lemmes, {VERSE_LEMMAS_FILE}: {verse_count} versets")
+        lemma_count, size = write_prefix_index(_read_jsonl_gz(concordance_path),
+                                               os.path.join(data_dir, PREFIX_INDEX_FILE))
+        print(f"✅ {PREFIX_INDEX_FILE}: {lemma_count} lemmes ({size / 1024:.1f} KB)")
+        lemma_count, size = write_fuzzy_index(_read_jsonl_gz(concordance_path),
+                                              os.path.join(data_dir, FUZZY_INDEX_FILE))
+        print(f"✅ {FUZZY_INDEX_FILE}: {lemma_count} lemmes ({size / 1024:.1f} KB)")
+
+    links_path = os.path.join(data_dir, 'topics_links.jsonl.gz')
+    if os.path.exists(links_path):
+        topic_count, verse_count = write_topic_indexes(_read_jsonl_gz(links_path),
+                                                       os.path.join(data_dir, TOPICS_FILE),
+                                                       os.path.join(data_dir, VERSE_TOPICS_FILE))
+        print(f"✅ {TOPICS_FILE}: {topic_count} thèmes, {VERSE_TOPICS_FILE}: {verse_count} versets")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Requêtes sur les index bibliques binaires (mmap)')
+    parser.add_argument('command', choices=['build', 'lemma', 'topic', 'verse', 'words', 'complete', 'correct'])
+    parser.add_argument('value', nargs='?', help='Dossier (build), lemme, ID de thème, référence, préfixe ou mot à corriger')
+    parser.add_argument('--dir', default='assets/data', help='Dossier des index')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_indexes(args.value or args.dir)
+        return
+
+    with BibleIndexReader(args.dir) as reader:
+        if args.command == 'lemma':
+            results = [verse_id_to_reference(vid) for vid in reader.verses_for_lemma(args.value)]
+        elif args.command == 'topic':
+            results = [verse_id_to_reference(vid) for vid in reader.verses_for_topic(int(args.value))]
+        elif args.command == 'verse':
+            results = reader.topics_for_verse(args.value)
+        elif args.command == 'words':
+            results = reader.lemmas_for_verse(args.value)
+        elif args.command == 'complete':
+            results = [f"{lemma} ({frequency})" for lemma, frequency in reader.complete(args.value)]
+        else:
+            results = [f"{lemma} (distance {distance}, {frequency})"
+                       for lemma, distance, frequency in reader.correct(args.value)]
+
+    print(f"🔍 {len(results)} résultats")
+    for result in results[:50]:
+        print(f"   {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Analyse des références bibliques partagée par tous les convertisseurs.
+
+- un motif compilé une seule fois au chargement du module ('Jean 3:16',
+  'Ésaïe 53:5', '1 Jn 4:8', 'Matthieu.5.3', 'Gen 32:15-18') ;
+- un trie d'alias de livres (noms français et anglais, abréviations de
+  assets/bible/lsg_canon.json et assets/data/bible_books.json), insensible à
+  la casse, aux accents et aux espaces, avec complétion d'un préfixe non
+  ambigu ('Deuter' -> Deutéronome) ;
+- un cache LRU : les mêmes références reviennent des milliers de fois dans
+  les feuilles Excel ;
+- des IDs de versets entiers BBCCCVVV (livre, chapitre, verset) numérotés
+  d'après lsg_canon.json : Jean 3:16 -> 43003016.
+"""
+
+import json
+import re
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+ASSETS_DIR = Path(__file__).resolve().parent.parent / 'assets'
+CANON_PATH = ASSETS_DIR / 'bible' / 'lsg_canon.json'
+BOOKS_PATH = ASSETS_DIR / 'data' / 'bible_books.json'
+
+# Livre (lettres accentuées, chiffres, espaces), séparateur, chapitre, verset, fin de plage optionnelle
+REFERENCE_RE = re.compile(
+    r'^\s*(?P<book>.*?\S)[\s.]+(?P<chapter>\d+)\s*[:.,]\s*(?P<verse>\d+)(?:\s*[-–]\s*(?P<end>\d+))?'
+)
+
+BookInfo = namedtuple('BookInfo', ['num', 'name', 'abbr'])
+
+# Abréviations françaises historiques des convertisseurs BSB
+FRENCH_ALIASES = {
+    'Gen': 1, 'Ex': 2, 'Lév': 3, 'Nomb': 4, 'Deut': 5, 'Jos': 6, 'Jug': 7, 'Ruth': 8,
+    '1 Sam': 9, '2 Sam': 10, '1 Rois': 11, '2 Rois': 12, '1 Chron': 13, '2 Chron': 14,
+    'Esd': 15, 'Néh': 16, 'Est': 17, 'Job': 18, 'Ps': 19, 'Prov': 20, 'Eccl': 21,
+    'Cant': 22, 'És': 23, 'Jér': 24, 'Lam': 25, 'Éz': 26, 'Dan': 27, 'Os': 28,
+    'Joël': 29, 'Am': 30, 'Abd': 31, 'Jon': 32, 'Mich': 33, 'Nah': 34, 'Hab': 35,
+    'Soph': 36, 'Agg': 37, 'Zac': 38, 'Mal': 39, 'Mat': 40, 'Marc': 41, 'Luc': 42,
+    'Jean': 43, 'Act': 44, 'Rom': 45, '1 Cor': 46, '2 Cor': 47, 'Gal': 48, 'Éph': 49,
+    'Phil': 50, 'Col': 51, '1 Thess': 52, '2 Thess': 53, '1 Tim': 54, '2 Tim': 55,
+    'Tite': 56, 'Philém': 57, 'Héb': 58, 'Jac': 59, '1 Pi': 60, '2 Pi': 61,
+    '1 Jean': 62, '2 Jean': 63, '3 Jean': 64, 'Jude': 65, 'Apoc': 66,
+}
+
+# Noms et abréviations anglais (BSB, bibles.xlsx), dans l'ordre du canon
+ENGLISH_ALIASES = [
+    ['Genesis', 'Gen', 'Ge', 'Gn'],
+    ['Exodus', 'Exod', 'Exo', 'Ex'],
+    ['Leviticus', 'Lev', 'Lv'],
+    ['Numbers', 'Num', 'Nm', 'Nb'],
+    ['Deuteronomy', 'Deut', 'Dt'],
+    ['Joshua', 'Josh', 'Jos'],
+    ['Judges', 'Judg', 'Jdg'],
+    ['Ruth', 'Rth'],
+    ['1 Samuel', '1 Sam', '1 Sa'],
+    ['2 Samuel', '2 Sam', '2 Sa'],
+    ['1 Kings', '1 Kgs', '1 Ki'],
+    ['2 Kings', '2 Kgs', '2 Ki'],
+    ['1 Chronicles', '1 Chron', '1 Chr'],
+    ['2 Chronicles', '2 Chron', '2 Chr'],
+    ['Ezra', 'Ezr'],
+    ['Nehemiah', 'Neh'],
+    ['Esther', 'Esth'],
+    ['Job'],
+    ['Psalms', 'Psalm', 'Psa', 'Ps'],
+    ['Proverbs', 'Prov', 'Pro'],
+    ['Ecclesiastes', 'Eccles', 'Eccl', 'Ecc'],
+    ['Song of Solomon', 'Song of Songs', 'Song'],
+    ['Isaiah', 'Isa', 'Is'],
+    ['Jeremiah', 'Jer'],
+    ['Lamentations', 'Lam'],
+    ['Ezekiel', 'Ezek', 'Eze'],
+    ['Daniel', 'Dan'],
+    ['Hosea', 'Hos'],
+    ['Joel'],
+    ['Amos'],
+    ['Obadiah', 'Obad', 'Oba'],
+    ['Jonah', 'Jon'],
+    ['Micah', 'Mic'],
+    ['Nahum', 'Nah'],
+    ['Habakkuk', 'Hab'],
+    ['Zephaniah', 'Zeph', 'Zep'],
+    ['Haggai', 'Hag'],
+    ['Zechariah', 'Zech', 'Zec'],
+    ['Malachi', 'Mal'],
+    ['Matthew', 'Matt', 'Mt'],
+    ['Mark', 'Mrk', 'Mk'],
+    ['Luke', 'Luk', 'Lk'],
+    ['John', 'Jhn', 'Jn'],
+    ['Acts'],
+    ['Romans', 'Rom'],
+    ['1 Corinthians', '1 Cor'],
+    ['2 Corinthians', '2 Cor'],
+    ['Galatians', 'Gal'],
+    ['Ephesians', 'Eph'],
+    ['Philippians', 'Phil', 'Php'],
+    ['Colossians', 'Col'],
+    ['1 Thessalonians', '1 Thess', '1 Th'],
+    ['2 Thessalonians', '2 Thess', '2 Th'],
+    ['1 Timothy', '1 Tim'],
+    ['2 Timothy', '2 Tim'],
+    ['Titus', 'Tit'],
+    ['Philemon', 'Philem', 'Phlm'],
+    ['Hebrews', 'Heb'],
+    ['James', 'Jas'],
+    ['1 Peter', '1 Pet'],
+    ['2 Peter', '2 Pet'],
+    ['1 John', '1 Jn'],
+    ['2 John', '2 Jn'],
+    ['3 John', '3 Jn'],
+    ['Jude'],
+    ['Revelation', 'Rev', 'Re'],
+]
+
+# Longueur minimale d'un préfixe pour la complétion non ambiguë
+MIN_PREFIX_LENGTH = 3
+
+# Facteurs de l'ID de verset BBCCCVVV
+BOOK_FACTOR = 1_000_000
+CHAPTER_FACTOR = 1_000
+
+
+def fold_key(text):
+    """Clé d'alias : minuscules, sans accents, sans espaces ni ponctuation"""
+    text = unicodedata.normalize('NFD', str(text).casefold())
+    return ''.join(ch for ch in text if ch.isalnum() and not unicodedata.combining(ch))
+
+
+class _TrieNode:
+    __slots__ = ('children', 'book', 'books')
+
+    def __init__(self):
+        self.children = {}
+        self.book = None      # livre dont un alias se termine ici
+        self.books = set()    # livres accessibles sous ce préfixe
+
+
+class BookAliasTrie:
+    """Trie des alias de livres, indexé sur fold_key()"""
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.conflicts = []
+
+    def add(self, alias, num):
+        key = fold_key(alias)
+        if not key:
+            return
+        node = self.root
+        node.books.add(num)
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            node.books.add(num)
+        if node.book is None:
+            node.book = num
+        elif node.book != num:
+            # Le premier alias enregistré (canon français) reste prioritaire
+            self.conflicts.append((alias, node.book, num))
+
+    def lookup(self, name):
+        """Numéro du livre pour un alias exact, ou un préfixe qui n'en désigne qu'un seul"""
+        key = fold_key(name)
+        node = self.root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        if node.book is not None:
+            return node.book
+        if len(key) >= MIN_PREFIX_LENGTH and len(node.books) == 1:
+            return next(iter(node.books))
+        return None
+
+
+def _load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _build_books():
+    """Charge le canon et construit la table des livres et le trie d'alias"""
+    canon = _load_json(CANON_PATH)
+    books = {}
+    trie = BookAliasTrie()
+
+    for book in canon['books']:
+        num = int(book['num'])
+        books[num] = BookInfo(num, book['name'], book['abbr'])
+        trie.add(book['name'], num)
+        trie.add(book['abbr'], num)
+
+    if BOOKS_PATH.exists():
+        for num, book in enumerate(_load_json(BOOKS_PATH), 1):
+            trie.add(book['book'], num)
+            trie.add(book['abbr'], num)
+
+    for alias, num in FRENCH_ALIASES.items():
+        trie.add(alias, num)
+
+    for num, aliases in enumerate(ENGLISH_ALIASES, 1):
+        for alias in aliases:
+            trie.add(alias, num)
+
+    return books, trie
+
+
+BOOKS, BOOK_TRIE = _build_books()
+
+
+@lru_cache(maxsize=4096)
+def resolve_book(name):
+    """Renvoie le BookInfo d'un nom ou d'une abréviation de livre (None si inconnu)"""
+    num = BOOK_TRIE.lookup(name)
+    return BOOKS.get(num) if num is not None else None
+
+
+@lru_cache(maxsize=1 << 16)
+def _parse(text):
+    """Analyse une référence nettoyée : (livre, chapitre, verset, verset de fin) ou None"""
+    match = REFERENCE_RE.match(text)
+    if not match:
+        return None
+    book_part = match.group('book').strip()
+    info = resolve_book(book_part)
+    verse = int(match.group('verse'))
+    end = int(match.group('end')) if match.group('end') else verse
+    return (info.name if info else book_part, int(match.group('chapter')), verse, end)
+
+
+def _clean(value):
+    """Convertit une cellule (str, None, NaN) en texte nettoyé"""
+    if value is None or value != value:  # None ou NaN
+        return ""
+    return str(value).strip()
+
+
+def parse_reference(value):
+    """Parse une référence comme 'Gen 32:15' ou 'Ésaïe 53:5' -> (livre, chapitre, verset)
+
+    Le livre est renvoyé sous son nom canonique français quand il est
+    reconnu. Une référence illisible renvoie (texte, 0, 0) et une cellule
+    vide ("", 0, 0), comme les anciens parse_reference() des outils.
+    """
+    text = _clean(value)
+    if not text:
+        return "", 0, 0
+    parsed = _parse(text)
+    if parsed is None:
+        return text, 0, 0
+    return parsed[:3]
+
+
+def normalize_reference(value):
+    """Normalise une référence vers {'book', 'chapter', 'verse'} (verset de début), ou None"""
+    text = _clean(value)
+    parsed = _parse(text) if text else None
+    if parsed is None:
+        return None
+    return {'book': parsed[0], 'chapter': parsed[1], 'verse': parsed[2]}
+
+
+def reference_cache_info():
+    """Statistiques du cache LRU des références (hits / misses)"""
+    return _parse.cache_info()
+
+
+def encode_verse_id(book_num, chapter, verse):
+    """Encode (livre, chapitre, verset) en ID entier BBCCCVVV"""
+    if not (1 <= book_num <= 99 and 1 <= chapter < 1000 and 1 <= verse < 1000):
+        raise ValueError(f"Référence hors limites pour un ID de verset: {book_num} {chapter}:{verse}")
+    return book_num * BOOK_FACTOR + chapter * CHAPTER_FACTOR + verse
+
+
+def decode_verse_id(verse_id):
+    """Décode un ID BBCCCVVV en (livre, chapitre, verset)"""
+    book_num, rest = divmod(int(verse_id), BOOK_FACTOR)
+    chapter, verse = divmod(rest, CHAPTER_FACTOR)
+    return book_num, chapter, verse
+
+
+def verse_id(book, chapter, verse):
+    """ID de verset pour un nom de livre (None si le livre est inconnu ou la référence invalide)"""
+    info = resolve_book(book)
+    if info is None:
+        return None
+    try:
+        return encode_verse_id(info.num, int(chapter), int(verse))
+    except (TypeError, ValueError):
+        return None
+
+
+def reference_to_verse_id(value):
+    """ID de verset d'une référence textuelle comme 'Jean 3:16' ou 'Matthieu.5.3'"""
+    book, chapter, verse = parse_reference(value)
+    return verse_id(book, chapter, verse) if chapter else None
+
+
+def verse_id_to_reference(verse_id):
+    """Référence lisible ('Jean 3:16') d'un ID de verset"""
+    book_num, chapter, verse = decode_verse_id(verse_id)
+    return f"{BOOKS[book_num].name} {chapter}:{verse}"
+
+
+def with_verse_ids(rows, book_index):
+    """Remplace le triplet (livre, chapitre, verset) commençant à book_index par l'ID de verset
+
+    Les lignes dont le livre n'est pas reconnu sont ignorées.
+    """
+    for row in rows:
+        vid = verse_id(*row[book_index:book_index + 3])
+        if vid is None:
+            continue
+        yield list(row[:book_index]) + [vid] + list(row[book_index + 3:])
@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Validation complète d'une Bible JSON (Testaments/Books/Chapters/Verses) en
+un seul passage streaming.
+
+Le document n'est jamais chargé en entier : le fichier est lu par morceaux
+et transformé en évènements (start_map, map_key, string, ...), via ijson
+s'il est installé, sinon via un tokeniseur interne. Seul le verset courant
+est matérialisé.
+
+Contrôles :
+- structure de chaque testament, livre, chapitre et verset ;
+- nombre de livres, de chapitres et de versets comparé à
+  assets/bible/lsg_canon.json ;
+- IDs de chapitres et de versets en double ;
+- versets vides ou sans texte ;
+- problèmes d'encodage (UTF-8 invalide, caractères de contrôle, BOM,
+  mojibake « Ã© », séquences « \\n » littérales) que fix_semeur_python
+  essayait de corriger.
+
+Le rapport est un JSON lisible par la CI (erreurs, avertissements, comptes
+par code, premières occurrences avec leur chemin et leur référence). Le code
+de sortie est 1 s'il y a des erreurs (ou des avertissements avec --strict).
+
+Usage:
+    python tools/bible_validator.py assets/bibles/*.json [--report rapport.json] [--strict]
+"""
+
+import json
+import re
+import time
+from json.decoder import scanstring
+
+from bible_refs import CANON_PATH
+
+try:
+    import ijson
+except ImportError:  # repli sur le tokeniseur interne
+    ijson = None
+
+CHUNK_SIZE = 1 << 16
+MAX_ISSUES_PER_CODE = 50
+
+ERROR, WARNING = 'error', 'warning'
+
+TOKEN_RE = re.compile(r'[ \t\r\n]*(?:([{}\[\],:])|(")|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)'
+                      r'|(true|false|null))')
+# Suite possible d'un nombre : un nombre en fin de tampon peut continuer dans le morceau suivant
+NUMBER_TAIL_RE = re.compile(r'[0-9.eE+\-]*')
+# Fin d'une chaîne (guillemet fermant non échappé) : absente si la chaîne déborde du tampon
+STRING_END_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+CONTROL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+MOJIBAKE_RE = re.compile(r'Ã[\u0080-\u00bf]|â€|Â[\u00a0-\u00bf]')
+LITERAL_ESCAPE_RE = re.compile(r'\\[nrt]')
+
+
+# --- Évènements ---
+
+def _number(text):
+    return float(text) if any(char in text for char in '.eE') else int(text)
+
+
+def _iter_events_stdlib(f, chunk_size=CHUNK_SIZE):
+    """Évènements (type, valeur) façon ijson.parse, à partir d'un fichier texte lu par morceaux
+
+    La grammaire est vérifiée jeton par jeton : ce qui est attendu ensuite
+    (valeur, clé, ':', ',' ou fermeture) dépend du conteneur courant, si
+    bien qu'un séparateur manquant ou en trop est rejeté.
+    """
+    buffer = ''
+    pos = 0
+    eof = False
+    stack = []
+    expect = 'value'
+
+    def refill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def after_value():
+        return 'comma_or_close' if stack else 'end'
+
+    def invalid(token):
+        return ValueError(f"JSON invalide: {token!r} inattendu (attendu: {expect})")
+
+    refill()
+    while True:
+        match = TOKEN_RE.match(buffer, pos)
+        # Jeton incomplet en fin de tampon : lire la suite
+        if (match is None or match.end() == len(buffer)) and not eof:
+            refill()
+            continue
+        if match is None:
+            rest = buffer[pos:].strip(' \t\r\n')
+            if rest:
+                raise ValueError(f"JSON invalide près de: {rest[:40]!r}")
+            if expect != 'end':
+                raise ValueError("JSON invalide: document tronqué")
+            return
+        structural, quote, number, literal = match.groups()
+        if structural:
+            if structural in '{[':
+                if expect not in ('value', 'value_or_close'):
+                    raise invalid(structural)
+                stack.append(structural)
+                expect = 'key_or_close' if structural == '{' else 'value_or_close'
+                yield ('start_map' if structural == '{' else 'start_array'), None
+            elif structural in '}]':
+                opening = '{' if structural == '}' else '['
+                allowed = ('key_or_close' if opening == '{' else 'value_or_close', 'comma_or_close')
+                if not stack or stack[-1] != opening or expect not in allowed:
+                    raise invalid(structural)
+                stack.pop()
+                expect = after_value()
+                yield ('end_map' if structural == '}' else 'end_array'), None
+            elif structural == ',':
+                if expect != 'comma_or_close':
+                    raise invalid(structural)
+                expect = 'key' if stack[-1] == '{' else 'value'
+            else:
+                if expect != 'colon':
+                    raise invalid(structural)
+                expect = 'value'
+            pos = match.end()
+        elif quote:
+            if not eof and STRING_END_RE.match(buffer, match.end()) is None:
+                refill()
+                continue
+            try:
+                value, end = scanstring(buffer, match.end(), False)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"JSON invalide: {e}")
+            pos = end
+            if expect in ('key', 'key_or_close'):
+                expect = 'colon'
+                yield 'map_key', value
+            elif expect in ('value', 'value_or_close'):
+                expect = after_value()
+                yield 'string', value
+            else:
+                raise invalid(value[:40])
+        else:
+            if number and not eof and NUMBER_TAIL_RE.match(buffer, match.end()).end() == len(buffer):
+                refill()
+                continue
+            if expect not in ('value', 'value_or_close'):
+                raise invalid(number or literal)
+            pos = match.end()
+            expect = after_value()
+            if number:
+                yield 'number', _number(number)
+            elif literal == 'null':
+                yield 'null', None
+            else:
+                yield 'boolean', literal == 'true'
+
+
+def iter_file_events(f):
+    """Évènements d'un fichier JSON ouvert en texte (ijson si disponible)"""
+    if ijson is not None:
+        for _, event, value in ijson.parse(f):
+            yield event, value
+    else:
+        yield from _iter_events_stdlib(f)
+
+
+def iter_tree_events(value):
+    """Évènements d'un document déjà chargé (même validation sans relire le fichier)"""
+    if isinstance(value, dict):
+        yield 'start_map', None
+        for key, item in value.items():
+            yield 'map_key', key
+            yield from iter_tree_events(item)
+        yield 'end_map', None
+    elif isinstance(value, list):
+        yield 'start_array', None
+        for item in value:
+            yield from iter_tree_events(item)
+        yield 'end_array', None
+    elif isinstance(value, str):
+        yield 'string', value
+    elif isinstance(value, bool):
+        yield 'boolean', value
+    elif value is None:
+        yield 'null', None
+    else:
+        yield 'number', value
+
+
+def _build(events, event, value):
+    """Matérialise la valeur commençant par (event, value)"""
+    if event == 'start_map':
+        result = {}
+        for event, value in events:
+            if event == 'end_map':
+                return result
+            result[value] = _build(events, *next(events))
+    if event == 'start_array':
+        result = []
+        for event, value in events:
+            if event == 'end_array':
+                return result
+            result.append(_build(events, event, value))
+    return value
+
+
+def _skip(events, event):
+    """Saute la valeur commençant par event sans la matérialiser"""
+    if event not in ('start_map', 'start_array'):
+        return
+    depth = 1
+    for event, _ in events:
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+            if depth == 0:
+                return
+
+
+# --- Canon ---
+
+def load_canon(path=CANON_PATH):
+    """Canon de référence : [(nom du livre, [versets par chapitre])] dans l'ordre"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [(book['name'], [int(chapter['verses']) for chapter in book['chapters']])
+            for book in sorted(data['books'], key=lambda book: int(book['num']))]
+
+
+# --- Validation ---
+
+class BibleValidator:
+    """Valide un flux d'évènements de Bible et produit un rapport"""
+
+    def __init__(self, canon=None, max_issues=MAX_ISSUES_PER_CODE):
+        self.canon = canon
+        self.max_issues = max_issues
+        self.issues = []
+        self.codes = {}
+        self.errors = self.warnings = 0
+        self.stats = {'testaments': 0, 'books': 0, 'chapters': 0, 'verses': 0, 'empty_verses': 0}
+
+    def issue(self, severity, code, path, message, ref=None):
+        if severity == ERROR:
+            self.errors += 1
+        else:
+            self.warnings += 1
+        self.codes[code] = self.codes.get(code, 0) + 1
+        if self.codes[code] <= self.max_issues:
+            self.issues.append({'severity': severity, 'code': code, 'path': path, 'ref': ref, 'message': message})
+
+    def _book_name(self, number):
+        if self.canon and number <= len(self.canon):
+            return self.canon[number - 1][0]
+        return f"Livre {number}"
+
+    def _list(self, events, event, path, item):
+        """Parcourt une liste en appelant item(events, event, value, index) pour chaque élément"""
+        if event != 'start_array':
+            self.issue(ERROR, 'structure', path, "liste attendue")
+            _skip(events, event)
+            return 0
+        count = 0
+        for event, value in events:
+            if event == 'end_array':
+                break
+            item(events, event, value, count)
+            count += 1
+        return count
+
+    def _map(self, events, event, path, fields):
+        """Parcourt un objet : fields {clé minuscule: fonction(events, event, value)} ; renvoie les clés vues"""
+        if event != 'start_map':
+            self.issue(ERROR, 'structure', path, "objet attendu")
+            _skip(events, event)
+            return None
+        seen = set()
+        for event, key in events:
+            if event == 'end_map':
+                break
+            handler = fields.get(key.lower())
+            event, value = next(events)
+            if handler is None:
+                _skip(events, event)
+            else:
+                seen.add(key.lower())
+                handler(events, event, value)
+        return seen
+
+    def validate(self, events):
+        """Valide tout le document ; renvoie le rapport"""
+        try:
+            event, _ = next(events)
+        except StopIteration:
+            self.issue(ERROR, 'structure', '$', "document vide")
+            return self.report()
+        seen = self._map(events, event, '$', {'testaments': self._testaments})
+        if seen is not None and 'testaments' not in seen:
+            self.issue(ERROR, 'structure', '$', '"Testaments" absent')
+        for _ in events:
+            self.issue(ERROR, 'invalid_json', '$', "contenu après la fin du document")
+            break
+        if self.canon and self.stats['books'] != len(self.canon):
+            self.issue(WARNING, 'canon_books', 'Testaments',
+                       f"{self.stats['books']} livres (canon: {len(self.canon)})")
+        return self.report()
+
+    def _testaments(self, events, event, value):
+        def testament(events, event, value, index):
+            self.stats['testaments'] += 1
+            path = f'Testaments[{index}]'
+            seen = self._map(events, event, path, {'books': lambda e, ev, v: self._books(e, ev, path)})
+            if seen is not None and 'books' not in seen:
+                self.issue(ERROR, 'structure', path, '"Books" absent')
+
+        if self._list(events, event, 'Testaments', testament) == 0:
+            self.issue(ERROR, 'structure', 'Testaments', "Testaments[] vide")
+
+    def _books(self, events, event, testament_path):
+        def book(events, event, value, index):
+            self.stats['books'] += 1
+            number = self.stats['books']
+            path = f'{testament_path}.Books[{index}]'
+            chapters = []
+            seen = self._map(events, event, path,
+                             {'chapters': lambda e, ev, v: chapters.append(self._chapters(e, ev, path, number))})
+            if seen is not None and 'chapters' not in seen:
+                self.issue(ERROR, 'structure', path, '"Chapters" absent', self._book_name(number))
+            if chapters and self.canon and number <= len(self.canon):
+                expected = len(self.canon[number - 1][1])
+                if chapters[0] != expected:
+                    self.issue(WARNING, 'canon_chapters', path,
+                               f"{chapters[0]} chapitres (canon: {expected})", self._book_name(number))
+
+        self._list(events, event, f'{testament_path}.Books', book)
+
+    def _chapters(self, events, event, book_path, book_number):
+        chapter_ids = set()
+        book_name = self._book_name(book_number)
+
+        def chapter(events, event, value, index):
+            self.stats['chapters'] += 1
+            number = index + 1
+            path = f'{book_path}.Chapters[{index}]'
+            ref = f'{book_name} {number}'
+            verse_counts = []
+            chapter_id = []
+            seen = self._map(events, event, path, {
+                'verses': lambda e, ev, v: verse_counts.append(self._verses(e, ev, path, ref)),
+                'id': lambda e, ev, v: chapter_id.append(_build(e, ev, v)),
+            })
+            if seen is None:
+                return
+            if 'verses' not in seen:
+                self.issue(ERROR, 'structure', path, '"Verses" absent', ref)
+            if chapter_id:
+                if chapter_id[0] in chapter_ids:
+                    self.issue(ERROR, 'duplicate_id', path, f"ID de chapitre en double: {chapter_id[0]}", ref)
+                chapter_ids.add(chapter_id[0])
+            if verse_counts and self.canon and book_number <= len(self.canon):
+                canon_chapters = self.canon[book_number - 1][1]
+                if number <= len(canon_chapters) and verse_counts[0] != canon_chapters[number - 1]:
+                    self.issue(WARNING, 'canon_verses', path,
+                               f"{verse_counts[0]} versets (canon: {canon_chapters[number - 1]})", ref)
+
+        return self._list(events, event, f'{book_path}.Chapters', chapter)
+
+    def _verses(self, events, event, chapter_path, chapter_ref):
+        verse_ids = set()
+        previous = [0]
+
+        def verse(events, event, value, index):
+            self.stats['verses'] += 1
+            path = f'{chapter_path}.Verses[{index}]'
+            value = _build(events, event, value)
+            if isinstance(value, str):  # verset sous forme de chaîne simple
+                value = {'Text': value}
+            if not isinstance(value, dict):
+                self.issue(ERROR, 'structure', path, "objet verset attendu", f'{chapter_ref}:{index + 1}')
+                return
+            fields = {key.lower(): item for key, item in value.items()}
+            verse_id = fields.get('id')
+            number = verse_id if isinstance(verse_id, int) and not isinstance(verse_id, bool) else index + 1
+            ref = f'{chapter_ref}:{number}'
+            if verse_id is not None:
+                if number in verse_ids:
+                    self.issue(ERROR, 'duplicate_id', path, f"ID de verset en double: {verse_id}", ref)
+                elif number != previous[0] + 1:
+                    self.issue(WARNING, 'verse_order', path, f"ID {verse_id} après l'ID {previous[0]}", ref)
+                verse_ids.add(number)
+            previous[0] = number
+            text = fields.get('text')
+            if not isinstance(text, str):
+                self.issue(ERROR, 'missing_text', path, '"Text" absent ou non textuel', ref)
+            elif not text.strip():
+                self.stats['empty_verses'] += 1
+                self.issue(WARNING, 'empty_verse', path, "verset vide", ref)
+            else:
+                self._check_encoding(text, path, ref)
+
+        return self._list(events, event, f'{chapter_path}.Verses', verse)
+
+    def _check_encoding(self, text, path, ref):
+        if '\ufffd' in text:
+            self.issue(ERROR, 'invalid_utf8', path, "caractère de remplacement (UTF-8 invalide)", ref)
+        match = CONTROL_RE.search(text)
+        if match:
+            self.issue(ERROR, 'control_char', path, f"caractère de contrôle U+{ord(match.group()):04X}", ref)
+        if '\ufeff' in text:
+            self.issue(WARNING, 'bom', path, "BOM dans le texte", ref)
+        match = MOJIBAKE_RE.search(text)
+        if match:
+            self.issue(WARNING, 'mojibake', path, f"double encodage probable: {match.group()!r}", ref)
+        if LITERAL_ESCAPE_RE.search(text):
+            self.issue(WARNING, 'literal_escape', path, "séquence \\n littérale", ref)
+
+    def report(self):
+        return {
+            'valid': self.errors == 0,
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'stats': self.stats,
+            'codes': self.codes,
+            'issues': self.issues,
+        }
+
+
+def validate_events(events, canon=None, max_issues=MAX_ISSUES_PER_CODE):
+    """Valide un flux d'évènements (voir iter_file_events, iter_tree_events) ; renvoie le rapport"""
+    return BibleValidator(canon, max_issues).validate(iter(events))
+
+
+def validate_file(path, canon=None, max_issues=MAX_ISSUES_PER_CODE):
+    """Valide un fichier en streaming ; renvoie le rapport (JSON invalide compris)"""
+    start = time.perf_counter()
+    validator = BibleValidator(canon, max_issues)
+    try:
+        # errors='replace' : l'UTF-8 invalide devient U+FFFD et est signalé au lieu d'interrompre
+        with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            report = validator.validate(iter_file_events(f))
+    except Exception as e:  # JSON invalide (ValueError, ijson.JSONError...)
+        validator.issue(ERROR, 'invalid_json', '$', str(e))
+        report = validator.report()
+    report['file'] = str(path)
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def main():
+    import argparse
+    import glob
+    import os
+    import sys
+
+    parser = argparse.ArgumentParser(description='Valider des Bibles JSON en streaming (rapport pour la CI)')
+    parser.add_argument('paths', nargs='+', help='Fichiers, dossiers ou motifs glob')
+    parser.add_argument('--canon', default=str(CANON_PATH), help='Canon de référence (défaut: lsg_canon.json)')
+    parser.add_argument('--no-canon', action='store_true', help='Ne pas comparer au canon')
+    parser.add_argument('--report', help='Fichier du rapport JSON (défaut: sortie standard)')
+    parser.add_argument('--strict', action='store_true', help='Échouer aussi sur les avertissements')
+    parser.add_argument('--max-issues', type=int, default=MAX_ISSUES_PER_CODE,
+                        help='Occurrences détaillées par code et par fichier (défaut: %(default)s)')
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*.json'))))
+        else:
+            files.extend(sorted(glob.glob(path)) if glob.has_magic(path) else [path])
+    canon = None if args.no_canon else load_canon(args.canon)
+
+    reports = [validate_file(path, canon, args.max_issues) for path in files]
+    failed = [report for report in reports
+              if report['errors'] or (args.strict and report['warnings'])]
+    result = {'valid': not failed, 'strict': args.strict, 'files': reports}
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(output)
+        for report in reports:
+            status = '✅' if report not in failed else '❌'
+            print(f"{status} {report['file']}: {report['stats']['verses']} versets, "
+                  f"{report['errors']} erreurs, {report['warnings']} avertissements ({report['seconds']}s)")
+        print(f"📄 Rapport: {args.report}")
+    else:
+        print(output)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
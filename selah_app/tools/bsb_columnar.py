@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Transformations en colonnes (pandas) pour les convertisseurs BSB.
+
+Remplace les boucles iterrows() : le nettoyage des cellules, le filtrage et
+le découpage des références 'Livre 3:16' sont faits sur des colonnes entières
+(masques booléens, une seule analyse par référence distincte). Les fonctions
+renvoient des DataFrames aux colonnes normalisées, converties en lignes JSONL
+([lemma, surface, book, chapter, verse, pos, key] ou [topic_id, book,
+chapter, verse, weight]) par frame_rows(). key est la clé de recherche sans
+accents du lemme (french_lemmas.search_key).
+"""
+
+import pandas as pd
+
+from bible_refs import parse_reference
+from french_lemmas import search_key
+
+CONCORDANCE_FIELDS = ['lemma', 'surface', 'book', 'chapter', 'verse', 'pos', 'key']
+TOPICAL_FIELDS = ['topic_id', 'book', 'chapter', 'verse', 'weight']
+
+
+def clean_text_column(series):
+    """str().strip() vectorisé ; les cellules vides ou NaN deviennent ''"""
+    text = series.astype(str).str.strip()
+    return text.where(series.notna() & text.ne('nan'), '')
+
+
+def int_column(series, default=0):
+    """Conversion numérique vectorisée en int (valeur par défaut si invalide)"""
+    return pd.to_numeric(series, errors='coerce').fillna(default).astype('int64')
+
+
+def float_column(series, default=1.0):
+    """Conversion numérique vectorisée en float (valeur par défaut si invalide)"""
+    return pd.to_numeric(series, errors='coerce').fillna(default).astype('float64')
+
+
+def first_present_column(df, names, default=None):
+    """Équivalent colonne de row.get('a', row.get('b', ...)) : première colonne existante"""
+    for name in names:
+        if name in df.columns:
+            return df[name]
+    return pd.Series(default, index=df.index)
+
+
+def search_key_column(series):
+    """Clé de recherche sans accents, calculée une fois par valeur distincte"""
+    uniques = pd.unique(series)
+    keys = pd.Series([search_key(value) for value in uniques], index=uniques)
+    return pd.Series(keys.reindex(series.to_numpy()).to_numpy(), index=series.index)
+
+
+def split_references(series):
+    """Découpe une colonne de références en colonnes book / chapter / verse
+
+    Chaque référence distincte n'est analysée qu'une fois par parse_reference().
+    Les références non reconnues ont un livre vide et chapitre/verset à 0.
+    """
+    text = clean_text_column(series)
+    uniques = pd.unique(text)
+    parsed = pd.DataFrame([parse_reference(ref) for ref in uniques], index=uniques,
+                          columns=['book', 'chapter', 'verse'])
+    parsed['book'] = parsed['book'].where(parsed['chapter'].gt(0), '')
+    refs = parsed.reindex(text.to_numpy())
+    refs.index = series.index
+    return refs
+
+
+def concordance_from_columns(lemma, surface, book, chapter, verse, pos):
+    """Concordance à partir de colonnes déjà séparées (lemma, surface, livre, chapitre, verset, pos)"""
+    lemma = clean_text_column(lemma)
+    surface = clean_text_column(surface)
+    refs = pd.DataFrame({
+        'book': clean_text_column(book),
+        'chapter': int_column(chapter),
+        'verse': int_column(verse),
+    })
+    valid = lemma.ne('') & refs['book'].ne('') & refs['chapter'].gt(0) & refs['verse'].gt(0)
+    return _concordance_frame(lemma, surface, refs, clean_text_column(pos), valid)
+
+
+def topical_from_columns(topic_id, book, chapter, verse, weight):
+    """Index thématique à partir de colonnes déjà séparées"""
+    frame = pd.DataFrame({
+        'topic_id': int_column(topic_id),
+        'book': clean_text_column(book),
+        'chapter': int_column(chapter),
+        'verse': int_column(verse),
+        'weight': float_column(weight),
+    })
+    valid = frame['book'].ne('') & frame['chapter'].gt(0) & frame['verse'].gt(0)
+    return frame.loc[valid, TOPICAL_FIELDS]
+
+
+def _concordance_frame(lemma, surface, refs, pos, valid):
+    """Assemble la DataFrame de concordance sur les lignes valides"""
+    frame = pd.DataFrame({
+        'lemma': lemma,
+        'surface': surface,
+        'book': refs['book'],
+        'chapter': refs['chapter'],
+        'verse': refs['verse'],
+        'pos': pos,
+        'key': search_key_column(lemma),
+    }, index=refs.index)
+    return frame.loc[valid, CONCORDANCE_FIELDS]
+
+
+def frame_rows(frame, columns=None):
+    """Itère sur les lignes d'une DataFrame sous forme de listes de scalaires Python"""
+    columns = columns or list(frame.columns)
+    for row in zip(*(frame[col].tolist() for col in columns)):
+        yield list(row)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Lecture en streaming des classeurs Excel BSB (concordance et index thématique).
+
+Le classeur est parcouru ligne par ligne avec un curseur openpyxl en lecture
+seule : aucune DataFrame n'est construite, la mémoire reste constante quelle
+que soit la taille de la feuille. Les lignes sont typées (namedtuple) puis
+transformées en entrées JSONL par des générateurs.
+"""
+
+from collections import namedtuple
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    load_workbook = None
+
+CONCORDANCE_COLUMNS = ['Sort', 'Book', 'Chap', 'Word', 'Occ', 'Total', 'Entry', 'Verse', 'Context']
+TOPICAL_COLUMNS = ['Sort', 'Source', 'Topic', 'Num', 'Verse', 'Context']
+
+ConcordanceRow = namedtuple('ConcordanceRow', [c.lower() for c in CONCORDANCE_COLUMNS])
+TopicalRow = namedtuple('TopicalRow', [c.lower() for c in TOPICAL_COLUMNS])
+
+# Colonnes numériques converties en int à la lecture
+_INT_FIELDS = {'sort', 'chap', 'occ', 'total', 'num'}
+
+
+def _clean_cell(value):
+    """Normalise une cellule : chaînes vides -> None, espaces retirés"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _to_int(value):
+    """Convertit une cellule numérique en int (None si impossible)"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_sheet_rows(excel_path, skiprows=0, sheet_name=None):
+    """Itère sur les valeurs brutes d'une feuille sans charger le classeur en mémoire"""
+    if load_workbook is None:
+        raise ImportError("openpyxl est requis pour la lecture en streaming (pip install openpyxl)")
+
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        for index, values in enumerate(sheet.iter_rows(values_only=True)):
+            if index < skiprows:
+                continue
+            yield values
+    finally:
+        workbook.close()
+
+
+def iter_typed_rows(excel_path, row_type, skiprows=0, sheet_name=None):
+    """Itère sur les lignes d'une feuille converties en namedtuple typé"""
+    width = len(row_type._fields)
+    for values in iter_sheet_rows(excel_path, skiprows=skiprows, sheet_name=sheet_name):
+        values = tuple(values[:width]) + (None,) * (width - len(values))
+        cells = []
+        for field, value in zip(row_type._fields, values):
+            value = _clean_cell(value)
+            if field in _INT_FIELDS:
+                value = _to_int(value)
+            cells.append(value)
+        yield row_type(*cells)
+
+
+def iter_concordance_rows(excel_path, skiprows=2):
+    """Lignes typées de bsb_concordance.xlsx (en-tête et ligne de titre ignorés)"""
+    return iter_typed_rows(excel_path, ConcordanceRow, skiprows=skiprows)
+
+
+def iter_topical_rows(excel_path, skiprows=3):
+    """Lignes typées de bsb_topical_index.xlsx (lignes d'en-tête ignorées)"""
+    return iter_typed_rows(excel_path, TopicalRow, skiprows=skiprows)
+
+
+def iter_concordance_entries(rows, extract_word, parse_reference):
+    """Transforme les lignes de concordance en entrées [lemma, surface, book, chapter, verse, pos]
+
+    Les lignes de résumé (Occ = 0) définissent le mot courant, les lignes
+    suivantes portent ses occurrences.
+    """
+    current_word = ""
+    for row in rows:
+        if row.occ == 0 and row.entry is not None:
+            current_word = extract_word(row.entry)
+            continue
+
+        if row.book is None or row.verse is None or not row.occ or row.occ < 0 or not current_word:
+            continue
+
+        book, chapter, verse = parse_reference(row.verse)
+        if not book or chapter == 0 or verse == 0:
+            continue
+
+        yield [current_word, current_word, book, chapter, verse, "n"]
+
+
+def iter_entry_word_entries(rows, extract_word, parse_reference):
+    """Variante où chaque ligne porte son propre mot dans la colonne Entry"""
+    for row in rows:
+        if row.book is None or row.verse is None or row.occ == 0:
+            continue
+
+        word = extract_word(row.entry)
+        if not word:
+            continue
+
+        book, chapter, verse = parse_reference(row.verse)
+        if not book or chapter == 0 or verse == 0:
+            continue
+
+        yield [word, word, book, chapter, verse, "n"]
+
+
+def iter_topical_entries(rows, parse_reference):
+    """Transforme les lignes d'index thématique en entrées [topic_id, book, chapter, verse, weight]"""
+    for row in rows:
+        if row.verse is None or row.num is None:
+            continue
+
+        book, chapter, verse = parse_reference(row.verse)
+        if not book or chapter == 0 or verse == 0:
+            continue
+
+        yield [row.num, book, chapter, verse, 1.0]
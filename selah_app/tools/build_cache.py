@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Manifeste de build et cache incrémental du pipeline de données.
+
+Le manifeste (build_manifest.json dans le dossier de sortie) enregistre pour
+chaque cible : l'empreinte SHA-256 de ses entrées, la version de l'outil
+(empreinte du code source des modules qui la produisent), les paramètres et
+l'empreinte de chaque sortie écrite. Une cible dont tout correspond et dont
+les sorties sont intactes est sautée : une sortie réécrite entre-temps par
+une autre cible (ou à la main) relance la construction.
+
+Les empreintes sont mises en cache par (taille, mtime) : un fichier source
+inchangé n'est pas relu à chaque exécution.
+
+Les résultats intermédiaires par bible (« shards ») sont conservés dans
+.cache/ : quand une seule version change, seule celle-ci est retraitée.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_FILE = 'build_manifest.json'
+CACHE_DIR = '.cache'
+MANIFEST_VERSION = 2
+TOOLS_DIR = Path(__file__).resolve().parent
+
+
+def sha256_file(path, chunk_size=1 << 20):
+    """Empreinte SHA-256 d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tool_version(*modules):
+    """Version d'un outil : empreinte du code source des modules (dans tools/) qui le composent"""
+    digest = hashlib.sha256()
+    for module in sorted(modules):
+        digest.update(module.encode('utf-8'))
+        digest.update((TOOLS_DIR / f'{module}.py').read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class BuildManifest:
+    """Manifeste des cibles construites : entrées, version d'outil et paramètres"""
+
+    def __init__(self, out_dir, force=False):
+        self.out_dir = out_dir
+        self.path = os.path.join(out_dir, MANIFEST_FILE)
+        self.force = force
+        self.targets = {}
+        self.files = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('v') == MANIFEST_VERSION:
+                self.targets = data.get('targets', {})
+                self.files = data.get('files', {})
+
+    def file_hash(self, path):
+        """Empreinte d'un fichier, recalculée seulement si sa taille ou sa date ont changé"""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        cached = self.files.get(key)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+        digest = sha256_file(path)
+        self.files[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def _signature(self, inputs, tool, params):
+        return {
+            'inputs': {os.path.abspath(path): self.file_hash(path) for path in inputs},
+            'tool': tool,
+            'params': params or {},
+        }
+
+    def _output_hashes(self, outputs):
+        return {os.path.abspath(path): self.file_hash(path) for path in outputs}
+
+    def is_up_to_date(self, name, inputs, outputs, tool, params=None):
+        """Vrai si la cible a déjà été construite avec les mêmes entrées, outil et paramètres
+        et que ses sorties sont celles qu'elle a écrites"""
+        if self.force or name not in self.targets:
+            return False
+        if not all(os.path.exists(path) for path in list(inputs) + list(outputs)):
+            return False
+        recorded = self.targets[name]
+        return (recorded.get('outputs') == self._output_hashes(outputs)
+                and {key: recorded.get(key) for key in ('inputs', 'tool', 'params')}
+                == self._signature(inputs, tool, params))
+
+    def record(self, name, inputs, outputs, tool, params=None):
+        """Enregistre une cible construite (à appeler après l'écriture des sorties)"""
+        self.targets[name] = dict(self._signature(inputs, tool, params), outputs=self._output_hashes(outputs))
+
+    def save(self):
+        """Écrit le manifeste de façon atomique"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'v': MANIFEST_VERSION, 'targets': self.targets, 'files': self.files},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def shard_path(self, name):
+        """Chemin du résultat intermédiaire mis en cache pour un shard"""
+        safe_name = ''.join(char if char.isalnum() or char in '-_' else '_' for char in name)
+        return os.path.join(self.out_dir, CACHE_DIR, f'{safe_name}.json.gz')
+
+
+def save_shard(path, data):
+    """Sauvegarde un résultat intermédiaire (JSON compressé)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+def load_shard(path):
+    """Recharge un résultat intermédiaire sauvegardé par save_shard"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
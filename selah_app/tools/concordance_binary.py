@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Format binaire de concordance : dictionnaire de lemmes trié + listes de
+versets delta-encodées en varint.
+
+Le même format sert à l'index thématique (thème -> versets) avec des clés
+entières (flag FLAG_INT_KEYS) ; les index inversés par verset sont dans
+verse_index.
+
+Disposition du fichier (little-endian), lisible directement côté Flutter
+(ByteData) :
+
+    En-tête (HEADER, 28 octets)
+        magic        4s   b'SCNC'
+        version      u16
+        flags        u16  bit 0 : clés entières u32 (sinon lemmes UTF-8)
+        lemma_count  u32
+        table_offset u32  début de la table des entrées
+        keys_offset  u32  début du blob des clés
+        postings_offset u32  début des listes de valeurs
+        total_size   u32
+    Table des entrées (RECORD, 18 octets par clé, triée par clé)
+        key_offset u32, key_len u16, postings_offset u32, postings_len u32, count u32
+    Blob des clés : lemmes UTF-8 (ou u32) concaténés dans l'ordre de la table
+    Listes de valeurs : entiers triés, uniques (IDs BBCCCVVV ou IDs de thèmes),
+    écrits en deltas varint (LEB128)
+
+Une recherche lit l'en-tête, fait une recherche dichotomique sur la table
+(en ne décodant que les lemmes comparés) puis décode la seule liste du lemme.
+"""
+
+import os
+import struct
+
+from bible_refs import verse_id
+
+MAGIC = b'SCNC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIII')
+RECORD = struct.Struct('<IHIII')
+INT_KEY = struct.Struct('<I')
+
+FLAG_INT_KEYS = 1
+
+
+def encode_varint(value, out):
+    """Ajoute un entier non signé encodé en LEB128 au bytearray out"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(buffer, start, end):
+    """Décode les entiers LEB128 de buffer[start:end] (sans copie si buffer est un memoryview)"""
+    values = []
+    value = shift = 0
+    for byte in buffer[start:end]:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def encode_postings(verse_ids):
+    """Encode une liste triée d'IDs de versets en deltas varint"""
+    out = bytearray()
+    previous = 0
+    for vid in verse_ids:
+        encode_varint(vid - previous, out)
+        previous = vid
+    return bytes(out)
+
+
+def decode_postings(buffer, start, end):
+    """Décode une liste de versets delta-encodée"""
+    verse_ids = []
+    total = 0
+    for delta in decode_varints(buffer, start, end):
+        total += delta
+        verse_ids.append(total)
+    return verse_ids
+
+
+class ConcordanceBinaryWriter:
+    """Accumule (clé, valeur) puis écrit le fichier binaire"""
+
+    def __init__(self, int_keys=False):
+        self.int_keys = int_keys
+        self.postings = {}
+
+    def add(self, key, value):
+        self.postings.setdefault(key, set()).add(value)
+
+    def add_entry(self, entry):
+        """Ajoute une entrée [lemma, surface, book, chapter, verse, pos(, key)] ou [lemma, surface, verse_id, pos(, key)]"""
+        if len(entry) >= 6:
+            vid = verse_id(entry[2], entry[3], entry[4])
+        else:
+            vid = entry[2]
+        if vid is not None:
+            self.add(entry[0], vid)
+        return vid is not None
+
+    def add_entries(self, entries):
+        """Ajoute des entrées et renvoie le nombre d'entrées ignorées (livre inconnu)"""
+        skipped = 0
+        for entry in entries:
+            if not self.add_entry(entry):
+                skipped += 1
+        return skipped
+
+    def _encode_key(self, key):
+        return INT_KEY.pack(key) if self.int_keys else key.encode('utf-8')
+
+    def to_bytes(self):
+        if self.int_keys:
+            keys = sorted(self.postings)
+        else:
+            keys = sorted(self.postings, key=lambda lemma: lemma.encode('utf-8'))
+        table = bytearray()
+        keys_blob = bytearray()
+        postings_blob = bytearray()
+
+        for key in keys:
+            encoded_key = self._encode_key(key)
+            encoded = encode_postings(sorted(self.postings[key]))
+            table += RECORD.pack(len(keys_blob), len(encoded_key), len(postings_blob), len(encoded),
+                                 len(self.postings[key]))
+            keys_blob += encoded_key
+            postings_blob += encoded
+
+        table_offset = HEADER.size
+        keys_offset = table_offset + len(table)
+        postings_offset = keys_offset + len(keys_blob)
+        total_size = postings_offset + len(postings_blob)
+        flags = FLAG_INT_KEYS if self.int_keys else 0
+        header = HEADER.pack(MAGIC, VERSION, flags, len(keys), table_offset, keys_offset,
+                             postings_offset, total_size)
+        return header + bytes(table) + bytes(keys_blob) + bytes(postings_blob)
+
+    def write(self, path):
+        """Écrit le fichier binaire et renvoie sa taille en octets"""
+        data = self.to_bytes()
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+
+def write_concordance_binary(entries, path):
+    """Écrit une concordance binaire à partir d'entrées JSONL ; renvoie (lemmes, octets)"""
+    writer = ConcordanceBinaryWriter()
+    skipped = writer.add_entries(entries)
+    size = writer.write(path)
+    if skipped:
+        print(f"⚠️ {skipped} entrées ignorées (livre non reconnu)")
+    return len(writer.postings), size
+
+
+class ConcordanceIndex:
+    """Lecteur du format binaire : recherche d'une clé sans décoder le reste
+
+    buffer peut être des bytes ou un mmap : toutes les lectures passent par
+    un memoryview, seules la clé comparée et la liste demandée sont décodées.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        (magic, version, self.flags, self.lemma_count, self.table_offset, self.keys_offset,
+         self.postings_offset, self.total_size) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Fichier de concordance binaire invalide (magic {magic!r})")
+        if version != VERSION:
+            raise ValueError(f"Version de concordance binaire non supportée: {version}")
+        self.int_keys = bool(self.flags & FLAG_INT_KEYS)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return self.lemma_count
+
+    def _record(self, index):
+        return RECORD.unpack_from(self.buffer, self.table_offset + index * RECORD.size)
+
+    def _key(self, record):
+        start = self.keys_offset + record[0]
+        if self.int_keys:
+            return INT_KEY.unpack_from(self.buffer, start)[0]
+        return self.buffer[start:start + record[1]].tobytes()
+
+    def key_at(self, index):
+        key = self._key(self._record(index))
+        return key if self.int_keys else key.decode('utf-8')
+
+    lemma_at = key_at
+
+    def find(self, key):
+        """Index de la clé dans la table (recherche dichotomique), ou -1"""
+        target = int(key) if self.int_keys else key.encode('utf-8')
+        low, high = 0, self.lemma_count
+        while low < high:
+            mid = (low + high) // 2
+            current = self._key(self._record(mid))
+            if current < target:
+                low = mid + 1
+            elif current > target:
+                high = mid
+            else:
+                return mid
+        return -1
+
+    def count(self, key):
+        """Nombre de valeurs associées à la clé"""
+        index = self.find(key)
+        return self._record(index)[4] if index >= 0 else 0
+
+    def lookup(self, key):
+        """Liste triée des valeurs de la clé (IDs de versets pour un lemme), vide si absente"""
+        index = self.find(key)
+        if index < 0:
+            return []
+        record = self._record(index)
+        start = self.postings_offset + record[2]
+        return decode_postings(self.buffer, start, start + record[3])
+
+    def keys(self):
+        """Itère sur les clés dans l'ordre du fichier"""
+        for index in range(self.lemma_count):
+            yield self.key_at(index)
+
+    lemmas = keys
+
+    def release(self):
+        """Libère le memoryview (nécessaire avant de fermer un mmap)"""
+        self.buffer.release()
+
+
+def main():
+    import argparse
+    import gzip
+    import json
+
+    parser = argparse.ArgumentParser(description='Convertir concordance.jsonl.gz au format binaire à listes de versets')
+    parser.add_argument('input', help='Fichier concordance.jsonl.gz')
+    parser.add_argument('output', help='Fichier binaire de sortie (ex: concordance.bin)')
+    args = parser.parse_args()
+
+    with gzip.open(args.input, 'rt', encoding='utf-8') as f:
+        lemma_count, size = write_concordance_binary((json.loads(line) for line in f if line.strip()), args.output)
+
+    print(f"✅ {lemma_count} lemmes -> {args.output}")
+    print(f"📉 Taille: {os.path.getsize(args.input) / 1024:.1f} KB → {size / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Construction de concordance à mémoire bornée.
+
+Chaque occurrence d'un mot est stockée comme un entier dans un array('I')
+par lemme (4 octets au lieu d'une liste Python par occurrence). L'entier
+reprend la disposition BBCCCVVV des IDs de versets, avec une numérotation
+de livres locale (ordre de première apparition) pour conserver les noms de
+livres tels qu'ils figurent dans les bibles sources.
+
+Quand le budget mémoire est dépassé, les listes sont triées et écrites sur
+disque (« runs ») ; la lecture finale fusionne les runs (k-way merge) lemme
+par lemme, et le filtre de fréquence s'applique sur chaque lemme fusionné
+sans jamais matérialiser l'ensemble des occurrences.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+from bible_refs import BOOK_FACTOR, CHAPTER_FACTOR
+from french_lemmas import search_key
+from vocabulary_policy import CorpusStats, LemmaStats
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# Coût estimé d'un lemme (clé du dict, chaîne, objet array) et d'une occurrence
+WORD_OVERHEAD = 160
+OCCURRENCE_SIZE = 4
+# Taille de l'échantillon de lignes JSONL servant à estimer le taux de compression
+SAMPLE_SIZE = 64 * 1024
+
+RUN_RECORD = struct.Struct('<HI')
+
+
+def _write_run(path, postings):
+    """Écrit un run trié : pour chaque lemme, (longueur, nombre), lemme UTF-8, IDs u32 triés"""
+    with open(path, 'wb') as f:
+        for word in sorted(postings):
+            encoded = word.encode('utf-8')
+            verse_ids = array('I', sorted(postings[word]))
+            f.write(RUN_RECORD.pack(len(encoded), len(verse_ids)))
+            f.write(encoded)
+            f.write(verse_ids.tobytes())
+
+
+def _read_run(path):
+    """Relit un run séquentiellement : (lemme, array des IDs)"""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(RUN_RECORD.size)
+            if not header:
+                return
+            word_len, count = RUN_RECORD.unpack(header)
+            word = f.read(word_len).decode('utf-8')
+            verse_ids = array('I')
+            verse_ids.frombytes(f.read(count * verse_ids.itemsize))
+            yield word, verse_ids
+
+
+class ConcordanceBuilder:
+    """Accumule les occurrences (lemme, verset) dans des arrays compacts, avec débordement sur disque"""
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, spill_dir=None):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.books = []
+        self._book_ids = {}
+        self.postings = {}
+        self._memory = 0
+        self._temp_dir = None
+        self.runs = []
+
+    # --- Livres et IDs de versets ---
+
+    def book_id(self, name):
+        """Numéro local du livre (attribué à la première apparition)"""
+        if name not in self._book_ids:
+            self._book_ids[name] = len(self.books)
+            self.books.append(name)
+        return self._book_ids[name]
+
+    def verse_key(self, book_name, chapter, verse):
+        return self.book_id(book_name) * BOOK_FACTOR + chapter * CHAPTER_FACTOR + verse
+
+    def decode_key(self, key):
+        """(livre, chapitre, verset) d'un ID local"""
+        book, rest = divmod(key, BOOK_FACTOR)
+        chapter, verse = divmod(rest, CHAPTER_FACTOR)
+        return self.books[book], chapter, verse
+
+    # --- Accumulation ---
+
+    def add(self, word, key):
+        verse_ids = self.postings.get(word)
+        if verse_ids is None:
+            verse_ids = self.postings[word] = array('I')
+            self._memory += WORD_OVERHEAD
+        verse_ids.append(key)
+        self._memory += OCCURRENCE_SIZE
+        if self.memory_budget and self._memory > self.memory_budget:
+            self.spill()
+
+    def add_words(self, book_name, chapter, verse, words):
+        """Ajoute toutes les occurrences d'un verset"""
+        key = self.verse_key(book_name, chapter, verse)
+        for word in words:
+            self.add(word, key)
+
+    def add_partial(self, partial):
+        """Fusionne un résultat partiel {'books': [...], 'postings': {mot: IDs}} (voir to_partial)"""
+        remap = [self.book_id(name) * BOOK_FACTOR for name in partial['books']]
+        for word, keys in partial['postings'].items():
+            for key in keys:
+                book, rest = divmod(key, BOOK_FACTOR)
+                self.add(word, remap[book] + rest)
+
+    def to_partial(self):
+        """Résultat partiel en mémoire (pour les jobs parallèles et le cache de build)
+
+        Sans run sur disque, les listes du builder sont triées et remplacées une
+        à une : le partiel les partage au lieu d'en garder une copie triée.
+        """
+        if self.runs:
+            return {'books': list(self.books), 'postings': dict(self.iter_postings())}
+        postings = self.postings
+        for word, verse_ids in postings.items():
+            postings[word] = array('I', sorted(verse_ids))
+        return {'books': list(self.books), 'postings': dict(sorted(postings.items()))}
+
+    # --- Débordement sur disque ---
+
+    def spill(self):
+        """Écrit les listes en mémoire dans un run trié et libère la mémoire"""
+        if not self.postings:
+            return
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix='concordance_runs_', dir=self.spill_dir)
+        path = os.path.join(self._temp_dir, f'run_{len(self.runs):04d}.bin')
+        _write_run(path, self.postings)
+        self.runs.append(path)
+        self.postings = {}
+        self._memory = 0
+
+    def close(self):
+        """Supprime les runs temporaires"""
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+            self.runs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Lecture ---
+
+    def iter_postings(self):
+        """Itère sur (lemme, array des IDs triés), lemmes dans l'ordre trié
+
+        Sans run sur disque, lit directement la mémoire ; sinon fusionne les
+        runs lemme par lemme (seule la liste du lemme courant est en mémoire).
+        """
+        if not self.runs:
+            for word in sorted(self.postings):
+                yield word, array('I', sorted(self.postings[word]))
+            return
+
+        self.spill()
+        merged = heapq.merge(*(_read_run(path) for path in self.runs), key=itemgetter(0))
+        for word, group in itertools.groupby(merged, key=itemgetter(0)):
+            runs = [verse_ids for _, verse_ids in group]
+            yield word, runs[0] if len(runs) == 1 else array('I', heapq.merge(*runs))
+
+    def word_counts(self):
+        """{forme: nombre d'occurrences} (un passage sur les listes, sans les conserver)"""
+        return {word: len(keys) for word, keys in self.iter_postings()}
+
+    def lemma_stats(self, lemmatizer=None, pos='n'):
+        """CorpusStats des lemmes (occurrences, versets, taille JSONL estimée) pour vocabulary_policy
+
+        Ajuste le lemmatizer sur le vocabulaire s'il est fourni. Le nombre de
+        versets d'un lemme est celui de l'union des versets de ses formes :
+        seuls les lemmes à plusieurs formes gardent leur ensemble en mémoire.
+        """
+        shared = set()
+        if lemmatizer is not None:
+            counts = self.word_counts()
+            lemmatizer.fit(counts)
+            forms = Counter(lemmatizer.lemma(word) for word in counts)
+            shared = {lemma for lemma, count in forms.items() if count > 1}
+        stats = {}
+        lemma_verses = {}
+        verses = set()
+        sample = []
+        sample_size = 0
+        for word, keys in self.iter_postings():
+            lemma = lemmatizer.lemma(word) if lemmatizer is not None else word
+            distinct = set(keys)
+            verses.update(distinct)
+            line = json.dumps([lemma, word, *self.decode_key(keys[0]), pos, search_key(lemma)], ensure_ascii=False)
+            size = len(keys) * (len(line.encode('utf-8')) + 1)
+            if sample_size < SAMPLE_SIZE:
+                for verse_key in keys:
+                    sample.append(json.dumps([lemma, word, *self.decode_key(verse_key), pos, search_key(lemma)],
+                                             ensure_ascii=False) + '\n')
+                sample_size += size
+            if lemma in shared:
+                lemma_verses.setdefault(lemma, set()).update(distinct)
+            previous = stats.get(lemma, LemmaStats(0, 0, 0))
+            stats[lemma] = LemmaStats(previous.count + len(keys), len(distinct), previous.size + size)
+        for lemma, lemma_keys in lemma_verses.items():
+            stats[lemma] = stats[lemma]._replace(verses=len(lemma_keys))
+        return CorpusStats(stats, len(verses), sample)
+
+    def entries(self, min_count=2, pos='n', lemmatizer=None, vocabulary=None):
+        """Entrées [lemma, surface, book, chapter, verse, pos, key] des lemmes d'au moins min_count occurrences
+
+        Sans lemmatizer, lemme = surface. Avec un lemmatizer (voir
+        french_lemmas.FrenchLemmatizer), il est d'abord ajusté sur le
+        vocabulaire et le filtre porte sur le total du lemme. Avec vocabulary
+        (lemmes choisis par vocabulary_policy, lemmatizer déjà ajusté par
+        lemma_stats), seuls ces lemmes sont émis. key est la clé de recherche
+        sans accents du lemme. Les statistiques (unique_words, frequent_words,
+        lemma_count, entry_count) sont mises à jour au fil de la lecture.
+        """
+        lemma_totals = None
+        if lemmatizer is not None and vocabulary is None:
+            counts = self.word_counts()
+            lemma_totals = lemmatizer.fit(counts).lemma_counts(counts)
+
+        self.unique_words = self.frequent_words = self.entry_count = 0
+        lemmas = set()
+        for word, keys in self.iter_postings():
+            self.unique_words += 1
+            lemma = lemmatizer.lemma(word) if lemmatizer is not None else word
+            if vocabulary is not None:
+                if lemma not in vocabulary:
+                    continue
+            elif (lemma_totals[lemma] if lemma_totals is not None else len(keys)) < min_count:
+                continue
+            self.frequent_words += 1
+            lemmas.add(lemma)
+            key = search_key(lemma)
+            for verse_key in keys:
+                book, chapter, verse = self.decode_key(verse_key)
+                self.entry_count += 1
+                yield [lemma, word, book, chapter, verse, pos, key]
+        self.lemma_count = len(lemmas)
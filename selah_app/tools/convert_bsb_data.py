@@ -9,6 +9,8 @@ import json
 import os
 from pathlib import Path
 
+from dart_services import write_indexed_services
+
 def analyze_excel_structure(file_path):
     """Analyse la structure d'un fichier Excel"""
     print(f"\n🔍 Analyse de {file_path}")
@@ -141,165 +143,14 @@ def convert_topical_index_to_json(excel_path, output_path):
         print(f"   ❌ Erreur conversion index thématique: {e}")
         return None
 
-def create_optimized_services(concordance_data, topical_data):
-    """Crée des services Flutter optimisés"""
+def create_optimized_services(concordance_data, topical_data, concordance_json, topical_json):
+    """Crée des services Flutter optimisés, adossés à des index de recherche précalculés"""
     print(f"\n🔧 Création des services Flutter optimisés...")
     
-    # Service de concordance
-    concordance_service = f"""
-import 'dart:convert';
-import 'package:flutter/services.dart';
-
-/// Service de concordance BSB optimisé
-class BSBConcordanceService {{
-  static Map<String, dynamic>? _concordanceData;
-  
-  /// Initialise le service
-  static Future<void> init() async {{
-    if (_concordanceData != null) return;
-    
-    try {{
-      final String jsonString = await rootBundle.loadString('assets/data/bsb_concordance.json');
-      _concordanceData = json.decode(jsonString);
-      print('✅ BSBConcordanceService initialisé avec ${{_concordanceData?.length ?? 0}} mots');
-    }} catch (e) {{
-      print('⚠️ Erreur chargement concordance BSB: $e');
-      _concordanceData = {{}};
-    }}
-  }}
-  
-  /// Recherche un mot dans la concordance
-  static Future<List<String>> searchWord(String word) async {{
-    await init();
-    
-    if (_concordanceData == null) return [];
-    
-    final normalizedWord = word.toLowerCase().trim();
-    final data = _concordanceData![normalizedWord];
-    
-    if (data == null) return [];
-    
-    return List<String>.from(data['references'] ?? []);
-  }}
-  
-  /// Obtient les statistiques d'un mot
-  static Future<Map<String, dynamic>?> getWordStats(String word) async {{
-    await init();
-    
-    if (_concordanceData == null) return null;
-    
-    final normalizedWord = word.toLowerCase().trim();
-    return _concordanceData![normalizedWord];
-  }}
-  
-  /// Recherche partielle
-  static Future<List<String>> searchPartial(String partial) async {{
-    await init();
-    
-    if (_concordanceData == null) return [];
-    
-    final normalizedPartial = partial.toLowerCase().trim();
-    final matches = <String>[];
-    
-    for (final word in _concordanceData!.keys) {{
-      if (word.contains(normalizedPartial)) {{
-        matches.add(word);
-      }}
-    }}
-    
-    return matches.take(20).toList(); // Limiter à 20 résultats
-  }}
-}}
-"""
-    
-    # Service d'index thématique
-    topical_service = f"""
-import 'dart:convert';
-import 'package:flutter/services.dart';
-
-/// Service d'index thématique BSB optimisé
-class BSBTopicalService {{
-  static Map<String, dynamic>? _topicalData;
-  
-  /// Initialise le service
-  static Future<void> init() async {{
-    if (_topicalData != null) return;
-    
-    try {{
-      final String jsonString = await rootBundle.loadString('assets/data/bsb_topical_index.json');
-      _topicalData = json.decode(jsonString);
-      print('✅ BSBTopicalService initialisé avec ${{_topicalData?.length ?? 0}} thèmes');
-    }} catch (e) {{
-      print('⚠️ Erreur chargement index thématique BSB: $e');
-      _topicalData = {{}};
-    }}
-  }}
-  
-  /// Recherche un thème
-  static Future<List<String>> searchTheme(String theme) async {{
-    await init();
-    
-    if (_topicalData == null) return [];
-    
-    final normalizedTheme = theme.toLowerCase().trim();
-    
-    // Recherche exacte d'abord
-    for (final key in _topicalData!.keys) {{
-      if (key.toLowerCase() == normalizedTheme) {{
-        return List<String>.from(_topicalData![key]['references'] ?? []);
-      }}
-    }}
-    
-    // Recherche partielle
-    final matches = <String>[];
-    for (final key in _topicalData!.keys) {{
-      if (key.toLowerCase().contains(normalizedTheme)) {{
-        matches.addAll(_topicalData![key]['references'] ?? []);
-      }}
-    }}
-    
-    return matches.take(50).toList(); // Limiter à 50 résultats
-  }}
-  
-  /// Obtient tous les thèmes disponibles
-  static Future<List<String>> getAllThemes() async {{
-    await init();
-    
-    if (_topicalData == null) return [];
-    
-    return _topicalData!.keys.toList()..sort();
-  }}
-  
-  /// Recherche partielle de thèmes
-  static Future<List<String>> searchPartialTheme(String partial) async {{
-    await init();
-    
-    if (_topicalData == null) return [];
-    
-    final normalizedPartial = partial.toLowerCase().trim();
-    final matches = <String>[];
-    
-    for (final theme in _topicalData!.keys) {{
-      if (theme.toLowerCase().contains(normalizedPartial)) {{
-        matches.add(theme);
-      }}
-    }}
-    
-    return matches.take(20).toList(); // Limiter à 20 résultats
-  }}
-}}
-"""
-    
-    # Sauvegarder les services
-    with open('lib/services/bsb_concordance_service.dart', 'w', encoding='utf-8') as f:
-        f.write(concordance_service)
-    
-    with open('lib/services/bsb_topical_service.dart', 'w', encoding='utf-8') as f:
-        f.write(topical_service)
+    write_indexed_services(concordance_json, concordance_data.keys(), topical_json, topical_data.keys(),
+                           description='optimisé', max_references=50)
     
     print("   ✅ Services Flutter créés")
-    print("   📁 bsb_concordance_service.dart")
-    print("   📁 bsb_topical_service.dart")
 
 def main():
     """Fonction principale"""
@@ -327,7 +178,7 @@ def main():
     
     # Créer les services Flutter
     if concordance_data and topical_data:
-        create_optimized_services(concordance_data, topical_data)
+        create_optimized_services(concordance_data, topical_data, concordance_json, topical_json)
         
         # Afficher les statistiques finales
         concordance_size = os.path.getsize(concordance_json) / 1024 / 1024
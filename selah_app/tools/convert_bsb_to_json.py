@@ -6,64 +6,30 @@ Transforme les fichiers Excel en format JSONL compressé pour un chargement lég
 
 import pandas as pd
 import json
-import gzip
 import argparse
 import os
 from pathlib import Path
-import re
 
-def normalize_reference(ref_str):
-    """Normalise une référence biblique vers le format canonique français"""
-    if not ref_str or pd.isna(ref_str):
-        return None
-    
-    # Nettoyer la référence
-    ref = str(ref_str).strip()
-    
-    # Mapping des livres vers le canon français
-    book_mapping = {
-        'Gen': 'Genèse', 'Ex': 'Exode', 'Lév': 'Lévitique', 'Nomb': 'Nombres', 'Deut': 'Deutéronome',
-        'Jos': 'Josué', 'Jug': 'Juges', 'Ruth': 'Ruth', '1 Sam': '1 Samuel', '2 Sam': '2 Samuel',
-        '1 Rois': '1 Rois', '2 Rois': '2 Rois', '1 Chron': '1 Chroniques', '2 Chron': '2 Chroniques',
-        'Esd': 'Esdras', 'Néh': 'Néhémie', 'Est': 'Esther', 'Job': 'Job', 'Ps': 'Psaumes',
-        'Prov': 'Proverbes', 'Eccl': 'Ecclésiaste', 'Cant': 'Cantique des Cantiques',
-        'És': 'Ésaïe', 'Jér': 'Jérémie', 'Lam': 'Lamentations', 'Éz': 'Ézéchiel', 'Dan': 'Daniel',
-        'Os': 'Osée', 'Joël': 'Joël', 'Am': 'Amos', 'Abd': 'Abdias', 'Jon': 'Jonas',
-        'Mich': 'Michée', 'Nah': 'Nahum', 'Hab': 'Habacuc', 'Soph': 'Sophonie',
-        'Agg': 'Aggée', 'Zac': 'Zacharie', 'Mal': 'Malachie',
-        'Mat': 'Matthieu', 'Marc': 'Marc', 'Luc': 'Luc', 'Jean': 'Jean',
-        'Act': 'Actes', 'Rom': 'Romains', '1 Cor': '1 Corinthiens', '2 Cor': '2 Corinthiens',
-        'Gal': 'Galates', 'Éph': 'Éphésiens', 'Phil': 'Philippiens', 'Col': 'Colossiens',
-        '1 Thess': '1 Thessaloniciens', '2 Thess': '2 Thessaloniciens',
-        '1 Tim': '1 Timothée', '2 Tim': '2 Timothée', 'Tite': 'Tite', 'Philém': 'Philémon',
-        'Héb': 'Hébreux', 'Jac': 'Jacques', '1 Pi': '1 Pierre', '2 Pi': '2 Pierre',
-        '1 Jean': '1 Jean', '2 Jean': '2 Jean', '3 Jean': '3 Jean', 'Jude': 'Jude', 'Apoc': 'Apocalypse'
-    }
-    
-    # Extraire livre, chapitre et verset
-    # Format attendu : "Jean 3:16" ou "Jean 3:16-18"
-    match = re.match(r'([A-Za-z\s]+)\s+(\d+):(\d+(?:-\d+)?)', ref)
-    if not match:
-        return None
-    
-    book_part = match.group(1).strip()
-    chapter = int(match.group(2))
-    verse_part = match.group(3)
-    
-    # Normaliser le livre
-    book = book_mapping.get(book_part, book_part)
-    
-    # Extraire le verset de début
-    verse_start = int(verse_part.split('-')[0])
-    
-    return {
-        'book': book,
-        'chapter': chapter,
-        'verse': verse_start
-    }
+from bible_refs import with_verse_ids
+from bsb_columnar import (
+    CONCORDANCE_FIELDS,
+    clean_text_column,
+    float_column,
+    frame_rows,
+    search_key_column,
+    split_references,
+)
+from concordance_binary import write_concordance_binary
+from fuzzy_index import FUZZY_INDEX_FILE, write_fuzzy_index
+from jsonl_writer import write_jsonl
+from prefix_index import PREFIX_INDEX_FILE, write_prefix_index
+from verse_index import VERSE_LEMMAS_FILE, VERSE_TOPICS_FILE, write_verse_lemmas, write_verse_topics
 
-def process_topical_index(excel_path, output_dir):
-    """Traite l'index thématique BSB"""
+def process_topical_index(excel_path, output_dir, verse_ids=False):
+    """Traite l'index thématique BSB (liens [topic_id, verse_id, weight] avec verse_ids=True)
+    
+    Écrit aussi l'index inversé verset -> thèmes (verse_topics.idx).
+    """
     print(f"📚 Traitement de l'index thématique: {excel_path}")
     
     # Lire le fichier Excel
@@ -90,40 +56,30 @@ def process_topical_index(excel_path, output_dir):
     
     print(f"   📋 Colonnes utilisées: topic={topic_col}, ref={ref_col}, weight={weight_col}")
     
-    # Créer l'index des sujets (léger)
-    topics = {}
-    topic_links = []
-    
-    for _, row in df.iterrows():
-        topic = str(row[topic_col]).strip()
-        ref = str(row[ref_col]).strip()
-        weight = float(row[weight_col]) if weight_col and not pd.isna(row[weight_col]) else 1.0
-        
-        if not topic or not ref or topic == 'nan' or ref == 'nan':
-            continue
-        
-        # Normaliser la référence
-        norm_ref = normalize_reference(ref)
-        if not norm_ref:
-            continue
-        
-        # Créer un ID unique pour le sujet
-        topic_id = len(topics)
-        if topic not in topics:
-            topics[topic] = {
-                'id': topic_id,
-                'slug': topic.lower().replace(' ', '-'),
-                't': topic
-            }
-        
-        # Ajouter le lien sujet-référence
-        topic_links.append([
-            topic_id,
-            norm_ref['book'],
-            norm_ref['chapter'],
-            norm_ref['verse'],
-            weight
-        ])
+    # Nettoyer et filtrer les colonnes en une seule passe vectorisée
+    topic_text = clean_text_column(df[topic_col])
+    refs = split_references(df[ref_col])
+    weights = float_column(df[weight_col]) if weight_col else pd.Series(1.0, index=df.index)
+    
+    valid = topic_text.ne('') & refs['book'].ne('')
+    topic_text = topic_text[valid]
+    
+    # Un ID par sujet, dans l'ordre de première apparition
+    topic_ids, topic_names = pd.factorize(topic_text, sort=False)
+    topics = {
+        topic: {
+            'id': topic_id,
+            'slug': topic.lower().replace(' ', '-'),
+            't': topic
+        }
+        for topic_id, topic in enumerate(topic_names)
+    }
+    
+    # Liens sujet-référence
+    links_frame = refs.loc[valid].assign(topic_id=topic_ids, weight=weights[valid])
+    topic_links = list(frame_rows(links_frame, ['topic_id', 'book', 'chapter', 'verse', 'weight']))
+    if verse_ids:
+        topic_links = list(with_verse_ids(topic_links, 1))
     
     # Sauvegarder l'index des sujets (léger)
     topics_min = {
@@ -139,15 +95,24 @@ def process_topical_index(excel_path, output_dir):
     
     # Sauvegarder les liens sujet-référence (compressé)
     topics_links_path = os.path.join(output_dir, 'topics_links.jsonl.gz')
-    with gzip.open(topics_links_path, 'wt', encoding='utf-8') as f:
-        for link in topic_links:
-            f.write(json.dumps(link, ensure_ascii=False) + '\n')
+    write_jsonl(topics_links_path, topic_links, index_key=0)
     
     print(f"   ✅ Liens sujet-référence sauvegardés: {topics_links_path} ({os.path.getsize(topics_links_path)} bytes)")
     print(f"   📊 Total: {len(topics)} sujets, {len(topic_links)} liens")
+    
+    # Index inversé verset -> thèmes (trié, compressé par blocs)
+    verse_topics_path = os.path.join(output_dir, VERSE_TOPICS_FILE)
+    verse_count, size = write_verse_topics(topic_links, verse_topics_path)
+    print(f"   ✅ Index verset -> thèmes sauvegardé: {verse_topics_path} ({size} bytes, {verse_count} versets)")
 
-def process_concordance(excel_path, output_dir):
-    """Traite la concordance BSB"""
+def process_concordance(excel_path, output_dir, verse_ids=False, binary=False):
+    """Traite la concordance BSB (entrées [lemma, surface, book, chapter, verse, pos, key], [lemma, surface, verse_id, pos, key] avec verse_ids=True)
+    
+    Avec binary=True, écrit aussi concordance.bin (dictionnaire trié + listes de versets varint).
+    Écrit toujours l'index inversé verset -> lemmes (verse_lemmas.idx),
+    l'index de complétion des lemmes (concordance_prefix.idx) et leur index de
+    correction orthographique (concordance_fuzzy.idx).
+    """
     print(f"📖 Traitement de la concordance: {excel_path}")
     
     # Lire le fichier Excel
@@ -177,47 +142,56 @@ def process_concordance(excel_path, output_dir):
     
     print(f"   📋 Colonnes utilisées: lemma={lemma_col}, surface={surface_col}, ref={ref_col}, pos={pos_col}")
     
-    # Traiter la concordance
-    concordance_data = []
-    
-    for _, row in df.iterrows():
-        lemma = str(row[lemma_col]).strip()
-        surface = str(row[surface_col]).strip() if surface_col and not pd.isna(row[surface_col]) else lemma
-        ref = str(row[ref_col]).strip()
-        pos = str(row[pos_col]).strip() if pos_col and not pd.isna(row[pos_col]) else ''
-        
-        if not lemma or not ref or lemma == 'nan' or ref == 'nan':
-            continue
-        
-        # Normaliser la référence
-        norm_ref = normalize_reference(ref)
-        if not norm_ref:
-            continue
-        
-        # Ajouter l'entrée de concordance
-        concordance_data.append([
-            lemma,
-            surface,
-            norm_ref['book'],
-            norm_ref['chapter'],
-            norm_ref['verse'],
-            pos
-        ])
+    # Traiter la concordance en colonnes
+    lemma = clean_text_column(df[lemma_col])
+    surface = clean_text_column(df[surface_col]) if surface_col else lemma
+    surface = surface.where(surface.ne(''), lemma)
+    pos = clean_text_column(df[pos_col]) if pos_col else pd.Series('', index=df.index)
+    refs = split_references(df[ref_col])
+    
+    valid = lemma.ne('') & refs['book'].ne('')
+    concordance_frame = refs.loc[valid].assign(lemma=lemma[valid], surface=surface[valid], pos=pos[valid],
+                                               key=search_key_column(lemma[valid]))
+    concordance_data = list(frame_rows(concordance_frame, CONCORDANCE_FIELDS))
+    if verse_ids:
+        concordance_data = list(with_verse_ids(concordance_data, 2))
     
     # Sauvegarder la concordance (compressée)
     concordance_path = os.path.join(output_dir, 'concordance.jsonl.gz')
-    with gzip.open(concordance_path, 'wt', encoding='utf-8') as f:
-        for entry in concordance_data:
-            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    write_jsonl(concordance_path, concordance_data, index_key=0)
     
     print(f"   ✅ Concordance sauvegardée: {concordance_path} ({os.path.getsize(concordance_path)} bytes)")
     print(f"   📊 Total: {len(concordance_data)} entrées")
+    
+    # Index inversé verset -> lemmes (trié, compressé par blocs)
+    verse_lemmas_path = os.path.join(output_dir, VERSE_LEMMAS_FILE)
+    verse_count, size = write_verse_lemmas(concordance_data, verse_lemmas_path)
+    print(f"   ✅ Index verset -> lemmes sauvegardé: {verse_lemmas_path} ({size} bytes, {verse_count} versets)")
+    
+    # Index de complétion des lemmes (front-coding, top-N par préfixe)
+    prefix_path = os.path.join(output_dir, PREFIX_INDEX_FILE)
+    lemma_count, size = write_prefix_index(concordance_data, prefix_path)
+    print(f"   ✅ Index de complétion sauvegardé: {prefix_path} ({size} bytes, {lemma_count} lemmes)")
+    
+    # Index de correction orthographique (suppressions jusqu'à distance 2)
+    fuzzy_path = os.path.join(output_dir, FUZZY_INDEX_FILE)
+    lemma_count, size = write_fuzzy_index(concordance_data, fuzzy_path)
+    print(f"   ✅ Index de correction sauvegardé: {fuzzy_path} ({size} bytes, {lemma_count} lemmes)")
+    
+    if binary:
+        binary_path = os.path.join(output_dir, 'concordance.bin')
+        lemma_count, size = write_concordance_binary(concordance_data, binary_path)
+        print(f"   ✅ Concordance binaire sauvegardée: {binary_path} ({size} bytes, {lemma_count} lemmes)")
 
 def main():
     parser = argparse.ArgumentParser(description='Convertir les fichiers Excel BSB en JSON optimisé pour Flutter')
     parser.add_argument('--topical', help='Chemin vers bsb_topical_index.xlsx')
     parser.add_argument('--concordance', help='Chemin vers bsb_concordance.xlsx')
     parser.add_argument('--out', required=True, help='Répertoire de sortie')
+    parser.add_argument('--binary', action='store_true',
+                        help='Écrire aussi concordance.bin (listes de versets binaires)')
+    parser.add_argument('--verse-ids', action='store_true',
+                        help='Émettre des IDs de versets entiers (BBCCCVVV) au lieu de livre/chapitre/verset')
     
     args = parser.parse_args()
     
@@ -231,14 +205,14 @@ def main():
     # Traiter l'index thématique
     if args.topical:
         if os.path.exists(args.topical):
-            process_topical_index(args.topical, str(output_dir))
+            process_topical_index(args.topical, str(output_dir), args.verse_ids)
         else:
             print(f"❌ Fichier non trouvé: {args.topical}")
     
     # Traiter la concordance
     if args.concordance:
         if os.path.exists(args.concordance):
-            process_concordance(args.concordance, str(output_dir))
+            process_concordance(args.concordance, str(output_dir), args.verse_ids, args.binary)
         else:
             print(f"❌ Fichier non trouvé: {args.concordance}")
     
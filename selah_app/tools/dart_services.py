@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Génération des services Flutter de concordance et d'index thématique BSB.
+
+Partagé par convert_bsb_data et optimize_bsb_data. Chaque service charge ses
+données JSON {clé: {references, count}} et l'index de recherche précalculé
+par search_index ; les recherches partielles et approchées passent par
+BSBSearchIndex (lib/services/bsb_search_index.dart) au lieu de parcourir
+toutes les clés à chaque frappe.
+"""
+
+import os
+
+from search_index import search_index_path, write_search_index
+
+SERVICES_DIR = 'lib/services'
+
+SEARCH_INDEX_SERVICE = """
+import 'dart:convert';
+import 'package:flutter/services.dart';
+
+/// Index de recherche précalculé par tools/search_index.py
+///
+/// Clés normalisées triées (dichotomie pour l'exact et les préfixes) et table
+/// des trigrammes (sous-chaînes et recherche approchée) : le coût d'une
+/// recherche ne dépend pas de la taille du vocabulaire.
+class BSBSearchIndex {
+  final int n;
+  final List<String> keys;
+  final List<String> labels;
+  final Map<String, dynamic> _ngrams;
+  final Map<String, List<int>> _decoded = {};
+
+  BSBSearchIndex(Map<String, dynamic> data)
+      : n = data['n'] as int,
+        keys = List<String>.from(data['keys'] as List),
+        labels = List<String>.from((data['labels'] ?? data['keys']) as List),
+        _ngrams = Map<String, dynamic>.from(data['ngrams'] as Map);
+
+  static BSBSearchIndex empty() => BSBSearchIndex({'n': 3, 'keys': [], 'ngrams': {}});
+
+  /// Charge un index JSON depuis les assets
+  static Future<BSBSearchIndex> load(String asset) async {
+    final String jsonString = await rootBundle.loadString(asset);
+    return BSBSearchIndex(json.decode(jsonString) as Map<String, dynamic>);
+  }
+
+  int get length => keys.length;
+
+  static String normalize(String key) => key.toLowerCase().trim();
+
+  int _lowerBound(String value) {
+    var low = 0;
+    var high = keys.length;
+    while (low < high) {
+      final mid = (low + high) >> 1;
+      if (keys[mid].compareTo(value) < 0) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    return low;
+  }
+
+  /// Liste (décodée à la demande) des clés contenant un n-gramme
+  List<int> _postings(String gram) {
+    return _decoded.putIfAbsent(gram, () {
+      var total = 0;
+      return [for (final delta in (_ngrams[gram] as List? ?? const [])) total += delta as int];
+    });
+  }
+
+  Set<String> _grams(String text) {
+    final grams = <String>{};
+    for (var i = 0; i + n <= text.length; i++) {
+      grams.add(text.substring(i, i + n));
+    }
+    return grams;
+  }
+
+  /// Indice de la clé exacte, ou -1
+  int find(String key) {
+    final normalized = normalize(key);
+    final index = _lowerBound(normalized);
+    return index < keys.length && keys[index] == normalized ? index : -1;
+  }
+
+  /// Clés commençant par le texte, dans l'ordre trié
+  List<String> prefix(String text, {int limit = 20}) {
+    final normalized = normalize(text);
+    final results = <String>[];
+    for (var i = _lowerBound(normalized);
+        i < keys.length && results.length < limit && keys[i].startsWith(normalized);
+        i++) {
+      results.add(labels[i]);
+    }
+    return results;
+  }
+
+  /// Clés contenant le texte (intersection des listes de ses n-grammes)
+  List<String> contains(String text, {int limit = 20}) {
+    final normalized = normalize(text);
+    final grams = _grams(normalized);
+    if (grams.isEmpty) return prefix(normalized, limit: limit);
+
+    final lists = grams.map(_postings).toList()..sort((a, b) => a.length.compareTo(b.length));
+    final candidates = lists.first.toSet();
+    for (final postings in lists.skip(1)) {
+      candidates.retainAll(postings);
+      if (candidates.isEmpty) return [];
+    }
+
+    final results = <String>[];
+    for (final index in candidates.toList()..sort()) {
+      if (keys[index].contains(normalized)) {
+        results.add(labels[index]);
+        if (results.length >= limit) break;
+      }
+    }
+    return results;
+  }
+
+  /// Clés les plus proches du texte par n-grammes communs (coefficient de Dice)
+  List<String> fuzzy(String text, {int limit = 20, double minScore = 0.3}) {
+    final grams = _grams(' ${normalize(text)} ');
+    final shared = <int, int>{};
+    for (final gram in grams) {
+      for (final index in _postings(gram)) {
+        shared[index] = (shared[index] ?? 0) + 1;
+      }
+    }
+
+    final scored = <MapEntry<int, double>>[];
+    shared.forEach((index, common) {
+      final score = 2 * common / (grams.length + keys[index].length + 3 - n);
+      if (score >= minScore) scored.add(MapEntry(index, score));
+    });
+    scored.sort((a, b) {
+      final byScore = b.value.compareTo(a.value);
+      return byScore != 0 ? byScore : keys[a.key].compareTo(keys[b.key]);
+    });
+    return [for (final entry in scored.take(limit)) labels[entry.key]];
+  }
+
+  /// Préfixes d'abord, complétés par les clés contenant le texte
+  List<String> search(String text, {int limit = 20}) {
+    final results = prefix(text, limit: limit);
+    if (results.length < limit) {
+      final seen = results.toSet();
+      for (final key in contains(text, limit: limit)) {
+        if (seen.add(key)) results.add(key);
+        if (results.length >= limit) break;
+      }
+    }
+    return results;
+  }
+}
+"""
+
+CONCORDANCE_SERVICE = """
+import 'dart:convert';
+import 'package:flutter/services.dart';
+
+import 'bsb_search_index.dart';
+
+/// Service de concordance BSB @DESCRIPTION@
+///
+/// Les recherches partielles et approchées utilisent l'index précalculé
+/// (@INDEX_ASSET@) au lieu de parcourir tous les mots.
+class BSBConcordanceService {
+  static Map<String, dynamic>? _concordanceData;
+  static BSBSearchIndex _index = BSBSearchIndex.empty();
+  static Future<void>? _loading;
+
+  /// Initialise le service (chargement à la demande)
+  static Future<void> init() {
+    if (_concordanceData != null) return Future.value();
+    return _loading ??= _load();
+  }
+
+  static Future<void> _load() async {
+    try {
+      final String jsonString = await rootBundle.loadString('@DATA_ASSET@');
+      _concordanceData = json.decode(jsonString);
+      _index = await BSBSearchIndex.load('@INDEX_ASSET@');
+      print('✅ BSBConcordanceService initialisé avec ${_concordanceData?.length ?? 0} mots');
+    } catch (e) {
+      print('⚠️ Erreur chargement concordance BSB: $e');
+      _concordanceData = {};
+      _index = BSBSearchIndex.empty();
+    } finally {
+      _loading = null;
+    }
+  }
+
+  /// Recherche un mot dans la concordance
+  static Future<List<String>> searchWord(String word) async {
+    await init();
+
+    final data = _concordanceData![BSBSearchIndex.normalize(word)];
+    if (data == null) return [];
+
+    return List<String>.from(data['references'] ?? []);
+  }
+
+  /// Obtient les statistiques d'un mot
+  static Future<Map<String, dynamic>?> getWordStats(String word) async {
+    await init();
+
+    return _concordanceData![BSBSearchIndex.normalize(word)];
+  }
+
+  /// Recherche partielle : mots commençant par le texte, puis le contenant
+  static Future<List<String>> searchPartial(String partial, {int limit = 20}) async {
+    await init();
+
+    return _index.search(partial, limit: limit);
+  }
+
+  /// Recherche approchée (fautes de frappe, variantes d'orthographe)
+  static Future<List<String>> searchFuzzy(String word, {int limit = 10}) async {
+    await init();
+
+    return _index.fuzzy(word, limit: limit);
+  }
+
+  /// Vérifie si le service est initialisé
+  static bool get isInitialized => _concordanceData != null;
+
+  /// Obtient le nombre de mots disponibles
+  static int get wordCount => _concordanceData?.length ?? 0;
+}
+"""
+
+TOPICAL_SERVICE = """
+import 'dart:convert';
+import 'package:flutter/services.dart';
+
+import 'bsb_search_index.dart';
+
+/// Service d'index thématique BSB @DESCRIPTION@
+///
+/// Les recherches de thèmes utilisent l'index précalculé (@INDEX_ASSET@)
+/// au lieu de parcourir tous les thèmes.
+class BSBTopicalService {
+  static Map<String, dynamic>? _topicalData;
+  static BSBSearchIndex _index = BSBSearchIndex.empty();
+  static Future<void>? _loading;
+
+  /// Initialise le service (chargement à la demande)
+  static Future<void> init() {
+    if (_topicalData != null) return Future.value();
+    return _loading ??= _load();
+  }
+
+  static Future<void> _load() async {
+    try {
+      final String jsonString = await rootBundle.loadString('@DATA_ASSET@');
+      _topicalData = json.decode(jsonString);
+      _index = await BSBSearchIndex.load('@INDEX_ASSET@');
+      print('✅ BSBTopicalService initialisé avec ${_topicalData?.length ?? 0} thèmes');
+    } catch (e) {
+      print('⚠️ Erreur chargement index thématique BSB: $e');
+      _topicalData = {};
+      _index = BSBSearchIndex.empty();
+    } finally {
+      _loading = null;
+    }
+  }
+
+  static List<String> _references(String theme) =>
+      List<String>.from(_topicalData![theme]?['references'] ?? []);
+
+  /// Recherche un thème (exact d'abord, sinon thèmes contenant le texte)
+  static Future<List<String>> searchTheme(String theme) async {
+    await init();
+
+    final index = _index.find(theme);
+    if (index >= 0) return _references(_index.labels[index]);
+
+    final matches = <String>[];
+    for (final key in _index.contains(theme, limit: @MAX_REFERENCES@)) {
+      matches.addAll(_references(key));
+      if (matches.length >= @MAX_REFERENCES@) break;
+    }
+    return matches.take(@MAX_REFERENCES@).toList();
+  }
+
+  /// Obtient les thèmes disponibles, triés
+  static Future<List<String>> getAllThemes() async {
+    await init();
+
+    return _index.labels.take(@MAX_THEMES@).toList();
+  }
+
+  /// Recherche partielle de thèmes
+  static Future<List<String>> searchPartialTheme(String partial, {int limit = 20}) async {
+    await init();
+
+    return _index.search(partial, limit: limit);
+  }
+
+  /// Recherche approchée de thèmes
+  static Future<List<String>> searchFuzzyTheme(String theme, {int limit = 10}) async {
+    await init();
+
+    return _index.fuzzy(theme, limit: limit);
+  }
+
+  /// Vérifie si le service est initialisé
+  static bool get isInitialized => _topicalData != null;
+
+  /// Obtient le nombre de thèmes disponibles
+  static int get themeCount => _topicalData?.length ?? 0;
+}
+"""
+
+
+def render(template, **values):
+    for name, value in values.items():
+        template = template.replace(f"@{name.upper()}@", str(value))
+    return template
+
+
+def write_indexed_services(concordance_path, concordance_keys, topical_path, topical_keys, description,
+                           max_references=50, max_themes=None, services_dir=SERVICES_DIR):
+    """Écrit les index de recherche et les services Flutter qui les utilisent
+
+    concordance_path et topical_path sont les assets JSON des données (chemins
+    relatifs à la racine du projet Flutter), *_keys leurs clés. max_themes
+    limite getAllThemes (None : tous les thèmes).
+    """
+    for label, path, keys in (('concordance', concordance_path, concordance_keys),
+                              ('thèmes', topical_path, topical_keys)):
+        count, size = write_search_index(keys, search_index_path(path))
+        print(f"   ✅ Index de recherche ({label}): {search_index_path(path)} ({count} clés, {size / 1024:.1f} KB)")
+
+    services = {
+        'bsb_search_index.dart': SEARCH_INDEX_SERVICE,
+        'bsb_concordance_service.dart': render(CONCORDANCE_SERVICE, description=description,
+                                               data_asset=concordance_path,
+                                               index_asset=search_index_path(concordance_path)),
+        'bsb_topical_service.dart': render(TOPICAL_SERVICE, description=description, data_asset=topical_path,
+                                           index_asset=search_index_path(topical_path),
+                                           max_references=max_references,
+                                           max_themes='_index.length' if max_themes is None else max_themes),
+    }
+    for filename, source in services.items():
+        with open(os.path.join(services_dir, filename), 'w', encoding='utf-8') as f:
+            f.write(source)
+        print(f"   📁 {filename}")
@@ -3,55 +3,46 @@
 Script pour déboguer la structure de la concordance BSB
 """
 
-import pandas as pd
-import re
+import os
+from itertools import islice
 
-def debug_concordance_structure():
+from bible_index import CONCORDANCE_FILE, BibleIndexReader
+from bible_refs import parse_reference, verse_id_to_reference
+from bsb_excel_stream import iter_concordance_entries, iter_concordance_rows, iter_sheet_rows
+from process_bsb_final import extract_word_from_entry
+
+def debug_concordance_structure(data_dir="assets/data"):
     """Débogue la structure de la concordance"""
     excel_path = "/Users/gafardgnane/Downloads/Bibles versions/bsb_concordance.xlsx"
-    
+
     print("🔍 Analyse détaillée de la concordance BSB")
     print("=" * 60)
-    
-    # Lire sans skiprows pour voir la vraie structure
-    df = pd.read_excel(excel_path)
-    print(f"📊 Dimensions originales: {df.shape[0]} lignes x {df.shape[1]} colonnes")
-    
-    # Afficher les 20 premières lignes
+
+    # Lire sans ignorer de lignes pour voir la vraie structure (curseur en streaming)
     print("\n📋 Premières 20 lignes:")
-    for i in range(min(20, len(df))):
+    for i, values in enumerate(islice(iter_sheet_rows(excel_path), 20)):
         print(f"\n--- Ligne {i} ---")
-        row = df.iloc[i]
-        for j, value in enumerate(row):
-            if pd.notna(value) and str(value).strip():
+        for j, value in enumerate(values):
+            if value is not None and str(value).strip():
                 print(f"  Colonne {j}: {repr(value)}")
-    
-    # Chercher des patterns de données valides
-    print("\n🔍 Recherche de patterns de données valides...")
-    
-    # Pattern 1: Lignes avec Book et Verse
-    valid_rows = 0
-    for i in range(min(1000, len(df))):
-        row = df.iloc[i]
-        
-        # Vérifier si c'est une ligne de données valide
-        has_book = pd.notna(row.iloc[1]) and str(row.iloc[1]).strip() and str(row.iloc[1]) != 'Book'
-        has_verse = pd.notna(row.iloc[7]) and str(row.iloc[7]).strip() and str(row.iloc[7]) != 'Verse'
-        has_entry = pd.notna(row.iloc[6]) and str(row.iloc[6]).strip() and str(row.iloc[6]) != 'Entry'
-        
-        if has_book and has_verse and has_entry:
-            valid_rows += 1
-            if valid_rows <= 10:  # Afficher les 10 premières lignes valides
-                print(f"\n✅ Ligne valide {i}:")
-                print(f"  Book: {repr(row.iloc[1])}")
-                print(f"  Verse: {repr(row.iloc[7])}")
-                print(f"  Entry: {repr(row.iloc[6])}")
-                print(f"  Context: {repr(row.iloc[8])}")
-    
-    print(f"\n📈 Lignes valides trouvées: {valid_rows}")
 
-if __name__ == "__main__":
-    debug_concordance_structure()
+    # Entrées valides extraites comme le fait process_bsb_final
+    print("\n🔍 Recherche de patterns de données valides...")
+    rows = islice(iter_concordance_rows(excel_path), 1000)
+    entries = list(iter_concordance_entries(rows, extract_word_from_entry, parse_reference))
+    for entry in entries[:10]:
+        print(f"\n✅ {entry[0]}: {entry[2]} {entry[3]}:{entry[4]}")
 
+    print(f"\n📈 Entrées valides trouvées: {len(entries)}")
 
+    # Comparer avec la concordance générée (index mappé, seul l'en-tête est lu à l'ouverture)
+    if entries and os.path.exists(os.path.join(data_dir, CONCORDANCE_FILE)):
+        word = entries[0][0]
+        with BibleIndexReader(data_dir) as reader:
+            verses = reader.verses_for_lemma(word)
+        print(f"\n🔗 '{word}' dans {CONCORDANCE_FILE}: {len(verses)} versets")
+        for vid in verses[:10]:
+            print(f"  {verse_id_to_reference(vid)}")
 
+if __name__ == "__main__":
+    debug_concordance_structure()
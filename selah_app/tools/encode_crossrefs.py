@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Convertit assets/jsons/crossrefs.json ("Matthieu.5.3": ["Luc.6.20", ...])
+en IDs de versets entiers BBCCCVVV ({"40005003": [42006020, ...]}).
+
+Les jointures entre références croisées, concordance et thèmes deviennent
+de simples comparaisons d'entiers.
+"""
+
+import argparse
+import json
+import os
+
+from bible_refs import reference_to_verse_id
+
+
+def encode_crossrefs(crossrefs):
+    """Encode un dict {référence: [références]} ; renvoie (dict encodé, références ignorées)"""
+    encoded = {}
+    unresolved = []
+    for source, targets in crossrefs.items():
+        source_id = reference_to_verse_id(source)
+        if source_id is None:
+            unresolved.append(source)
+            continue
+        target_ids = []
+        for target in targets:
+            target_id = reference_to_verse_id(target)
+            if target_id is None:
+                unresolved.append(target)
+            else:
+                target_ids.append(target_id)
+        encoded.setdefault(source_id, []).extend(target_ids)
+    return {str(vid): encoded[vid] for vid in sorted(encoded)}, unresolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Encoder crossrefs.json en IDs de versets entiers')
+    parser.add_argument('--input', default='assets/jsons/crossrefs.json', help='Fichier crossrefs.json source')
+    parser.add_argument('--output', default='assets/jsons/crossrefs_ids.json', help='Fichier de sortie')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        crossrefs = json.load(f)
+
+    encoded, unresolved = encode_crossrefs(crossrefs)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(encoded, f, separators=(',', ':'))
+
+    print(f"✅ {len(encoded)} versets encodés -> {args.output}")
+    print(f"📉 Taille: {os.path.getsize(args.input) / 1024:.1f} KB → {os.path.getsize(args.output) / 1024:.1f} KB")
+    if unresolved:
+        print(f"⚠️ {len(unresolved)} références non reconnues: {', '.join(unresolved[:10])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Normalisation des mots français : clé de recherche sans accents et lemmes.
+
+- search_key('Éternel') -> 'eternel' : minuscules, accents et ligatures
+  repliés, pour qu'une recherche « eternel » trouve « Éternel ».
+- FrenchLemmatizer : rattache les formes attestées du corpus à leur lemme,
+  sur la forme en minuscules avec ses accents (« mer » et « mère » restent
+  distinctes). Un suffixe verbal n'est retiré que si le verbe est attesté :
+  son infinitif et au moins MIN_VERB_FORMS formes conjuguées figurent dans
+  le vocabulaire (« aime », « aimons », « aimé » -> « aimer », mais
+  « enfant » ne devient pas « enfer »). Un pluriel est ramené au singulier
+  attesté. Les verbes irréguliers fréquents sont pris dans une table.
+
+Les lemmes sont calculés une fois par forme distincte : la Bible ne compte
+que quelques dizaines de milliers de formes pour des millions de mots.
+"""
+
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+MIN_STEM_LENGTH = 3
+MIN_VERB_FORMS = 2
+
+LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae'})
+
+# Terminaisons de conjugaison des verbes en -er et -ir, du plus long au plus court
+VERB_SUFFIXES = sorted({
+    'issaient', 'eraient', 'iraient', 'issions', 'issiez', 'assions', 'assiez', 'erions', 'eriez',
+    'irions', 'iriez', 'issons', 'issez', 'issent', 'issait', 'issais', 'issant', 'assent', 'èrent',
+    'irent', 'erons', 'eront', 'erais', 'erait', 'irons', 'iront', 'irais', 'irait', 'aient', 'asses',
+    'âmes', 'âtes', 'isse', 'erai', 'eras', 'erez', 'irai', 'iras', 'irez', 'ions', 'iées', 'asse',
+    'iez', 'ons', 'ent', 'ais', 'ait', 'ant', 'ées', 'era', 'ira', 'ies', 'ée', 'és', 'ie', 'es', 'er',
+    'ir', 'ez', 'ai', 'as', 'is', 'it', 'ît', 'ât', 'é', 'e', 'a', 'i',
+}, key=len, reverse=True)
+PLURAL_SUFFIXES = ('s', 'x')
+INFINITIVE_SUFFIXES = ('er', 'ir')
+
+# Formes sans ambiguïté seulement : « est » (point cardinal) et « été »
+# (saison) restent leur propre lemme
+IRREGULAR_VERBS = {
+    'être': ['être', 'suis', 'sommes', 'êtes', 'sont', 'était', 'étaient', 'étais', 'fut', 'furent',
+             'sera', 'seront', 'serai', 'seras', 'serez', 'serons', 'soit', 'soient', 'sois', 'soyez'],
+    'avoir': ['avoir', 'avons', 'avez', 'ont', 'avait', 'avaient', 'avais', 'eut', 'eurent', 'aura',
+              'auront', 'aurai', 'auras', 'aurez', 'aurons', 'ait', 'aient', 'ayant'],
+    'aller': ['aller', 'vais', 'vas', 'allons', 'allez', 'vont', 'allait', 'allaient', 'alla', 'allèrent',
+              'irai', 'ira', 'iront', 'irez', 'irons', 'aille', 'allant'],
+    'faire': ['faire', 'fais', 'fait', 'faisons', 'faites', 'font', 'faisait', 'faisaient', 'fit', 'firent',
+              'fera', 'feront', 'ferai', 'ferez', 'fasse', 'faisant'],
+    'dire': ['dire', 'dis', 'dit', 'disons', 'dites', 'disent', 'disait', 'disaient', 'dirent', 'dira',
+             'diront', 'dirai', 'disant'],
+    'pouvoir': ['pouvoir', 'peux', 'peut', 'pouvons', 'pouvez', 'peuvent', 'pouvait', 'pouvaient', 'put',
+                'purent', 'pourra', 'pourront', 'pourrai', 'puisse', 'puissent'],
+    'vouloir': ['vouloir', 'veux', 'veut', 'voulons', 'voulez', 'veulent', 'voulait', 'voulut', 'voudra',
+                'voudrai'],
+    'savoir': ['savoir', 'sais', 'sait', 'savons', 'savez', 'savent', 'savait', 'sut', 'saura', 'sauront',
+               'sachant', 'sache'],
+    'voir': ['voir', 'vois', 'voit', 'voyons', 'voyez', 'voient', 'voyait', 'virent', 'verra', 'verront',
+             'verrai', 'voyant'],
+    'venir': ['venir', 'viens', 'vient', 'venons', 'venez', 'viennent', 'venait', 'vint', 'vinrent',
+              'viendra', 'viendront', 'viendrai', 'venu', 'venue', 'venus', 'venant'],
+}
+IRREGULAR_LEMMAS = {form: lemma for lemma, forms in IRREGULAR_VERBS.items() for form in forms}
+
+
+@lru_cache(maxsize=None)
+def lower_form(word):
+    """Forme comparée par le lemmatiseur : minuscules et ligatures dépliées, accents gardés"""
+    return word.casefold().translate(LIGATURES)
+
+
+@lru_cache(maxsize=None)
+def search_key(word):
+    """Clé de recherche : minuscules, sans accents ni ligatures ('Éternel' -> 'eternel')"""
+    decomposed = unicodedata.normalize('NFD', lower_form(word))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def verb_roots(form):
+    """(racine, suffixe) des terminaisons verbales possibles de form, du suffixe le plus long au plus court"""
+    for suffix in VERB_SUFFIXES:
+        if form.endswith(suffix) and len(form) - len(suffix) >= MIN_STEM_LENGTH:
+            yield form[:-len(suffix)], suffix
+
+
+def _singular(form):
+    if form.endswith(PLURAL_SUFFIXES) and len(form) > MIN_STEM_LENGTH + 1:
+        return form[:-1]
+    return form
+
+
+class FrenchLemmatizer:
+    """Lemmatiseur ajusté sur le vocabulaire du corpus
+
+    fit() repère les verbes attestés et rattache chaque forme à son lemme ;
+    lemma() renvoie ce lemme. Un mot absent du vocabulaire ajusté est son
+    propre lemme, sauf verbe irrégulier connu.
+    """
+
+    def __init__(self):
+        self.lemmas = {}
+        self.verbs = {}
+
+    def _find_verbs(self, vocabulary, counts):
+        """{racine: infinitif} des verbes dont l'infinitif et MIN_VERB_FORMS formes conjuguées sont attestés"""
+        conjugated = defaultdict(set)
+        for form in vocabulary:
+            for root, suffix in verb_roots(form):
+                if suffix not in INFINITIVE_SUFFIXES:
+                    conjugated[root].add(form)
+        verbs = {}
+        for root, forms in conjugated.items():
+            infinitives = [root + suffix for suffix in INFINITIVE_SUFFIXES if root + suffix in vocabulary]
+            if infinitives and len(forms) >= MIN_VERB_FORMS:
+                verbs[root] = max(infinitives, key=lambda form: (counts[form], form))
+        return verbs
+
+    def _lemma_form(self, form, vocabulary):
+        """Lemme (forme en minuscules) d'une forme attestée"""
+        if form in IRREGULAR_LEMMAS:
+            return IRREGULAR_LEMMAS[form]
+        for root, _ in verb_roots(form):
+            if root in self.verbs:
+                return self.verbs[root]
+        singular = _singular(form)
+        if singular != form and singular in vocabulary:
+            return self._lemma_form(singular, vocabulary)
+        return form
+
+    def fit(self, counts):
+        """Ajuste les lemmes sur {forme: nombre d'occurrences} ; renvoie self"""
+        lowered = Counter()
+        surfaces = {}
+        for word, count in counts.items():
+            form = lower_form(word)
+            lowered[form] += count
+            # Forme affichée du lemme : la graphie la plus fréquente
+            if form not in surfaces or counts[word] > counts[surfaces[form]]:
+                surfaces[form] = word
+        vocabulary = set(lowered)
+        self.verbs = self._find_verbs(vocabulary, lowered)
+
+        self.lemmas = {}
+        for word in counts:
+            lemma = self._lemma_form(lower_form(word), vocabulary)
+            self.lemmas[word] = surfaces.get(lemma, lemma)
+        return self
+
+    def lemma(self, word):
+        """Lemme d'une forme de surface"""
+        if word in self.lemmas:
+            return self.lemmas[word]
+        return IRREGULAR_LEMMAS.get(lower_form(word), word)
+
+    def analyze(self, word):
+        """(lemme, surface, clé de recherche du lemme)"""
+        lemma = self.lemma(word)
+        return lemma, word, search_key(lemma)
+
+    def lemma_counts(self, counts):
+        """Nombre d'occurrences par lemme à partir de {forme: nombre}"""
+        totals = Counter()
+        for word, count in counts.items():
+            totals[self.lemma(word)] += count
+        return totals
+
+
+def with_search_keys(rows, field=0):
+    """Ajoute à chaque entrée la clé de recherche de son champ field (le lemme par défaut)"""
+    for row in rows:
+        yield list(row) + [search_key(row[field])]
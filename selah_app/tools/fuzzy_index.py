@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Index de correction orthographique des lemmes de concordance (suppressions
+façon SymSpell), pour les requêtes mal tapées ou sans accents
+(« esperance », « Ephesiens », « eternell »).
+
+Les lemmes sont comparés sur leur clé de recherche (french_lemmas.search_key,
+sans accents ni majuscules). À la construction, chaque clé (limitée à ses
+prefix_length premiers caractères) produit toutes ses variantes à au plus
+max_distance suppressions ; deux mots à distance d'édition <= max_distance
+partagent au moins une de ces variantes. Une requête génère les siennes,
+lit les lemmes associés puis vérifie la distance réelle (Damerau-Levenshtein
+restreinte) : le travail dépend de la longueur de la requête, pas de la
+taille du vocabulaire.
+
+Les variantes ne sont pas stockées : seule leur empreinte CRC-32 sert à
+choisir un seau de la table de hachage, et ses 16 bits de poids fort
+(fingerprint) écartent presque toutes les collisions avant vérification.
+
+Disposition du fichier (little-endian) :
+
+    En-tête (HEADER, 32 octets)
+        magic         4s   b'SFUZ'
+        version       u16
+        flags         u16
+        term_count    u32
+        max_distance  u16
+        prefix_length u16
+        bucket_count  u32  puissance de deux
+        terms_table   u32  début de la table des lemmes (u32 : offset de chaque lemme)
+        bucket_table  u32  début de la table des seaux (u32 × (bucket_count + 1) : indice de paire)
+        pairs_offset  u32  début des paires (PAIR : fingerprint u16, id de lemme u32)
+    Lemmes : varint fréquence, varint longueur + clé UTF-8, varint longueur +
+        lemme affiché (0 : identique à la clé)
+
+Usage:
+    python tools/fuzzy_index.py build assets/data/concordance.jsonl.gz assets/data/concordance_fuzzy.idx
+    python tools/fuzzy_index.py lookup assets/data/concordance_fuzzy.idx esperence
+    python tools/fuzzy_index.py bench assets/data/concordance_fuzzy.idx [--queries 2000]
+"""
+
+import struct
+import zlib
+from collections import Counter, defaultdict
+
+from concordance_binary import encode_varint
+from french_lemmas import search_key
+from prefix_index import read_varint
+
+MAGIC = b'SFUZ'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIHHIIII')
+PAIR = struct.Struct('<HI')
+OFFSET = struct.Struct('<I')
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+DEFAULT_LIMIT = 10
+
+FUZZY_INDEX_FILE = 'concordance_fuzzy.idx'
+
+
+def deletes(word, max_distance):
+    """word et toutes ses variantes à au plus max_distance suppressions"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def variant_hash(variant):
+    """(seau non réduit, fingerprint) d'une variante : CRC-32 de son UTF-8"""
+    value = zlib.crc32(variant.encode('utf-8'))
+    return value, value >> 16
+
+
+def edit_distance(a, b, max_distance):
+    """Distance de Damerau-Levenshtein restreinte (transpositions adjacentes), ou max_distance + 1 au-delà"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # Préfixe et suffixe communs ne changent pas la distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return min(max(len(a), len(b)), max_distance + 1)
+
+    # Seule la bande |i - j| <= max_distance peut rester sous le seuil
+    limit = max_distance + 1
+    previous2 = None
+    previous = [j if j <= max_distance else limit for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [limit] * (len(b) + 1)
+        current[0] = i if i <= max_distance else limit
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = previous[j - 1] if a[i - 1] == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (previous2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]
+                    and previous2[j - 2] + 1 < value):
+                value = previous2[j - 2] + 1
+            current[j] = min(value, limit)
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return limit
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndexWriter:
+    """Accumule les fréquences des lemmes puis écrit l'index de correction"""
+
+    def __init__(self, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.frequencies = Counter()
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def add(self, lemma, count=1):
+        self.frequencies[lemma] += count
+
+    def add_entry(self, entry):
+        """Ajoute une occurrence d'entrée de concordance (lemme en première colonne)"""
+        self.frequencies[entry[0]] += 1
+
+    def add_entries(self, entries):
+        for entry in entries:
+            self.frequencies[entry[0]] += 1
+
+    def to_bytes(self):
+        terms = sorted((search_key(lemma), lemma, count) for lemma, count in self.frequencies.items())
+        variants = defaultdict(set)
+        for term_id, (key, _, _) in enumerate(terms):
+            for variant in deletes(key[:self.prefix_length], self.max_distance):
+                variants[variant].add(term_id)
+
+        bucket_count = 1
+        while bucket_count * 2 < len(variants):
+            bucket_count *= 2
+        buckets = defaultdict(list)
+        for variant, term_ids in variants.items():
+            value, fingerprint = variant_hash(variant)
+            buckets[value & (bucket_count - 1)].extend((fingerprint, term_id) for term_id in term_ids)
+
+        records = bytearray()
+        term_offsets = []
+        for key, lemma, count in terms:
+            term_offsets.append(len(records))
+            encode_varint(count, records)
+            encoded_key = key.encode('utf-8')
+            encode_varint(len(encoded_key), records)
+            records += encoded_key
+            display = b'' if lemma == key else lemma.encode('utf-8')
+            encode_varint(len(display), records)
+            records += display
+
+        pairs = bytearray()
+        bucket_table = bytearray()
+        pair_count = 0
+        for bucket in range(bucket_count):
+            bucket_table += OFFSET.pack(pair_count)
+            for fingerprint, term_id in sorted(set(buckets.get(bucket, ()))):
+                pairs += PAIR.pack(fingerprint, term_id)
+                pair_count += 1
+        bucket_table += OFFSET.pack(pair_count)
+
+        records_offset = HEADER.size
+        terms_table = records_offset + len(records)
+        bucket_table_offset = terms_table + len(terms) * OFFSET.size
+        pairs_offset = bucket_table_offset + len(bucket_table)
+        terms_blob = b''.join(OFFSET.pack(records_offset + offset) for offset in term_offsets)
+        header = HEADER.pack(MAGIC, VERSION, 0, len(terms), self.max_distance, self.prefix_length, bucket_count,
+                             terms_table, bucket_table_offset, pairs_offset)
+        return header + bytes(records) + terms_blob + bytes(bucket_table) + bytes(pairs)
+
+    def write(self, path):
+        """Écrit l'index et renvoie sa taille en octets"""
+        data = self.to_bytes()
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+
+def write_fuzzy_index(entries, path):
+    """Écrit l'index de correction d'entrées de concordance ; renvoie (lemmes, octets)"""
+    writer = FuzzyIndexWriter()
+    writer.add_entries(entries)
+    return len(writer), writer.write(path)
+
+
+class FuzzyIndex:
+    """Lecteur de l'index de correction (bytes ou mmap)"""
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        (magic, version, _, self.term_count, self.max_distance, self.prefix_length, self.bucket_count,
+         self.terms_table, self.bucket_table, self.pairs_offset) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Index de correction invalide (magic {magic!r})")
+        if version != VERSION:
+            raise ValueError(f"Version d'index de correction non supportée: {version}")
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return self.term_count
+
+    def term(self, term_id):
+        """(clé, lemme, fréquence) du lemme term_id"""
+        position, = OFFSET.unpack_from(self.buffer, self.terms_table + term_id * OFFSET.size)
+        frequency, position = read_varint(self.buffer, position)
+        length, position = read_varint(self.buffer, position)
+        key = str(self.buffer[position:position + length], 'utf-8')
+        position += length
+        length, position = read_varint(self.buffer, position)
+        lemma = str(self.buffer[position:position + length], 'utf-8') if length else key
+        return key, lemma, frequency
+
+    def _candidates(self, variant):
+        value, fingerprint = variant_hash(variant)
+        bucket = value & (self.bucket_count - 1)
+        start, end = struct.unpack_from('<II', self.buffer, self.bucket_table + bucket * OFFSET.size)
+        for found, term_id in PAIR.iter_unpack(self.buffer[self.pairs_offset + start * PAIR.size:
+                                                           self.pairs_offset + end * PAIR.size]):
+            if found == fingerprint:
+                yield term_id
+
+    def lookup(self, text, limit=DEFAULT_LIMIT, max_distance=None):
+        """Corrections de text : [(lemme, distance, fréquence)], par distance puis fréquence décroissante"""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        query = search_key(text)
+        seen = set()
+        results = []
+        for variant in deletes(query[:self.prefix_length], max_distance):
+            for term_id in self._candidates(variant):
+                if term_id in seen:
+                    continue
+                seen.add(term_id)
+                key, lemma, frequency = self.term(term_id)
+                distance = edit_distance(query, key, max_distance)
+                if distance <= max_distance:
+                    results.append((distance, -frequency, key, lemma))
+        results.sort()
+        return [(lemma, distance, -frequency) for distance, frequency, _, lemma in results[:limit]]
+
+    def correct(self, text):
+        """Meilleure correction de text (lemme), ou None"""
+        results = self.lookup(text, limit=1)
+        return results[0][0] if results else None
+
+    def release(self):
+        """Libère le memoryview (nécessaire avant de fermer un mmap)"""
+        self.buffer.release()
+
+
+def benchmark(index, queries=2000, seed=0):
+    """Temps de correction (µs) de lemmes altérés (1 ou 2 fautes) : (moyenne, p50, p99, rappel)"""
+    import random
+    import time
+
+    rng = random.Random(seed)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    samples = []
+    for _ in range(queries):
+        key = index.term(rng.randrange(len(index)))[0]
+        typo = key
+        for _ in range(rng.randint(1, index.max_distance)):
+            position = rng.randrange(len(typo) + 1)
+            operation = rng.choice(('insert', 'delete', 'replace')) if typo else 'insert'
+            if operation == 'insert':
+                typo = typo[:position] + rng.choice(alphabet) + typo[position:]
+            elif operation == 'delete':
+                typo = typo[:position] + typo[position + 1:]
+            else:
+                typo = typo[:position] + rng.choice(alphabet) + typo[position + 1:]
+        samples.append((key, typo))
+    timings = []
+    found = 0
+    for key, typo in samples:
+        start = time.perf_counter()
+        results = index.lookup(typo, limit=DEFAULT_LIMIT)
+        timings.append((time.perf_counter() - start) * 1e6)
+        found += any(search_key(lemma) == key for lemma, _, _ in results)
+    timings.sort()
+    return sum(timings) / len(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.99)], found / queries
+
+
+def main():
+    import argparse
+    import gzip
+    import json
+    import os
+
+    parser = argparse.ArgumentParser(description='Index de correction orthographique des lemmes de concordance')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Construire depuis concordance.jsonl.gz')
+    build.add_argument('input')
+    build.add_argument('output')
+    lookup = subparsers.add_parser('lookup', help='Corriger un mot')
+    lookup.add_argument('index')
+    lookup.add_argument('text')
+    lookup.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+    bench = subparsers.add_parser('bench', help='Mesurer le temps de correction et le rappel')
+    bench.add_argument('index')
+    bench.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        with gzip.open(args.input, 'rt', encoding='utf-8') as f:
+            count, size = write_fuzzy_index((json.loads(line) for line in f if line.strip()), args.output)
+        print(f"✅ {count} lemmes -> {args.output} ({size / 1024:.1f} KB)")
+        return
+
+    index = FuzzyIndex.open(args.index)
+    if args.command == 'lookup':
+        results = index.lookup(args.text, args.limit)
+        print(f"🔍 {len(results)} corrections")
+        for lemma, distance, frequency in results:
+            print(f"   {lemma} (distance {distance}, {frequency} occurrences)")
+    else:
+        mean, median, p99, recall = benchmark(index, args.queries)
+        print(f"⏱️  {args.queries} corrections sur {len(index)} lemmes ({os.path.getsize(args.index) / 1024:.1f} KB)")
+        print(f"   moyenne {mean:.1f} µs, médiane {median:.1f} µs, p99 {p99:.1f} µs, rappel {recall:.1%}")
+
+
+if __name__ == "__main__":
+    main()
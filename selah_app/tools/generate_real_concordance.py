@@ -3,81 +3,205 @@
 Génère une concordance BSB plus complète à partir des données bibliques existantes
 """
 
+import argparse
 import json
-import gzip
+import os
 import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def extract_words_from_bible():
-    """Extrait les mots des bibles existantes"""
-    bible_files = [
-        'assets/bibles/lsg1910.json',
-        'assets/bibles/semeur.json', 
-        'assets/bibles/francais_courant.json'
-    ]
+from build_cache import BuildManifest, load_shard, save_shard, tool_version
+from concordance_builder import DEFAULT_MEMORY_BUDGET, ConcordanceBuilder
+from french_lemmas import FrenchLemmatizer
+from fuzzy_index import FUZZY_INDEX_FILE, FuzzyIndexWriter
+from jsonl_writer import JsonlWriter, write_jsonl
+from prefix_index import PREFIX_INDEX_FILE, PrefixIndexWriter
+from vocabulary_policy import VocabularyPolicy
+
+BIBLE_FILES = [
+    'assets/bibles/lsg1910.json',
+    'assets/bibles/semeur.json', 
+    'assets/bibles/francais_courant.json'
+]
+
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+def tokenize_verse(text):
+    """Mots d'un verset (minuscules, ponctuation retirée, mots de moins de 3 lettres ignorés)"""
+    clean_text = PUNCTUATION_RE.sub(' ', text.lower())
+    return [word for word in clean_text.split() if len(word) >= 3]
+
+def load_bible_books(bible_file):
+    """Livres d'une bible JSON ([{'name', 'chapters': [{'verses': [...]}]}]), liste vide en cas d'erreur"""
+    try:
+        with open(bible_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Erreur avec {bible_file}: {e}")
+        return []
+
+def add_book_words(builder, book):
+    """Ajoute au builder toutes les occurrences d'un livre"""
+    book_name = book.get('name', '')
+    chapters = book.get('chapters', [])
     
-    concordance_data = []
-    word_count = {}
+    for chapter_num, chapter in enumerate(chapters, 1):
+        verses = chapter.get('verses', [])
+        
+        for verse_num, verse in enumerate(verses, 1):
+            if not verse or not isinstance(verse, str):
+                continue
+            builder.add_words(book_name, chapter_num, verse_num, tokenize_verse(verse))
+
+def tokenize_book(book):
+    """Job parallèle : résultat partiel (comptes et listes de versets) d'un seul livre"""
+    builder = ConcordanceBuilder(memory_budget=None)
+    add_book_words(builder, book)
+    return builder.to_partial()
+
+def merge_partials(partials, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Fusionne des partiels (dans l'ordre) en un seul partiel"""
+    with ConcordanceBuilder(memory_budget) as builder:
+        for partial in partials:
+            builder.add_partial(partial)
+        return builder.to_partial()
+
+def extract_words_from_bible_file(bible_file, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Extrait les mots d'une bible : renvoie un résultat partiel {'books', 'postings'}
     
-    for bible_file in bible_files:
-        try:
-            with open(bible_file, 'r', encoding='utf-8') as f:
-                bible_data = json.load(f)
-            
+    Les occurrences sont stockées en arrays d'IDs de versets par mot (voir concordance_builder) ;
+    au-delà de memory_budget, elles débordent sur disque pendant l'extraction.
+    """
+    with ConcordanceBuilder(memory_budget) as builder:
+        books = load_bible_books(bible_file)
+        if books:
             print(f"📖 Traitement de {bible_file}...")
-            
-            for book in bible_data:
-                book_name = book.get('name', '')
-                chapters = book.get('chapters', [])
-                
-                for chapter_num, chapter in enumerate(chapters, 1):
-                    verses = chapter.get('verses', [])
-                    
-                    for verse_num, verse in enumerate(verses, 1):
-                        if not verse or not isinstance(verse, str):
-                            continue
-                            
-                        # Nettoyer le texte
-                        clean_text = re.sub(r'[^\w\s]', ' ', verse.lower())
-                        words = clean_text.split()
-                        
-                        for word in words:
-                            if len(word) < 3:  # Ignorer les mots trop courts
-                                continue
-                                
-                            # Compter les occurrences
-                            word_count[word] = word_count.get(word, 0) + 1
-                            
-                            # Ajouter à la concordance
-                            concordance_data.append([
-                                word,  # lemma
-                                word,  # surface (même chose pour simplifier)
-                                book_name,
-                                chapter_num,
-                                verse_num,
-                                "n"  # pos (part of speech) - par défaut nom
-                            ])
-                            
-        except Exception as e:
-            print(f"⚠️ Erreur avec {bible_file}: {e}")
-    
-    # Trier par fréquence et limiter
-    sorted_words = sorted(word_count.items(), key=lambda x: x[1], reverse=True)
-    print(f"📊 {len(sorted_words)} mots uniques trouvés")
-    
-    # Garder seulement les mots fréquents (au moins 2 occurrences)
-    frequent_words = {word: count for word, count in sorted_words if count >= 2}
-    print(f"📈 {len(frequent_words)} mots fréquents (≥2 occurrences)")
-    
-    # Filtrer la concordance pour ne garder que les mots fréquents
-    filtered_concordance = [
-        entry for entry in concordance_data 
-        if entry[0] in frequent_words
-    ]
+        for book in books:
+            add_book_words(builder, book)
+        del books
+        return builder.to_partial()
+
+def extract_words_parallel(bible_files, workers=None, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Extrait les mots de plusieurs bibles sur un pool de processus, un job par (version, livre)
+    
+    Les partiels de chaque livre sont fusionnés dans l'ordre des livres : le
+    résultat est identique à extract_words_from_bible_file appelé en série.
+    Renvoie la liste des partiels, dans l'ordre de bible_files.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for bible_file in bible_files:
+            # Une seule bible chargée à la fois dans le processus principal
+            books = load_bible_books(bible_file)
+            if books:
+                print(f"📖 Traitement de {bible_file} ({len(books)} livres)...")
+            futures.append([pool.submit(tokenize_book, book) for book in books])
+            del books
+        return [merge_partials((future.result() for future in book_futures), memory_budget)
+                for book_futures in futures]
+
+def save_partial(path, partial):
+    """Met en cache un résultat partiel (arrays convertis en listes JSON)"""
+    save_shard(path, {'books': partial['books'],
+                      'postings': {word: list(keys) for word, keys in partial['postings'].items()}})
+
+def load_partial(path):
+    """Recharge un résultat partiel mis en cache par save_partial"""
+    data = load_shard(path)
+    return {'books': data['books'],
+            'postings': {word: array('I', keys) for word, keys in data['postings'].items()}}
+
+def merge_bible_words(partials, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Fusionne les résultats par bible (dans l'ordre) dans un ConcordanceBuilder
+    
+    Au-delà de memory_budget, les occurrences débordent sur disque. Les entrées
+    filtrées s'obtiennent en streaming avec builder.entries(min_count) ; appeler
+    builder.close() ensuite pour supprimer les fichiers temporaires.
+    """
+    builder = ConcordanceBuilder(memory_budget)
+    for partial in partials:
+        builder.add_partial(partial)
+    if builder.runs:
+        print(f"💽 Budget mémoire dépassé: {len(builder.runs)} runs écrits sur disque")
+    return builder
+
+def select_vocabulary(builder, policy, lemmatizer=None):
+    """Applique une VocabularyPolicy au builder, affiche la taille estimée et renvoie les lemmes gardés"""
+    selection = policy.select_corpus(builder.lemma_stats(lemmatizer))
+    selection.report()
+    return selection.kept
+
+def write_concordance_entries(builder, output_path, min_count=2, lemmatizer=None, policy=None, prefix_output=None,
+                              fuzzy_output=None):
+    """Écrit les entrées des mots fréquents en JSONL.gz et affiche les statistiques
     
-    print(f"📝 {len(filtered_concordance)} entrées de concordance générées")
+    Les entrées sont [lemma, surface, book, chapter, verse, pos, key] (voir
+    ConcordanceBuilder.entries). Avec une VocabularyPolicy, le vocabulaire est
+    choisi (et sa taille estimée affichée) avant l'écriture. Avec
+    prefix_output, l'index de complétion des lemmes y est aussi écrit ; avec
+    fuzzy_output, leur index de correction orthographique.
+    Renvoie (nombre d'entrées, 5 premières entrées).
+    """
+    vocabulary = select_vocabulary(builder, policy, lemmatizer) if policy is not None else None
+    examples = []
+    prefix_writer = PrefixIndexWriter() if prefix_output else None
+    fuzzy_writer = FuzzyIndexWriter() if fuzzy_output else None
+    with JsonlWriter(output_path, index_key=0) as writer:
+        for entry in builder.entries(min_count, lemmatizer=lemmatizer, vocabulary=vocabulary):
+            writer.write(entry)
+            if prefix_writer:
+                prefix_writer.add_entry(entry)
+            if fuzzy_writer:
+                fuzzy_writer.add_entry(entry)
+            if len(examples) < 5:
+                examples.append(entry)
+    if prefix_writer:
+        size = prefix_writer.write(prefix_output)
+        print(f"💾 Index de complétion: {prefix_output} ({len(prefix_writer)} lemmes, {size / 1024:.1f} KB)")
+    if fuzzy_writer:
+        size = fuzzy_writer.write(fuzzy_output)
+        print(f"💾 Index de correction: {fuzzy_output} ({len(fuzzy_writer)} lemmes, {size / 1024:.1f} KB)")
     
-    return filtered_concordance
+    print(f"📊 {builder.unique_words} mots uniques trouvés")
+    print(f"📈 {builder.frequent_words} mots fréquents (≥{min_count} occurrences), {builder.lemma_count} lemmes")
+    print(f"📝 {builder.entry_count} entrées de concordance générées")
+    return builder.entry_count, examples
+
+def extract_words_from_bible(bible_files=BIBLE_FILES, manifest=None, workers=1,
+                             memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Extrait les mots des bibles existantes et renvoie le ConcordanceBuilder fusionné
+    
+    memory_budget borne la mémoire des occurrences à chaque étape (extraction
+    par bible et fusion finale). Avec workers != 1, la tokenisation est répartie par (version, livre) sur un
+    pool de processus (workers=None : un par cœur). Avec un manifeste de build,
+    le résultat de chaque bible est mis en cache et seule une bible modifiée
+    est retraitée.
+    """
+    tool = tool_version('generate_real_concordance', 'concordance_builder')
+    shards = {bible_file: manifest.shard_path(f"words_{bible_file}") for bible_file in bible_files} if manifest else {}
+    stale = [bible_file for bible_file in bible_files
+             if manifest is None or not manifest.is_up_to_date(f"bible:{bible_file}", [bible_file],
+                                                               [shards[bible_file]], tool)]
+    
+    if workers == 1:
+        fresh = {bible_file: None for bible_file in stale}
+    else:
+        fresh = dict(zip(stale, extract_words_parallel(stale, workers, memory_budget)))
+    
+    def partials():
+        for bible_file in bible_files:
+            if bible_file not in fresh:
+                print(f"⏭️  {bible_file}: à jour, cache réutilisé")
+                yield load_partial(shards[bible_file])
+                continue
+            partial = fresh.pop(bible_file) or extract_words_from_bible_file(bible_file, memory_budget)
+            if manifest is not None and os.path.exists(bible_file):
+                save_partial(shards[bible_file], partial)
+                manifest.record(f"bible:{bible_file}", [bible_file], [shards[bible_file]], tool)
+            yield partial
+    
+    return merge_bible_words(partials(), memory_budget)
 
 def generate_topics_links():
     """Génère des liens de thèmes basés sur les mots fréquents"""
@@ -112,41 +236,64 @@ def generate_topics_links():
     return topics_links
 
 def main():
+    parser = argparse.ArgumentParser(description="Génère la concordance à partir des bibles françaises")
+    parser.add_argument('--force', action='store_true', help='Tout reconstruire sans consulter le manifeste de build')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processus de tokenisation, par (version, livre) (0: un par cœur, 1: série)')
+    VocabularyPolicy.add_arguments(parser)
+    JsonlWriter.add_arguments(parser)
+    args = parser.parse_args()
+    policy = VocabularyPolicy.from_args(args)
+    JsonlWriter.configure(args)
+    
     print("🚀 Génération d'une concordance BSB plus complète...")
     
-    # Générer la concordance
-    concordance_data = extract_words_from_bible()
+    concordance_file = "assets/data/concordance.jsonl.gz"
+    topics_file = "assets/data/topics_links.jsonl.gz"
+    prefix_file = os.path.join("assets/data", PREFIX_INDEX_FILE)
+    fuzzy_file = os.path.join("assets/data", FUZZY_INDEX_FILE)
     
-    # Générer les liens de thèmes
-    topics_links = generate_topics_links()
+    # Sauter la génération si les bibles et l'outil n'ont pas changé
+    manifest = BuildManifest("assets/data", force=args.force)
+    bible_files = [f for f in BIBLE_FILES if os.path.exists(f)]
+    tool = tool_version('generate_real_concordance', 'concordance_builder', 'french_lemmas', 'vocabulary_policy',
+                        'jsonl_writer', 'prefix_index', 'fuzzy_index')
+    outputs = [concordance_file, topics_file, prefix_file, fuzzy_file]
+    params = dict(policy.params(), jsonl=JsonlWriter.params(args))
+    if manifest.is_up_to_date('generate_real_concordance', bible_files, outputs, tool, params):
+        print("✅ Concordance à jour, rien à reconstruire")
+        return
     
-    # Sauvegarder la concordance
-    concordance_file = "assets/data/concordance.jsonl.gz"
-    with gzip.open(concordance_file, 'wt', encoding='utf-8') as f:
-        for entry in concordance_data:
-            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    # Générer et sauvegarder la concordance en streaming
+    with extract_words_from_bible(bible_files, manifest, args.workers or None) as builder:
+        entry_count, examples = write_concordance_entries(builder, concordance_file, lemmatizer=FrenchLemmatizer(),
+                                                          policy=policy, prefix_output=prefix_file,
+                                                          fuzzy_output=fuzzy_file)
+    
+    print(f"✅ Concordance sauvegardée: {concordance_file} ({os.path.getsize(concordance_file) / 1024:.1f} KB)")
+    print(f"📊 {entry_count} entrées de concordance")
     
-    print(f"✅ Concordance sauvegardée: {concordance_file}")
-    print(f"📊 {len(concordance_data)} entrées de concordance")
+    # Générer les liens de thèmes
+    topics_links = generate_topics_links()
     
     # Sauvegarder les liens de thèmes
-    topics_file = "assets/data/topics_links.jsonl.gz"
-    with gzip.open(topics_file, 'wt', encoding='utf-8') as f:
-        for entry in topics_links:
-            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    write_jsonl(topics_file, topics_links, index_key=0)
     
     print(f"✅ Liens de thèmes sauvegardés: {topics_file}")
     print(f"📊 {len(topics_links)} liens de thèmes")
     
+    manifest.record('generate_real_concordance', bible_files, outputs, tool, params)
+    manifest.save()
+    
     # Afficher quelques statistiques
     print("\n📈 Statistiques:")
-    print(f"   - Concordance: {len(concordance_data)} entrées")
+    print(f"   - Concordance: {entry_count} entrées")
     print(f"   - Thèmes: {len(topics_links)} liens")
     
     # Afficher quelques exemples
     print("\n🔍 Exemples de concordance:")
-    for i, entry in enumerate(concordance_data[:5]):
-        print(f"   {i+1}. {entry[0]} -> {entry[2]} {entry[3]}:{entry[4]}")
+    for i, entry in enumerate(examples):
+        print(f"   {i+1}. {entry[0]} ({entry[1]}) -> {entry[2]} {entry[3]}:{entry[4]}")
     
     print("\n🎉 Génération terminée !")
 
@@ -3,8 +3,7 @@
 Génère une concordance BSB simple avec des mots bibliques courants
 """
 
-import json
-import gzip
+from jsonl_writer import write_jsonl
 
 def generate_concordance():
     """Génère une concordance avec des mots bibliques courants"""
@@ -276,18 +275,14 @@ def main():
     
     # Sauvegarder la concordance
     concordance_file = "assets/data/concordance.jsonl.gz"
-    with gzip.open(concordance_file, 'wt', encoding='utf-8') as f:
-        for entry in concordance_data:
-            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    write_jsonl(concordance_file, concordance_data, index_key=0)
     
     print(f"✅ Concordance sauvegardée: {concordance_file}")
     print(f"📊 {len(concordance_data)} entrées de concordance")
     
     # Sauvegarder les liens de thèmes
     topics_file = "assets/data/topics_links.jsonl.gz"
-    with gzip.open(topics_file, 'wt', encoding='utf-8') as f:
-        for entry in topics_links:
-            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    write_jsonl(topics_file, topics_links, index_key=0)
     
     print(f"✅ Liens de thèmes sauvegardés: {topics_file}")
     print(f"📊 {len(topics_links)} liens de thèmes")
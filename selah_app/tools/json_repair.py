@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Réparation en streaming des fichiers bibliques au format JavaScript/JSON
+non standard (clés non quotées, guillemets internes non échappés, sauts de
+ligne et caractères de contrôle dans les chaînes, virgules en trop...).
+
+Un seul passage, par morceaux, sur un automate à états : le texte est lu par
+blocs de CHUNK_SIZE caractères et le JSON valide est écrit au fil de l'eau.
+Les seules décisions qui demandent du contexte (un guillemet ferme-t-il la
+chaîne ou fait-il partie du texte ?) regardent au plus LOOKAHEAD caractères
+plus loin : le temps est linéaire et la mémoire bornée, quelle que soit la
+taille de la Bible.
+
+Les corrections sûres (clé quotée, \\n échappé...) sont comptées par type ;
+celles qui reposent sur une supposition sont relevées avec leur position
+exacte (offset en caractères et ligne) dans JsonRepairer.guesses, limité aux
+MAX_GUESSES premières (guess_count les compte toutes).
+
+Usage:
+    python tools/json_repair.py assets/bibles/semeur.json assets/bibles/semeur_fixed.json
+"""
+
+import os
+import re
+import sys
+from collections import Counter, namedtuple
+
+CHUNK_SIZE = 1 << 20
+LOOKAHEAD = 4096
+CONTEXT = 30
+MAX_GUESSES = 1000
+
+# Position d'une correction supposée : offset (caractères depuis le début), ligne (1-based)
+Repair = namedtuple('Repair', ['offset', 'line', 'kind', 'context'])
+
+# États de l'automate
+OUTSIDE, STRING = 0, 1
+# Attentes hors chaîne
+KEY, COLON, VALUE, AFTER, DONE = range(5)
+
+WHITESPACE_RE = re.compile(r'\s+')
+STRING_RUNS = {'"': re.compile(r'[^"\\\x00-\x1f]+'), "'": re.compile(r'[^\'"\\\x00-\x1f]+')}
+VALUE_TOKEN_RE = re.compile(r'[^\s{}\[\],:"\'\\]+')
+KEY_TOKEN_RE = re.compile(r'[^{}\[\],:"\'\\\r\n]+')
+IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_\-]*')
+LITERAL_RE = re.compile(r'(?:true|false|null)\b')
+NUMBER_RE = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?\Z')
+HEX_RE = re.compile(r'[0-9A-Fa-f]{4}')
+
+LITERALS = ('true', 'false', 'null')
+ESCAPES = {'"': '\\"', '\\': '\\\\', '/': '/', 'b': '\\b', 'f': '\\f', 'n': '\\n', 'r': '\\r', 't': '\\t'}
+CONTROL_ESCAPES = {'\n': '\\n', '\t': '\\t'}
+CLOSERS = {'{': '}', '[': ']'}
+
+
+class JsonRepairer:
+    """Automate de réparation : feed() des morceaux de texte, close() à la fin
+
+    feed() et close() renvoient le JSON réparé produit depuis l'appel précédent.
+    counts compte les corrections par type, guesses liste les max_guesses
+    premières suppositions (Repair) et guess_count les compte toutes.
+    """
+
+    def __init__(self, lookahead=LOOKAHEAD, max_guesses=MAX_GUESSES):
+        self.lookahead = lookahead
+        self.max_guesses = max_guesses
+        self.counts = Counter()
+        self.guesses = []
+        self.guess_count = 0
+        self._buffer = ''
+        self._base = 0
+        self._line = 1
+        self._line_cursor = 0
+        self._out = []
+        self._state = OUTSIDE
+        self._expect = VALUE
+        self._stack = []
+        self._pending_comma = False
+        self._quote = '"'
+        self._is_key = False
+        self._started = False
+        self._trailing = False
+        self._consumed_line = 1
+        self._resume = 0
+
+    # --- Rapport ---
+
+    def _fix(self, kind):
+        self.counts[kind] += 1
+
+    def _guess(self, pos, kind):
+        """Relève une supposition à la position pos du tampon"""
+        self.counts[kind] += 1
+        self.guess_count += 1
+        if len(self.guesses) >= self.max_guesses:
+            return
+        # Ligne : compter les sauts de ligne depuis la dernière position relevée (positions croissantes)
+        if pos < self._line_cursor:
+            self._line_cursor = 0
+            self._line = self._consumed_line
+        self._line += self._buffer.count('\n', self._line_cursor, pos)
+        self._line_cursor = pos
+        context = self._buffer[max(0, pos - CONTEXT):pos + CONTEXT].replace('\n', '⏎')
+        self.guesses.append(Repair(self._base + pos, self._line, kind, context))
+
+    # --- Entrée / sortie ---
+
+    def feed(self, text):
+        """Ajoute un morceau de texte ; renvoie le JSON réparé disponible"""
+        if not self._started:
+            self._started = True
+            if text.startswith('\ufeff'):
+                text = text[1:]
+                self._base = 1
+                self._fix('BOM retiré')
+        self._buffer += text
+        self._run(final=False)
+        return self._flush()
+
+    def close(self):
+        """Termine la réparation (chaîne et structures non fermées) ; renvoie la fin du JSON"""
+        self._run(final=True)
+        end = len(self._buffer)
+        if self._state == STRING:
+            self._guess(end, 'chaîne non terminée fermée')
+            self._out.append('"')
+            self._state = OUTSIDE
+            self._expect = COLON if self._is_key else AFTER
+        if self._expect == COLON:
+            self._guess(end, 'valeur manquante (null)')
+            self._out.append(':null')
+        elif self._expect == VALUE and self._stack and self._stack[-1] == '{':
+            self._guess(end, 'valeur manquante (null)')
+            self._out.append('null')
+        while self._stack:
+            self._guess(end, 'structure non fermée')
+            self._out.append(CLOSERS[self._stack.pop()])
+        return self._flush()
+
+    def _flush(self):
+        output = ''.join(self._out)
+        self._out = []
+        return output
+
+    def _consume(self, pos):
+        """Oublie la partie traitée du tampon"""
+        self._consumed_line = self._line + self._buffer.count('\n', self._line_cursor, pos)
+        self._line = self._consumed_line
+        self._line_cursor = 0
+        self._buffer = self._buffer[pos:]
+        self._base += pos
+
+    # --- Automate ---
+
+    def _run(self, final):
+        buffer = self._buffer
+        end = len(buffer)
+        self._consumed_line = self._line
+        if self._trailing:
+            self._consume(end)
+            return
+        limit = end if final else end - self.lookahead
+        pos = 0
+        while pos < limit:
+            if self._state == STRING:
+                pos = self._string_step(buffer, pos, end, final)
+            else:
+                pos = self._outside_step(buffer, pos, end, final)
+            if pos is None:
+                break
+        else:
+            self._consume(pos)
+            return
+        # Jeton coupé par la fin du tampon : attendre la suite
+        self._consume(self._resume)
+
+    def _outside_step(self, buffer, pos, end, final):
+        char = buffer[pos]
+        if char.isspace():
+            return WHITESPACE_RE.match(buffer, pos).end()
+        if self._expect == DONE:
+            # Le document est complet : le reste est ignoré
+            self._guess(pos, 'contenu après la fin du document ignoré')
+            self._trailing = True
+            return end
+        if char == '{' or char == '[':
+            self._begin_value(pos)
+            self._out.append(char)
+            self._stack.append(char)
+            self._expect = KEY if char == '{' else VALUE
+            return pos + 1
+        if char == '}' or char == ']':
+            return self._close_container(pos, char)
+        if char == ',':
+            if self._expect == AFTER and self._stack:
+                self._pending_comma = True
+                self._expect = KEY if self._stack[-1] == '{' else VALUE
+            else:
+                self._fix('virgule en trop supprimée')
+            return pos + 1
+        if char == ':':
+            if self._expect == COLON:
+                self._out.append(':')
+                self._expect = VALUE
+            else:
+                self._guess(pos, 'deux-points inattendu supprimé')
+            return pos + 1
+        if char == '"' or char == "'":
+            self._begin_value(pos)
+            if char == "'":
+                self._fix('chaîne entre apostrophes convertie')
+            self._out.append('"')
+            self._state = STRING
+            self._quote = char
+            self._is_key = self._expect == KEY
+            return pos + 1
+        if char == '\\':
+            # \n, \r, \t littéraux entre deux valeurs
+            if pos + 1 >= end and not final:
+                self._resume = pos
+                return None
+            if pos + 1 < end and buffer[pos + 1] in 'nrt':
+                self._fix('séquence \\n littérale hors chaîne supprimée')
+                return pos + 2
+            self._guess(pos, 'barre oblique inverse hors chaîne supprimée')
+            return pos + 1
+        if char < ' ' or char in '\ufeff\u200b':
+            self._fix('caractère de contrôle hors chaîne supprimé')
+            return pos + 1
+        return self._bare_token(buffer, pos, end, final)
+
+    def _bare_token(self, buffer, pos, end, final):
+        """Mot non quoté : clé (quotée), littéral ou nombre (gardés), sinon valeur quotée"""
+        if self._expect == AFTER:
+            self._begin_value(pos)
+        in_key = self._expect == KEY
+        match = (KEY_TOKEN_RE if in_key else VALUE_TOKEN_RE).match(buffer, pos)
+        if match is None:
+            self._guess(pos, 'caractère inattendu hors chaîne supprimé')
+            return pos + 1
+        if match.end() >= end and not final:
+            self._resume = pos
+            return None
+        token = match.group().strip() if in_key else match.group()
+        if in_key:
+            self._begin_value(pos)
+            self._out.append(_quote(token))
+            self._fix('clé non quotée')
+            self._expect = COLON
+            return match.end()
+
+        self._begin_value(pos)
+        if token in LITERALS or NUMBER_RE.match(token):
+            self._out.append(token)
+        else:
+            number = _parse_number(token)
+            if number is not None:
+                self._out.append(number)
+                self._fix('nombre normalisé')
+            else:
+                self._guess(pos, 'valeur non quotée mise entre guillemets')
+                self._out.append(_quote(token))
+        self._expect = AFTER if self._stack else DONE
+        return match.end()
+
+    def _begin_value(self, pos):
+        """Prépare le début d'une clé ou valeur : virgule différée, virgule ou deux-points manquants"""
+        if self._expect == AFTER:
+            self._guess(pos, 'virgule manquante ajoutée')
+            self._pending_comma = True
+            self._expect = KEY if self._stack[-1] == '{' else VALUE
+        elif self._expect == COLON:
+            self._guess(pos, 'deux-points manquant ajouté')
+            self._out.append(':')
+            self._expect = VALUE
+        if self._pending_comma:
+            self._out.append(',')
+            self._pending_comma = False
+
+    def _close_container(self, pos, char):
+        if not self._stack:
+            self._guess(pos, 'fermeture sans ouverture supprimée')
+            return pos + 1
+        if self._pending_comma:
+            self._pending_comma = False
+            self._fix('virgule finale supprimée')
+        if self._expect == COLON:
+            self._guess(pos, 'valeur manquante (null)')
+            self._out.append(':null')
+        opener = self._stack.pop()
+        if CLOSERS[opener] != char:
+            self._guess(pos, f"'{char}' remplacé par '{CLOSERS[opener]}'")
+        self._out.append(CLOSERS[opener])
+        self._expect = AFTER if self._stack else DONE
+        return pos + 1
+
+    def _string_step(self, buffer, pos, end, final):
+        match = STRING_RUNS[self._quote].match(buffer, pos)
+        if match:
+            self._out.append(match.group())
+            return match.end()
+
+        char = buffer[pos]
+        if char == self._quote:
+            closing = self._closes_string(buffer, pos, end, final)
+            if closing:
+                self._out.append('"')
+                self._state = OUTSIDE
+                self._expect = COLON if self._is_key else AFTER
+            else:
+                self._guess(pos, 'guillemet interne échappé')
+                self._out.append('\\"')
+            return pos + 1
+        if char == '"':  # dans une chaîne entre apostrophes
+            self._out.append('\\"')
+            return pos + 1
+        if char == "'":
+            self._out.append("'")
+            return pos + 1
+        if char == '\\':
+            return self._escape(buffer, pos, end, final)
+
+        # Caractère de contrôle brut
+        if char == '\r':
+            self._fix('saut de ligne dans une chaîne échappé')
+            self._out.append('\\n')
+            return pos + 2 if buffer.startswith('\n', pos + 1) else pos + 1
+        if char in CONTROL_ESCAPES:
+            self._fix('saut de ligne dans une chaîne échappé' if char == '\n' else 'tabulation échappée')
+            self._out.append(CONTROL_ESCAPES[char])
+        else:
+            self._fix('caractère de contrôle remplacé par une espace')
+            self._out.append(' ')
+        return pos + 1
+
+    def _escape(self, buffer, pos, end, final):
+        if pos + 1 >= end:
+            if not final:
+                self._resume = pos
+                return None
+            self._guess(pos, 'barre oblique inverse finale doublée')
+            self._out.append('\\\\')
+            return pos + 1
+        char = buffer[pos + 1]
+        if char in ESCAPES:
+            self._out.append(ESCAPES[char])
+            return pos + 2
+        if char == 'u':
+            if pos + 6 > end and not final:
+                self._resume = pos
+                return None
+            if HEX_RE.match(buffer, pos + 2):
+                self._out.append(buffer[pos:pos + 6])
+                return pos + 6
+            self._guess(pos, 'séquence \\u invalide conservée telle quelle')
+            self._out.append('\\\\u')
+            return pos + 2
+        if char == "'":
+            self._fix('apostrophe échappée simplifiée')
+            self._out.append("'")
+            return pos + 2
+        if char in '\r\n':
+            self._fix('continuation de ligne supprimée')
+            return pos + 2 + (char == '\r' and buffer.startswith('\n', pos + 2))
+        self._guess(pos, 'échappement invalide conservé littéralement')
+        self._out.append('\\\\')
+        return pos + 1
+
+    def _closes_string(self, buffer, pos, end, final):
+        """Décide si le guillemet en pos ferme la chaîne, d'après ce qui suit (au plus lookahead caractères)
+
+        Un guillemet ferme une valeur s'il est suivi d'une fin de structure, ou
+        d'une virgule suivie d'un élément plausible (clé suivie de deux-points
+        dans un objet), ou d'espaces puis d'une clé (virgule oubliée). Sinon
+        c'est un guillemet du texte.
+        """
+        index = _skip_whitespace(buffer, pos + 1, end)
+        if index >= end:
+            if not final:
+                self._guess(pos, 'guillemet fermant supposé (fenêtre épuisée)')
+            return True
+        following = buffer[index]
+        if self._is_key:
+            return following == ':' or not (following.isalnum() or following in '"\'')
+        if following in '}]':
+            return True
+        if following != ',':
+            # Virgule oubliée entre deux paires : "x"  b:"y"
+            return index > pos + 1 and self._stack[-1:] == ['{'] and self._key_follows(buffer, index, end)
+        index = _skip_whitespace(buffer, index + 1, end)
+        if index >= end:
+            if not final:
+                self._guess(pos, 'guillemet fermant supposé (fenêtre épuisée)')
+            return True
+        if buffer[index] in '}]':
+            return True
+        if not self._stack or self._stack[-1] == '[':
+            return buffer[index] in '{["\'-0123456789' or bool(LITERAL_RE.match(buffer, index))
+        return self._key_follows(buffer, index, end)
+
+    def _key_follows(self, buffer, index, end):
+        """Vrai si buffer[index:] commence par une clé (quotée ou non) suivie de deux-points"""
+        char = buffer[index]
+        if char == '"' or char == "'":
+            close = _string_end(buffer, index, end)
+            if close < 0:
+                return False
+            after = _skip_whitespace(buffer, close + 1, end)
+            return after < end and buffer[after] == ':'
+        match = IDENTIFIER_RE.match(buffer, index)
+        if not match:
+            return False
+        after = _skip_whitespace(buffer, match.end(), end)
+        return after < end and buffer[after] == ':'
+
+
+def _string_end(buffer, index, end):
+    """Position du guillemet fermant la chaîne ouverte en index (échappements sautés), -1 si absent de la ligne"""
+    quote = buffer[index]
+    index += 1
+    while index < end:
+        char = buffer[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == quote:
+            return index
+        if char == '\n':
+            return -1
+        index += 1
+    return -1
+
+
+def _skip_whitespace(buffer, index, end):
+    match = WHITESPACE_RE.match(buffer, index, end)
+    return match.end() if match else index
+
+
+def _quote(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _parse_number(token):
+    """Nombre JSON normalisé ('01' -> '1', '1.' -> '1.0'), None si ce n'est pas un nombre"""
+    try:
+        value = float(token)
+    except ValueError:
+        return None
+    if value != value or value in (float('inf'), float('-inf')):
+        return None
+    return str(int(value)) if value.is_integer() and not any(c in token for c in '.eE') else repr(value)
+
+
+def repair_stream(source, target, chunk_size=CHUNK_SIZE):
+    """Répare un flux texte source vers target ; renvoie le JsonRepairer (corrections et suppositions)"""
+    repairer = JsonRepairer()
+    for chunk in iter(lambda: source.read(chunk_size), ''):
+        target.write(repairer.feed(chunk))
+    target.write(repairer.close())
+    return repairer
+
+
+def repair_text(text):
+    """Répare une chaîne en mémoire ; renvoie (JSON réparé, JsonRepairer)"""
+    repairer = JsonRepairer()
+    return repairer.feed(text) + repairer.close(), repairer
+
+
+def repair_file(input_path, output_path, chunk_size=CHUNK_SIZE):
+    """Répare un fichier vers output_path (écriture atomique) ; renvoie le JsonRepairer"""
+    temp_path = output_path + '.tmp'
+    with open(input_path, 'r', encoding='utf-8', newline='') as source, \
+            open(temp_path, 'w', encoding='utf-8') as target:
+        repairer = repair_stream(source, target, chunk_size)
+    os.replace(temp_path, output_path)
+    return repairer
+
+
+def print_report(repairer, name, limit=20):
+    """Affiche les corrections par type et les premières suppositions avec leur position"""
+    if not repairer.counts:
+        print(f"✅ {name}: aucune correction nécessaire")
+        return
+    print(f"🔧 {name}: {sum(repairer.counts.values())} corrections")
+    for kind, count in repairer.counts.most_common():
+        print(f"   • {kind}: {count}")
+    if repairer.guess_count:
+        print(f"   ⚠️  {repairer.guess_count} suppositions à vérifier:")
+        for repair in repairer.guesses[:limit]:
+            print(f"      offset {repair.offset} (ligne {repair.line}): {repair.kind} | {repair.context}")
+        if repairer.guess_count > limit:
+            print(f"      ... et {repairer.guess_count - limit} autres")
+
+
+def main():
+    if len(sys.argv) != 3:
+        print('Usage: python tools/json_repair.py <entrée.json> <sortie.json>')
+        sys.exit(1)
+    repairer = repair_file(sys.argv[1], sys.argv[2])
+    print_report(repairer, sys.argv[1])
+    print(f"✅ JSON réparé: {sys.argv[2]}")
+
+
+if __name__ == '__main__':
+    main()
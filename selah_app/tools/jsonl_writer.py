@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Écriture JSONL compressée partagée par tous les convertisseurs.
+
+JsonlWriter accumule les lignes par lots : chaque lot est sérialisé en une
+fois par un encodeur json réutilisé, encodé en UTF-8 d'un bloc et passé au
+compresseur en une seule écriture, au lieu d'une concaténation, d'un
+encodage et d'une écriture texte par ligne. L'encodeur est toujours le
+même : orjson formate autrement certains flottants (1e16, NaN), et la
+sortie ne doit pas dépendre des modules installés. orjson, s'il est
+installé, ne sert qu'à la lecture.
+
+- Le format suit l'extension : .gz (gzip, lisible partout) ou .zst (zstd,
+  module zstandard), avec un dictionnaire entraîné optionnel (commande
+  train, paramètre dictionary ou commande convert --dictionary).
+- Le niveau de compression est configurable : paramètre level, sinon
+  --jsonl-level / SELAH_JSONL_LEVEL (hérité par les processus de
+  run_conversions), sinon DEFAULT_LEVEL.
+- La sortie gzip est déterministe (mtime=0) : le manifeste de build ne voit
+  pas de changement quand le contenu est identique.
+- Le fichier est écrit sous un nom temporaire et renommé seulement à la
+  fermeture réussie : une erreur (index trop grand, exception de
+  l'appelant) ne laisse pas de fichier tronqué à la place de l'ancien.
+- À la fermeture, le débit et le taux de compression sont affichés.
+
+Sortie indexée (seekable=True, --seekable ou SELAH_JSONL_SEEKABLE=1, avec une
+colonne index_key : 0 pour le lemme ou l'ID de thème) : chaque bloc d'environ
+BLOCK_ROWS lignes est un membre gzip indépendant, coupé sur un changement de
+clé. Le fichier reste un gzip multi-membres standard (gzip -d, gzip.open),
+suivi de deux membres vides dont le champ FEXTRA porte l'index :
+
+    ... blocs (membres gzip) ...
+    membre d'index    FEXTRA 'SI' : zlib(JSON {key, sorted, blocks})
+                      blocks : [première clé, dernière clé, offset, taille, lignes]
+    membre final      FEXTRA 'SO' : offset u64 du membre d'index (TRAILER_SIZE octets)
+
+SeekableJsonl lit le membre final puis l'index, et ne décompresse que les
+blocs dont l'intervalle de clés contient la clé cherchée (dichotomie si les
+clés sont triées).
+
+Usage:
+    python tools/jsonl_writer.py train assets/data/concordance.jsonl.gz --output assets/data/jsonl.dict
+    python tools/jsonl_writer.py convert assets/data/concordance.jsonl.gz assets/data/concordance.jsonl.zst \\
+        [--dictionary assets/data/jsonl.dict] [--level 19]
+    python tools/jsonl_writer.py convert assets/data/concordance.jsonl.gz /tmp/concordance.jsonl.gz --seekable
+    python tools/jsonl_writer.py lookup assets/data/concordance.jsonl.gz aimer
+"""
+
+import bisect
+import gzip
+import json
+import os
+import struct
+import time
+import zlib
+
+try:
+    import orjson
+except ImportError:  # lecture avec le module json standard
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # zstd optionnel, gzip reste le format par défaut
+    zstandard = None
+
+DEFAULT_LEVEL = 9
+DEFAULT_ZSTD_LEVEL = 19
+BATCH_ROWS = 2048
+DEFAULT_DICT_SIZE = 112 * 1024
+MAX_DICT_SAMPLES = 100_000
+
+BLOCK_ROWS = 1024
+MAX_BLOCK_ROWS = 4 * BLOCK_ROWS
+
+LEVEL_ENV = 'SELAH_JSONL_LEVEL'
+SEEKABLE_ENV = 'SELAH_JSONL_SEEKABLE'
+
+# Membres gzip vides portant l'index (FEXTRA, RFC 1952) ; bloc deflate vide b'\x03\x00'
+GZIP_EXTRA_HEADER = struct.Struct('<4sIBBH')
+SUBFIELD = struct.Struct('<2sH')
+EMPTY_MEMBER_END = b'\x03\x00' + bytes(8)
+INDEX_ID = b'SI'
+TRAILER_ID = b'SO'
+OFFSET = struct.Struct('<Q')
+TRAILER_SIZE = GZIP_EXTRA_HEADER.size + SUBFIELD.size + OFFSET.size + len(EMPTY_MEMBER_END)
+MAX_EXTRA_SIZE = 0xFFFF - SUBFIELD.size
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_batch(rows):
+    """Sérialise un lot de lignes en JSONL UTF-8 (une ligne par entrée, '\\n' final)"""
+    return ('\n'.join(map(_ENCODER.encode, rows)) + '\n').encode('utf-8')
+
+
+def is_zstd(path):
+    return str(path).endswith('.zst')
+
+
+def default_level(zstd=False):
+    """Niveau de compression : SELAH_JSONL_LEVEL s'il est défini, sinon le défaut du format"""
+    level = os.environ.get(LEVEL_ENV)
+    if level:
+        return int(level)
+    return DEFAULT_ZSTD_LEVEL if zstd else DEFAULT_LEVEL
+
+
+def load_dictionary(dictionary):
+    """Dictionnaire zstd : chemin, octets, ZstdCompressionDict ou None"""
+    if dictionary is None or isinstance(dictionary, zstandard.ZstdCompressionDict):
+        return dictionary
+    if not isinstance(dictionary, bytes):
+        with open(dictionary, 'rb') as f:
+            dictionary = f.read()
+    return zstandard.ZstdCompressionDict(dictionary)
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise ValueError("Format .zst demandé mais le module zstandard n'est pas installé")
+
+
+def default_seekable():
+    return os.environ.get(SEEKABLE_ENV, '') not in ('', '0')
+
+
+def empty_member(subfield_id, payload):
+    """Membre gzip vide dont le champ FEXTRA contient payload (ignoré par les lecteurs gzip)"""
+    extra = SUBFIELD.pack(subfield_id, len(payload)) + payload
+    return GZIP_EXTRA_HEADER.pack(b'\x1f\x8b\x08\x04', 0, 0, 255, len(extra)) + extra + EMPTY_MEMBER_END
+
+
+def read_member_extra(data, subfield_id):
+    """Contenu du sous-champ FEXTRA subfield_id d'un membre gzip vide"""
+    magic, _, _, _, xlen = GZIP_EXTRA_HEADER.unpack_from(data, 0)
+    if magic != b'\x1f\x8b\x08\x04':
+        raise ValueError("Membre gzip d'index invalide")
+    position = GZIP_EXTRA_HEADER.size
+    end = position + xlen
+    while position < end:
+        found, length = SUBFIELD.unpack_from(data, position)
+        position += SUBFIELD.size
+        if found == subfield_id:
+            return bytes(data[position:position + length])
+        position += length
+    raise ValueError(f"Sous-champ gzip {subfield_id!r} absent")
+
+
+def format_rate(size, seconds):
+    return f"{size / 1024 / 1024 / seconds:.1f} MB/s" if seconds > 0 else "-"
+
+
+class JsonlWriter:
+    """Écrit des lignes JSONL compressées par lots ; rows, raw_size et compressed_size après fermeture
+
+    Avec index_key (colonne ou champ des lignes) et seekable (None : selon
+    SELAH_JSONL_SEEKABLE), écrit un gzip par blocs indexés (voir SeekableJsonl).
+    """
+
+    def __init__(self, path, level=None, dictionary=None, batch_rows=BATCH_ROWS, quiet=False,
+                 index_key=None, seekable=None, block_rows=BLOCK_ROWS):
+        self.path = str(path)
+        self.zstd = is_zstd(self.path)
+        self.level = level if level is not None else default_level(self.zstd)
+        self.batch_rows = batch_rows
+        self.quiet = quiet
+        self.index_key = index_key
+        self.seekable = index_key is not None and (seekable if seekable is not None else default_seekable())
+        if self.seekable:
+            if self.zstd:
+                raise ValueError("La sortie indexée par blocs n'existe qu'en gzip (.gz)")
+            self.batch_rows = block_rows
+        self.rows = 0
+        self.raw_size = 0
+        self.compressed_size = 0
+        self.seconds = 0.0
+        self.blocks = []
+        self._sorted = True
+        self._batch = []
+        self._start = time.perf_counter()
+        self._temp_path = f'{self.path}.tmp'
+        self._file = open(self._temp_path, 'wb')
+        if self.seekable:
+            self._stream = None
+        elif self.zstd:
+            _require_zstd()
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=load_dictionary(dictionary))
+            self._stream = compressor.stream_writer(self._file, closefd=False)
+        else:
+            self._stream = gzip.GzipFile(filename='', mode='wb', compresslevel=self.level,
+                                         fileobj=self._file, mtime=0)
+
+    def write(self, row):
+        if self.seekable:
+            # Blocs coupés sur un changement de clé (ou à MAX_BLOCK_ROWS pour une clé très fréquente)
+            if len(self._batch) >= self.batch_rows and (
+                    row[self.index_key] != self._batch[-1][self.index_key]
+                    or len(self._batch) >= MAX_BLOCK_ROWS):
+                self.flush()
+            self._batch.append(row)
+            return
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_rows:
+            self.flush()
+
+    def write_rows(self, rows):
+        """Écrit toutes les lignes d'un itérable ; renvoie le nombre de lignes écrites par cet appel"""
+        before = self.rows + len(self._batch)
+        for row in rows:
+            self.write(row)
+        return self.rows + len(self._batch) - before
+
+    def flush(self):
+        if not self._batch:
+            return
+        data = encode_batch(self._batch)
+        if self.seekable:
+            self._write_block(data)
+        else:
+            self._stream.write(data)
+        self.rows += len(self._batch)
+        self.raw_size += len(data)
+        self._batch = []
+
+    def _write_block(self, data):
+        """Écrit le lot courant comme un membre gzip indépendant et l'ajoute à l'index"""
+        keys = [row[self.index_key] for row in self._batch]
+        ordered = all(previous <= key for previous, key in zip(keys, keys[1:]))
+        if self.blocks:
+            ordered = ordered and self.blocks[-1][1] <= keys[0]
+        self._sorted = self._sorted and ordered
+        member = gzip.compress(data, compresslevel=self.level, mtime=0)
+        self.blocks.append([min(keys), max(keys), self._file.tell(), len(member), len(keys)])
+        self._file.write(member)
+
+    def _write_index(self):
+        index = {'key': self.index_key, 'sorted': self._sorted, 'blocks': self.blocks}
+        payload = zlib.compress(json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 9)
+        if len(payload) > MAX_EXTRA_SIZE:
+            raise ValueError(f"Index de {len(self.blocks)} blocs trop grand pour un champ gzip ; "
+                             f"augmenter block_rows")
+        offset = self._file.tell()
+        self._file.write(empty_member(INDEX_ID, payload))
+        self._file.write(empty_member(TRAILER_ID, OFFSET.pack(offset)))
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self.flush()
+            if self.seekable:
+                self._write_index()
+            else:
+                self._stream.close()
+        except BaseException:
+            self.abort()
+            raise
+        self._file.close()
+        self._file = None
+        os.replace(self._temp_path, self.path)
+        self.compressed_size = os.path.getsize(self.path)
+        self.seconds = time.perf_counter() - self._start
+        if not self.quiet:
+            self.report()
+
+    def abort(self):
+        """Abandonne l'écriture : supprime le fichier temporaire, la sortie précédente reste intacte"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.remove(self._temp_path)
+
+    def report(self):
+        """Affiche lignes, tailles, taux de compression et débit (données brutes par seconde)"""
+        ratio = self.compressed_size / self.raw_size * 100 if self.raw_size else 0
+        codec = f"zstd {self.level}" if self.zstd else f"gzip {self.level}"
+        if self.seekable:
+            codec += f", {len(self.blocks)} blocs"
+        print(f"   💾 {os.path.basename(self.path)}: {self.rows} lignes, "
+              f"{self.raw_size / 1024:.1f} KB -> {self.compressed_size / 1024:.1f} KB ({ratio:.1f}%), "
+              f"{format_rate(self.raw_size, self.seconds)} [{codec}]")
+
+    @classmethod
+    def add_arguments(cls, parser):
+        """Options communes de ligne de commande (--jsonl-level, --seekable)"""
+        parser.add_argument('--jsonl-level', type=int, default=None,
+                            help=f'Niveau de compression des JSONL (défaut: {DEFAULT_LEVEL}, 1 pour des builds rapides)')
+        parser.add_argument('--seekable', action='store_true',
+                            help='Écrire concordances et liens de thèmes en gzip par blocs indexés')
+
+    @classmethod
+    def configure(cls, args):
+        """Applique les options via l'environnement, pour qu'elles valent aussi dans les processus de travail"""
+        if args.jsonl_level is not None:
+            os.environ[LEVEL_ENV] = str(args.jsonl_level)
+        if args.seekable:
+            os.environ[SEEKABLE_ENV] = '1'
+
+    @staticmethod
+    def params(args):
+        """Options d'écriture qui changent les fichiers produits (pour le manifeste de build)"""
+        return {'level': args.jsonl_level, 'seekable': args.seekable}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def write_jsonl(path, rows, **options):
+    """Écrit un itérable de lignes en JSONL compressé ; renvoie le nombre de lignes"""
+    with JsonlWriter(path, **options) as writer:
+        writer.write_rows(rows)
+    return writer.rows
+
+
+class SeekableJsonl:
+    """Lecteur d'un JSONL.gz par blocs indexés : ne décompresse que les blocs utiles"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._file.seek(-TRAILER_SIZE, os.SEEK_END)
+            index_offset, = OFFSET.unpack(read_member_extra(self._file.read(TRAILER_SIZE), TRAILER_ID))
+            self._file.seek(index_offset)
+            payload = read_member_extra(self._file.read(0xFFFF + GZIP_EXTRA_HEADER.size), INDEX_ID)
+        except (OSError, struct.error, ValueError):
+            self._file.close()
+            raise ValueError(f"{self.path} n'est pas un JSONL.gz indexé par blocs")
+        index = json.loads(zlib.decompress(payload))
+        self.key = index['key']
+        self.sorted = index['sorted']
+        self.blocks = index['blocks']
+        self._last_keys = [block[1] for block in self.blocks]
+        self._cached_block = (None, None)
+
+    @classmethod
+    def is_seekable(cls, path):
+        try:
+            cls(path).close()
+        except ValueError:
+            return False
+        return True
+
+    def __len__(self):
+        return sum(block[4] for block in self.blocks)
+
+    def candidate_blocks(self, key):
+        """Indices des blocs dont l'intervalle de clés contient key"""
+        if self.sorted:
+            index = bisect.bisect_left(self._last_keys, key)
+            candidates = []
+            while index < len(self.blocks) and self.blocks[index][0] <= key:
+                candidates.append(index)
+                index += 1
+            return candidates
+        return [index for index, (first, last, *_) in enumerate(self.blocks) if first <= key <= last]
+
+    def block(self, index):
+        """Lignes décodées d'un bloc (un seul membre gzip décompressé)"""
+        if self._cached_block[0] == index:
+            return self._cached_block[1]
+        _, _, offset, length, _ = self.blocks[index]
+        self._file.seek(offset)
+        data = zlib.decompress(self._file.read(length), wbits=31)
+        loads = orjson.loads if orjson is not None else json.loads
+        rows = [loads(line) for line in data.splitlines() if line.strip()]
+        self._cached_block = (index, rows)
+        return rows
+
+    def lookup(self, key):
+        """Lignes dont la colonne indexée vaut key"""
+        return [row for index in self.candidate_blocks(key) for row in self.block(index) if row[self.key] == key]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl_lines(path, dictionary=None):
+    """Lignes brutes (bytes) d'un fichier JSONL .gz ou .zst"""
+    if is_zstd(path):
+        _require_zstd()
+        decompressor = zstandard.ZstdDecompressor(dict_data=load_dictionary(dictionary))
+        with open(path, 'rb') as raw, decompressor.stream_reader(raw) as reader:
+            pending = b''
+            for chunk in iter(lambda: reader.read(1 << 20), b''):
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()
+                yield from (line for line in lines if line.strip())
+            if pending.strip():
+                yield pending
+    else:
+        with gzip.open(path, 'rb') as f:
+            yield from (line.rstrip(b'\n') for line in f if line.strip())
+
+
+def read_jsonl(path, dictionary=None):
+    """Itère sur les lignes décodées d'un fichier JSONL .gz ou .zst"""
+    loads = orjson.loads if orjson is not None else json.loads
+    for line in iter_jsonl_lines(path, dictionary):
+        yield loads(line)
+
+
+def train_dictionary(paths, output_path, size=DEFAULT_DICT_SIZE, max_samples=MAX_DICT_SAMPLES):
+    """Entraîne un dictionnaire zstd sur des lignes JSONL ; renvoie sa taille en octets"""
+    _require_zstd()
+    samples = []
+    for path in paths:
+        for line in iter_jsonl_lines(path):
+            samples.append(line)
+            if len(samples) >= max_samples:
+                break
+    dictionary = zstandard.train_dictionary(size, samples)
+    data = dictionary.as_bytes()
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Outils JSONL compressé (dictionnaire zstd, conversion)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    train = subparsers.add_parser('train', help='Entraîner un dictionnaire zstd sur des fichiers JSONL')
+    train.add_argument('inputs', nargs='+')
+    train.add_argument('--output', required=True, help='Fichier du dictionnaire')
+    train.add_argument('--size', type=int, default=DEFAULT_DICT_SIZE, help='Taille du dictionnaire en octets')
+    convert = subparsers.add_parser('convert', help='Recompresser un JSONL (.gz ou .zst) vers un autre')
+    convert.add_argument('input')
+    convert.add_argument('output')
+    convert.add_argument('--level', type=int, default=None)
+    convert.add_argument('--dictionary', default=None, help='Dictionnaire zstd (sortie .zst)')
+    convert.add_argument('--seekable', action='store_true', help='Sortie gzip par blocs indexés')
+    convert.add_argument('--key', default='0', help='Colonne (ou champ) indexée (défaut: 0)')
+    lookup = subparsers.add_parser('lookup', help="Lire les lignes d'une clé dans un JSONL.gz indexé")
+    lookup.add_argument('input')
+    lookup.add_argument('key', help='Lemme ou ID de thème')
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        size = train_dictionary(args.inputs, args.output, args.size)
+        print(f"✅ Dictionnaire zstd: {args.output} ({size / 1024:.1f} KB)")
+    elif args.command == 'lookup':
+        with SeekableJsonl(args.input) as reader:
+            key = int(args.key) if args.key.isdigit() and reader.blocks and isinstance(reader.blocks[0][0], int) \
+                else args.key
+            start = time.perf_counter()
+            candidates = reader.candidate_blocks(key)
+            rows = reader.lookup(key)
+            elapsed = (time.perf_counter() - start) * 1000
+        print(f"🔍 {len(rows)} lignes ({len(candidates)}/{len(reader.blocks)} blocs lus, {elapsed:.1f} ms)")
+        for row in rows[:50]:
+            print(f"   {row}")
+    else:
+        index_key = int(args.key) if args.key.isdigit() else args.key
+        rows = write_jsonl(args.output, read_jsonl(args.input), level=args.level, dictionary=args.dictionary,
+                           index_key=index_key, seekable=args.seekable)
+        print(f"✅ {rows} lignes: {args.input} ({os.path.getsize(args.input) / 1024:.1f} KB) -> "
+              f"{args.output} ({os.path.getsize(args.output) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
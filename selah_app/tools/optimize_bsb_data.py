@@ -4,249 +4,205 @@ Script d'optimisation des données BSB pour réduire la taille
 et ne garder que les données essentielles.
 """
 
+import heapq
 import json
 import os
-from collections import Counter
 
-def optimize_concordance(input_path, output_path, max_words=50000):
-    """Optimise la concordance en gardant seulement les mots les plus fréquents"""
+from dart_services import write_indexed_services
+from vocabulary_policy import ENGLISH_STOP_WORDS, FRENCH_STOP_WORDS, CorpusStats, LemmaStats, VocabularyPolicy
+
+try:
+    import ijson
+except ImportError:  # repli sur le décodeur incrémental de la bibliothèque standard
+    ijson = None
+
+CHUNK_SIZE = 1 << 16
+SAMPLE_SIZE = 64 * 1024
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def _iter_object_items_stdlib(f, chunk_size=CHUNK_SIZE):
+    """Itère sur les paires (clé, valeur) d'un objet JSON de premier niveau, lu par blocs
+
+    Seule la valeur en cours de décodage est gardée en mémoire.
+    """
+    buffer, position, eof = '', 0, False
+
+    def refill():
+        # Lecture au moins aussi grande que le reste du tampon : une valeur
+        # plus longue qu'un bloc est complétée en temps amorti linéaire
+        nonlocal buffer, position, eof
+        chunk = f.read(max(chunk_size, len(buffer) - position))
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+    def next_char():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if eof:
+                raise ValueError("JSON tronqué: fin de fichier inattendue")
+            refill()
+
+    def decode():
+        nonlocal position
+        next_char()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(buffer, position)
+                # Un nombre en fin de tampon peut être incomplet : relire avant d'accepter
+                if end < len(buffer) or eof:
+                    position = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            refill()
+
+    if next_char() != '{':
+        raise ValueError("Un objet JSON est attendu au premier niveau")
+    position += 1
+    if next_char() == '}':
+        return
+    while True:
+        key = decode()
+        if next_char() != ':':
+            raise ValueError(f"':' attendu après la clé {key!r}")
+        position += 1
+        yield key, decode()
+        char = next_char()
+        position += 1
+        if char == '}':
+            return
+        if char != ',':
+            raise ValueError(f"',' ou '}}' attendu après la clé {key!r}")
+
+
+def iter_json_items(path):
+    """Itère sur les entrées {clé: valeur} d'un fichier JSON sans le charger entièrement
+
+    Utilise ijson s'il est installé, sinon le décodeur incrémental interne.
+    """
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.kvitems(f, '', use_float=True)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _iter_object_items_stdlib(f)
+
+
+def top_k_keys(path, k):
+    """Clés des k entrées de plus grand 'count', en O(n log k) avec un tas borné
+
+    À fréquence égale, la première entrée du fichier l'emporte (comme un tri stable).
+    """
+    heap = []
+    total = 0
+    for index, (key, data) in enumerate(iter_json_items(path)):
+        item = (data['count'], -index, key)
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+        total += 1
+    return {key for _, _, key in heap}, total
+
+
+def write_selected_items(input_path, output_path, keys):
+    """Recopie en streaming les entrées dont la clé est sélectionnée ; renvoie leur nombre"""
+    written = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for key, data in iter_json_items(input_path):
+            if key in keys:
+                if written:
+                    f.write(',')
+                f.write(json.dumps(key, ensure_ascii=False))
+                f.write(':')
+                f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+                written += 1
+        f.write('}')
+    return written
+
+
+def optimize_top_k(input_path, output_path, k):
+    """Garde les k entrées les plus fréquentes en deux lectures streaming
+
+    La première lecture ne conserve que les k meilleures clés, la seconde
+    recopie leurs valeurs dans l'ordre du fichier d'entrée.
+    """
+    keys, total = top_k_keys(input_path, k)
+    return write_selected_items(input_path, output_path, keys), total
+
+
+def concordance_stats(path):
+    """CorpusStats d'une concordance {mot: {references, count}} lue en streaming (voir vocabulary_policy)"""
+    stats = {}
+    verses = set()
+    sample = []
+    sample_size = 0
+    for key, data in iter_json_items(path):
+        references = data.get('references', [])
+        line = f"{json.dumps(key, ensure_ascii=False)}:{json.dumps(data, ensure_ascii=False, separators=(',', ':'))},"
+        size = len(line.encode('utf-8'))
+        verses.update(json.dumps(reference, sort_keys=True) for reference in references)
+        stats[key] = LemmaStats(data['count'], len(references) or data['count'], size)
+        if sample_size < SAMPLE_SIZE:
+            sample.append(line)
+            sample_size += size
+    return CorpusStats(stats, len(verses), sample)
+
+
+def optimize_concordance(input_path, output_path, max_words=50000, policy=None):
+    """Optimise la concordance en gardant seulement les mots les plus fréquents
+
+    Avec une VocabularyPolicy, les mots sont choisis par la politique (mots
+    vides, fréquence documentaire, budget) au lieu des max_words plus fréquents.
+    """
     print(f"🔧 Optimisation de la concordance...")
     
-    with open(input_path, 'r', encoding='utf-8') as f:
-        concordance = json.load(f)
-    
-    print(f"   📊 Données originales: {len(concordance)} mots")
-    
-    # Trier par fréquence d'occurrence
-    word_frequencies = [(word, data['count']) for word, data in concordance.items()]
-    word_frequencies.sort(key=lambda x: x[1], reverse=True)
-    
-    # Garder seulement les mots les plus fréquents
-    top_words = word_frequencies[:max_words]
-    optimized_concordance = {}
-    
-    for word, count in top_words:
-        optimized_concordance[word] = concordance[word]
-    
-    # Sauvegarder
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(optimized_concordance, f, ensure_ascii=False, separators=(',', ':'))
+    if policy is None:
+        kept, total = optimize_top_k(input_path, output_path, max_words)
+    else:
+        corpus = concordance_stats(input_path)
+        selection = policy.select_corpus(corpus)
+        selection.report()
+        kept, total = write_selected_items(input_path, output_path, selection.kept), len(corpus.lemmas)
     
     original_size = os.path.getsize(input_path) / 1024 / 1024
     optimized_size = os.path.getsize(output_path) / 1024 / 1024
     
-    print(f"   ✅ Optimisé: {len(optimized_concordance)} mots")
+    print(f"   📊 Données originales: {total} mots")
+    print(f"   ✅ Optimisé: {kept} mots")
     print(f"   📉 Taille: {original_size:.2f} MB → {optimized_size:.2f} MB ({optimized_size/original_size*100:.1f}%)")
     
-    return optimized_concordance
+    return kept
 
 def optimize_topical_index(input_path, output_path, max_themes=20000):
     """Optimise l'index thématique en gardant seulement les thèmes les plus pertinents"""
     print(f"🔧 Optimisation de l'index thématique...")
     
-    with open(input_path, 'r', encoding='utf-8') as f:
-        topical = json.load(f)
-    
-    print(f"   📊 Données originales: {len(topical)} thèmes")
-    
-    # Trier par fréquence d'occurrence
-    theme_frequencies = [(theme, data['count']) for theme, data in topical.items()]
-    theme_frequencies.sort(key=lambda x: x[1], reverse=True)
-    
-    # Garder seulement les thèmes les plus fréquents
-    top_themes = theme_frequencies[:max_themes]
-    optimized_topical = {}
-    
-    for theme, count in top_themes:
-        optimized_topical[theme] = topical[theme]
-    
-    # Sauvegarder
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(optimized_topical, f, ensure_ascii=False, separators=(',', ':'))
+    kept, total = optimize_top_k(input_path, output_path, max_themes)
     
     original_size = os.path.getsize(input_path) / 1024 / 1024
     optimized_size = os.path.getsize(output_path) / 1024 / 1024
     
-    print(f"   ✅ Optimisé: {len(optimized_topical)} thèmes")
+    print(f"   📊 Données originales: {total} thèmes")
+    print(f"   ✅ Optimisé: {kept} thèmes")
     print(f"   📉 Taille: {original_size:.2f} MB → {optimized_size:.2f} MB ({optimized_size/original_size*100:.1f}%)")
     
-    return optimized_topical
+    return kept
 
-def create_lightweight_services():
-    """Crée des services Flutter légers avec chargement à la demande"""
-    
-    concordance_service = """
-import 'dart:convert';
-import 'package:flutter/services.dart';
-
-/// Service de concordance BSB optimisé et léger
-class BSBConcordanceService {
-  static Map<String, dynamic>? _concordanceData;
-  static bool _isLoading = false;
-  
-  /// Initialise le service (chargement à la demande)
-  static Future<void> init() async {
-    if (_concordanceData != null || _isLoading) return;
-    
-    _isLoading = true;
-    try {
-      final String jsonString = await rootBundle.loadString('assets/data/bsb_concordance_optimized.json');
-      _concordanceData = json.decode(jsonString);
-      print('✅ BSBConcordanceService initialisé avec ${_concordanceData?.length ?? 0} mots');
-    } catch (e) {
-      print('⚠️ Erreur chargement concordance BSB: $e');
-      _concordanceData = {};
-    } finally {
-      _isLoading = false;
-    }
-  }
-  
-  /// Recherche un mot dans la concordance
-  static Future<List<String>> searchWord(String word) async {
-    await init();
-    
-    if (_concordanceData == null) return [];
-    
-    final normalizedWord = word.toLowerCase().trim();
-    final data = _concordanceData![normalizedWord];
-    
-    if (data == null) return [];
-    
-    return List<String>.from(data['references'] ?? []);
-  }
-  
-  /// Obtient les statistiques d'un mot
-  static Future<Map<String, dynamic>?> getWordStats(String word) async {
-    await init();
-    
-    if (_concordanceData == null) return null;
-    
-    final normalizedWord = word.toLowerCase().trim();
-    return _concordanceData![normalizedWord];
-  }
-  
-  /// Recherche partielle (limité à 20 résultats)
-  static Future<List<String>> searchPartial(String partial) async {
-    await init();
-    
-    if (_concordanceData == null) return [];
-    
-    final normalizedPartial = partial.toLowerCase().trim();
-    final matches = <String>[];
-    
-    for (final word in _concordanceData!.keys) {
-      if (word.contains(normalizedPartial)) {
-        matches.add(word);
-        if (matches.length >= 20) break; // Limiter les résultats
-      }
-    }
-    
-    return matches;
-  }
-  
-  /// Vérifie si le service est initialisé
-  static bool get isInitialized => _concordanceData != null;
-  
-  /// Obtient le nombre de mots disponibles
-  static int get wordCount => _concordanceData?.length ?? 0;
-}
-"""
-    
-    topical_service = """
-import 'dart:convert';
-import 'package:flutter/services.dart';
-
-/// Service d'index thématique BSB optimisé et léger
-class BSBTopicalService {
-  static Map<String, dynamic>? _topicalData;
-  static bool _isLoading = false;
-  
-  /// Initialise le service (chargement à la demande)
-  static Future<void> init() async {
-    if (_topicalData != null || _isLoading) return;
-    
-    _isLoading = true;
-    try {
-      final String jsonString = await rootBundle.loadString('assets/data/bsb_topical_index_optimized.json');
-      _topicalData = json.decode(jsonString);
-      print('✅ BSBTopicalService initialisé avec ${_topicalData?.length ?? 0} thèmes');
-    } catch (e) {
-      print('⚠️ Erreur chargement index thématique BSB: $e');
-      _topicalData = {};
-    } finally {
-      _isLoading = false;
-    }
-  }
-  
-  /// Recherche un thème
-  static Future<List<String>> searchTheme(String theme) async {
-    await init();
-    
-    if (_topicalData == null) return [];
-    
-    final normalizedTheme = theme.toLowerCase().trim();
-    
-    // Recherche exacte d'abord
-    for (final key in _topicalData!.keys) {
-      if (key.toLowerCase() == normalizedTheme) {
-        return List<String>.from(_topicalData![key]['references'] ?? []);
-      }
-    }
-    
-    // Recherche partielle (limité à 30 résultats)
-    final matches = <String>[];
-    for (final key in _topicalData!.keys) {
-      if (key.toLowerCase().contains(normalizedTheme)) {
-        matches.addAll(_topicalData![key]['references'] ?? []);
-        if (matches.length >= 30) break; // Limiter les résultats
-      }
-    }
-    
-    return matches;
-  }
-  
-  /// Obtient tous les thèmes disponibles (limité)
-  static Future<List<String>> getAllThemes() async {
-    await init();
-    
-    if (_topicalData == null) return [];
-    
-    return _topicalData!.keys.take(1000).toList()..sort(); // Limiter à 1000 thèmes
-  }
-  
-  /// Recherche partielle de thèmes (limité à 20 résultats)
-  static Future<List<String>> searchPartialTheme(String partial) async {
-    await init();
-    
-    if (_topicalData == null) return [];
-    
-    final normalizedPartial = partial.toLowerCase().trim();
-    final matches = <String>[];
-    
-    for (final theme in _topicalData!.keys) {
-      if (theme.toLowerCase().contains(normalizedPartial)) {
-        matches.add(theme);
-        if (matches.length >= 20) break; // Limiter les résultats
-      }
-    }
-    
-    return matches;
-  }
-  
-  /// Vérifie si le service est initialisé
-  static bool get isInitialized => _topicalData != null;
-  
-  /// Obtient le nombre de thèmes disponibles
-  static int get themeCount => _topicalData?.length ?? 0;
-}
-"""
-    
-    # Sauvegarder les services optimisés
-    with open('lib/services/bsb_concordance_service.dart', 'w', encoding='utf-8') as f:
-        f.write(concordance_service)
-    
-    with open('lib/services/bsb_topical_service.dart', 'w', encoding='utf-8') as f:
-        f.write(topical_service)
+def create_lightweight_services(concordance_path, topical_path):
+    """Crée des services Flutter légers avec chargement à la demande et index de recherche précalculés"""
+    concordance_keys = [key for key, _ in iter_json_items(concordance_path)]
+    topical_keys = [key for key, _ in iter_json_items(topical_path)]
+    write_indexed_services(concordance_path, concordance_keys, topical_path, topical_keys,
+                           description='optimisé et léger', max_references=30, max_themes=1000)
     
     print("   ✅ Services Flutter optimisés créés")
 
@@ -262,11 +218,12 @@ def main():
     topical_output = "assets/data/bsb_topical_index_optimized.json"
     
     # Optimiser les données
-    optimize_concordance(concordance_input, concordance_output, max_words=50000)
+    policy = VocabularyPolicy(stop_words=FRENCH_STOP_WORDS | ENGLISH_STOP_WORDS, max_words=50000)
+    optimize_concordance(concordance_input, concordance_output, policy=policy)
     optimize_topical_index(topical_input, topical_output, max_themes=20000)
     
     # Créer les services optimisés
-    create_lightweight_services()
+    create_lightweight_services(concordance_output, topical_output)
     
     # Afficher les statistiques finales
     concordance_size = os.path.getsize(concordance_output) / 1024 / 1024
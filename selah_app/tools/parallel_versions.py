@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Stockage en colonnes des versions parallèles (bibles.xlsx), alignées sur un
+tableau commun d'IDs de versets BBCCCVVV.
+
+Chaque version est une colonne compressée indépendamment, découpée en blocs
+de block_size versets : lire « Jean 3:16 dans KJV et ASV » revient à une
+dichotomie sur les IDs puis à la décompression d'un bloc dans chacune des
+colonnes demandées. Une colonne delta décompresse aussi le bloc de sa
+colonne de base (déjà en cache si la base est lue dans la même requête) ;
+les autres versions ne sont pas touchées.
+
+Les versions presque identiques (KJV/AKJV/WBT, ASV/ERV...) peuvent être
+stockées en différences par mots (delta) par rapport à une version de base
+gardée en entier : chaque verset devient une suite d'opérations « copier n
+mots de la base à partir du mot i » / « insérer ce texte ». Le décodage d'un
+verset découpe le texte de base en mots puis applique ces opérations. Une
+version n'est gardée en delta que si sa colonne est plus petite ainsi.
+
+Disposition du fichier (little-endian) :
+
+    En-tête (HEADER, 32 octets)
+        magic            4s   b'SPAR'
+        version          u16
+        flags            u16
+        verse_count      u32
+        version_count    u16
+        block_size       u16  versets par bloc
+        ids_offset       u32  IDs de versets triés (u32 × verse_count)
+        directory_offset u32  une entrée COLUMN par version
+        names_offset     u32  noms des versions (UTF-8 séparés par '\\n')
+        names_size       u32
+    Répertoire (COLUMN, 16 octets par version) : offset u32, length u32,
+        raw_size u32 (taille UTF-8 des textes), codec u16 (0 : textes, 1 :
+        delta), base u16 (colonne de base d'une colonne delta, sinon 0xFFFF)
+    Colonnes : table des blocs (u32 × (block_count + 1), relatifs à la fin
+        de la table) puis blocs zlib ; un bloc décompressé contient les
+        longueurs (u32) de ses versets puis leurs contenus concaténés
+        (longueur 0 : verset absent de cette version)
+    Contenu delta : suite de varints ; (n << 1) suivi du décalage zigzag du
+        premier mot copié par rapport à la fin de la copie précédente, ou
+        (longueur << 1 | 1) suivi du texte UTF-8 inséré
+
+Usage:
+    python tools/parallel_versions.py build assets/data/bible_comparison.jsonl.gz assets/data/bible_versions.bin [--delta-base auto|none|KJV]
+    python tools/parallel_versions.py verse assets/data/bible_versions.bin "Jean 3:16" [--versions KJV ASV]
+    python tools/parallel_versions.py stats assets/data/bible_versions.bin
+"""
+
+import bisect
+import re
+import struct
+import zlib
+from array import array
+from difflib import SequenceMatcher
+
+from bible_refs import reference_to_verse_id, verse_id
+from concordance_binary import encode_varint
+from prefix_index import read_varint
+
+MAGIC = b'SPAR'
+VERSION = 2
+HEADER = struct.Struct('<4sHHIHHIIII')
+COLUMN = struct.Struct('<IIIHH')
+OFFSET = struct.Struct('<I')
+
+BLOCK_SIZE = 64
+
+CODEC_TEXT = 0
+CODEC_DELTA = 1
+NO_BASE = 0xFFFF
+
+# Base des colonnes delta : choisie sur un échantillon de versets, aucune, ou nom de version
+DELTA_AUTO = 'auto'
+DELTA_SAMPLE = 200
+
+# Un mot et les espaces qui le suivent (les espaces de tête forment leur propre mot)
+TOKEN_RE = re.compile(r'\S+\s*|\s+')
+
+PARALLEL_VERSIONS_FILE = 'bible_versions.bin'
+
+
+def comparison_verse_id(row):
+    """ID de verset d'une entrée de comparaison ({'id': ...} ou {'book', 'chapter', 'verse'})"""
+    if 'id' in row:
+        return row['id']
+    return verse_id(row['book'], row['chapter'], row['verse'])
+
+
+def tokenize(text):
+    """Mots de text avec leurs espaces (''.join(tokenize(text)) == text)"""
+    return TOKEN_RE.findall(text)
+
+
+def encode_delta(base_tokens, text):
+    """Différence par mots de text par rapport aux mots de la base"""
+    out = bytearray()
+    tokens = tokenize(text)
+    cursor = 0
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, base_tokens, tokens, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            shift = i1 - cursor
+            encode_varint((i2 - i1) << 1, out)
+            encode_varint(shift << 1 if shift >= 0 else (-shift << 1) - 1, out)
+            cursor = i2
+        elif j2 > j1:
+            literal = ''.join(tokens[j1:j2]).encode('utf-8')
+            encode_varint(len(literal) << 1 | 1, out)
+            out += literal
+    return bytes(out)
+
+
+def decode_delta(base_tokens, payload):
+    """Texte reconstruit à partir des mots de la base et d'un contenu delta"""
+    parts = []
+    cursor = 0
+    position = 0
+    while position < len(payload):
+        value, position = read_varint(payload, position)
+        if value & 1:
+            end = position + (value >> 1)
+            parts.append(str(payload[position:end], 'utf-8'))
+            position = end
+        else:
+            shift, position = read_varint(payload, position)
+            start = cursor + (shift >> 1 if not shift & 1 else -((shift + 1) >> 1))
+            cursor = start + (value >> 1)
+            parts.extend(base_tokens[start:cursor])
+    return ''.join(parts)
+
+
+class ParallelVersionsWriter:
+    """Accumule les textes par verset et par version puis écrit les colonnes
+
+    delta_base : None (toutes les colonnes en texte), DELTA_AUTO (base
+    choisie sur un échantillon de versets) ou nom de la version de base.
+    """
+
+    def __init__(self, versions=(), block_size=BLOCK_SIZE, delta_base=None):
+        self.versions = list(versions)
+        self.block_size = block_size
+        self.delta_base = delta_base
+        self.texts = {}
+        self.stats = {}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, vid, texts):
+        """Ajoute les textes {version: texte} d'un verset (les versions inconnues sont ajoutées à la fin)"""
+        verse_texts = self.texts.setdefault(vid, {})
+        for name, text in texts.items():
+            if not text:
+                continue
+            if name not in self.versions:
+                self.versions.append(name)
+            verse_texts.setdefault(name, text)
+
+    def add_comparison_row(self, row):
+        """Ajoute une entrée de bible_comparison.jsonl.gz ; renvoie False si son livre est inconnu"""
+        vid = comparison_verse_id(row)
+        if vid is None:
+            return False
+        self.add(vid, row['versions'])
+        return True
+
+    def _payload(self, vid, name, base=None):
+        """Contenu d'un verset dans une colonne (texte UTF-8, ou delta par rapport à base)"""
+        text = self.texts[vid].get(name, '')
+        if not text or base is None:
+            return text.encode('utf-8')
+        return encode_delta(tokenize(self.texts[vid].get(base, '')), text)
+
+    def _column(self, verses, name, base=None):
+        """Colonne d'une version (blocs zlib précédés de leur table)"""
+        blocks = bytearray()
+        offsets = [0]
+        for start in range(0, len(verses), self.block_size):
+            payloads = [self._payload(vid, name, base) for vid in verses[start:start + self.block_size]]
+            lengths = [len(payload) for payload in payloads]
+            blocks += zlib.compress(struct.pack(f'<{len(lengths)}I', *lengths) + b''.join(payloads), 9)
+            offsets.append(len(blocks))
+        return b''.join(OFFSET.pack(offset) for offset in offsets) + bytes(blocks)
+
+    def choose_base(self, verses, sample=DELTA_SAMPLE):
+        """Version dont les autres diffèrent le moins (taille des deltas sur un échantillon de versets)"""
+        sampled = verses[::max(1, len(verses) // sample)]
+        costs = {}
+        for base in self.versions:
+            costs[base] = sum(len(self._payload(vid, name, base))
+                              for vid in sampled for name in self.versions if name != base)
+        return min(self.versions, key=lambda name: (costs[name], self.versions.index(name)))
+
+    def to_bytes(self):
+        verses = sorted(self.texts)
+        ids = struct.pack(f'<{len(verses)}I', *verses)
+        names = '\n'.join(self.versions).encode('utf-8')
+        base = self.delta_base
+        if base == DELTA_AUTO:
+            base = self.choose_base(verses) if len(self.versions) > 1 else None
+        if base is not None and base not in self.versions:
+            raise ValueError(f"Version de base inconnue: {base} (disponibles: {', '.join(self.versions)})")
+
+        ids_offset = HEADER.size
+        directory_offset = ids_offset + len(ids)
+        names_offset = directory_offset + len(self.versions) * COLUMN.size
+        position = names_offset + len(names)
+        directory = bytearray()
+        columns = []
+        self.stats = {}
+        for name in self.versions:
+            raw_size = sum(len(texts.get(name, '').encode('utf-8')) for texts in self.texts.values())
+            column = self._column(verses, name)
+            codec, column_base, text_size = CODEC_TEXT, NO_BASE, len(column)
+            if base is not None and name != base:
+                delta = self._column(verses, name, base)
+                if len(delta) < len(column):
+                    column, codec, column_base = delta, CODEC_DELTA, self.versions.index(base)
+            self.stats[name] = (raw_size, text_size, len(column), codec)
+            directory += COLUMN.pack(position, len(column), raw_size, codec, column_base)
+            columns.append(column)
+            position += len(column)
+        header = HEADER.pack(MAGIC, VERSION, 0, len(verses), len(self.versions), self.block_size,
+                             ids_offset, directory_offset, names_offset, len(names))
+        return header + ids + bytes(directory) + names + b''.join(columns)
+
+    def write(self, path):
+        """Écrit le fichier et renvoie sa taille en octets"""
+        data = self.to_bytes()
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+    def report(self):
+        """Affiche, par version, la taille de sa colonne compressée en texte puis en delta (après write)"""
+        text_total = sum(text_size for _, text_size, _, _ in self.stats.values())
+        stored_total = sum(size for _, _, size, _ in self.stats.values())
+        for name, (raw_size, text_size, size, codec) in self.stats.items():
+            if codec == CODEC_DELTA:
+                print(f"   {name}: {text_size / 1024:.1f} KB -> {size / 1024:.1f} KB en delta "
+                      f"(-{1 - size / text_size:.0%})")
+            else:
+                print(f"   {name}: {text_size / 1024:.1f} KB en texte ({raw_size / 1024:.1f} KB non compressés)")
+        if text_total:
+            print(f"   📉 Colonnes: {text_total / 1024:.1f} KB -> {stored_total / 1024:.1f} KB "
+                  f"(-{1 - stored_total / text_total:.0%})")
+
+
+def write_parallel_versions(rows, path, versions=(), delta_base=None):
+    """Écrit les colonnes d'entrées de comparaison ; renvoie (versets, octets)"""
+    writer = ParallelVersionsWriter(versions, delta_base=delta_base)
+    skipped = sum(not writer.add_comparison_row(row) for row in rows)
+    if skipped:
+        print(f"⚠️ {skipped} versets ignorés (livre non reconnu)")
+    size = writer.write(path)
+    writer.report()
+    return len(writer), size
+
+
+class ParallelVersions:
+    """Lecteur des versions parallèles (bytes ou mmap)"""
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        (magic, version, _, self.verse_count, version_count, self.block_size, ids_offset,
+         directory_offset, names_offset, names_size) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Fichier de versions parallèles invalide (magic {magic!r})")
+        if version != VERSION:
+            raise ValueError(f"Version de fichier de versions parallèles non supportée: {version}")
+        self.ids = array('I', struct.unpack_from(f'<{self.verse_count}I', self.buffer, ids_offset))
+        names = str(self.buffer[names_offset:names_offset + names_size], 'utf-8')
+        self.versions = names.split('\n') if names else []
+        self.columns = [COLUMN.unpack_from(self.buffer, directory_offset + i * COLUMN.size)
+                        for i in range(version_count)]
+        self._column_ids = {name: i for i, name in enumerate(self.versions)}
+        self._cached_blocks = {}
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return self.verse_count
+
+    def _column_id(self, name):
+        if name not in self._column_ids:
+            raise KeyError(f"Version inconnue: {name} (disponibles: {', '.join(self.versions)})")
+        return self._column_ids[name]
+
+    def _block(self, column, block):
+        """Textes UTF-8 (bytes) du bloc block de la colonne column"""
+        cached = self._cached_blocks.get(column)
+        if cached and cached[0] == block:
+            return cached[1]
+        offset = self.columns[column][0]
+        block_count = (self.verse_count + self.block_size - 1) // self.block_size
+        data_offset = offset + (block_count + 1) * OFFSET.size
+        start, end = struct.unpack_from('<II', self.buffer, offset + block * OFFSET.size)
+        raw = zlib.decompress(self.buffer[data_offset + start:data_offset + end])
+        count = min(self.block_size, self.verse_count - block * self.block_size)
+        lengths = struct.unpack_from(f'<{count}I', raw)
+        texts = []
+        position = count * 4
+        for length in lengths:
+            texts.append(raw[position:position + length])
+            position += length
+        self._cached_blocks[column] = (block, texts)
+        return texts
+
+    def position(self, verse):
+        """Rang d'un verset (ID entier ou référence 'Jean 3:16') dans le tableau des IDs, ou -1"""
+        vid = verse if isinstance(verse, int) else reference_to_verse_id(verse)
+        if vid is None:
+            return -1
+        index = bisect.bisect_left(self.ids, vid)
+        return index if index < self.verse_count and self.ids[index] == vid else -1
+
+    def _text(self, column, index):
+        """Texte du verset de rang index dans une colonne ('' si absent)
+
+        Une colonne delta lit aussi le verset dans sa colonne de base.
+        """
+        block, offset = divmod(index, self.block_size)
+        payload = self._block(column, block)[offset]
+        if not payload:
+            return ''
+        _, _, _, codec, base = self.columns[column]
+        if codec == CODEC_TEXT:
+            return payload.decode('utf-8')
+        # Delta : décompresse aussi le bloc de la colonne de base
+        return decode_delta(tokenize(self._text(base, index)), payload)
+
+    def text(self, verse, version):
+        """Texte d'un verset dans une version ('' si absent)"""
+        index = self.position(verse)
+        return self._text(self._column_id(version), index) if index >= 0 else ''
+
+    def verse(self, verse, versions=None):
+        """Textes {version: texte} d'un verset, limités aux versions demandées (et aux bases de leurs deltas)"""
+        index = self.position(verse)
+        if index < 0:
+            return {}
+        texts = {}
+        for name in self.versions if versions is None else versions:
+            text = self._text(self._column_id(name), index)
+            if text:
+                texts[name] = text
+        return texts
+
+    def iter_version(self, version):
+        """(ID de verset, texte) de tous les versets présents dans une version"""
+        column = self._column_id(version)
+        for index, vid in enumerate(self.ids):
+            text = self._text(column, index)
+            if text:
+                yield vid, text
+
+    def column_sizes(self):
+        """[(version, taille UTF-8 des textes, taille compressée, version de base ou None)] par colonne"""
+        return [(name, raw_size, length, self.versions[base] if codec == CODEC_DELTA else None)
+                for name, (_, length, raw_size, codec, base) in zip(self.versions, self.columns)]
+
+    def release(self):
+        """Libère le memoryview (nécessaire avant de fermer un mmap)"""
+        self.buffer.release()
+
+
+def main():
+    import argparse
+    import gzip
+    import json
+
+    from bible_refs import verse_id_to_reference
+
+    parser = argparse.ArgumentParser(description='Versions parallèles en colonnes')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Construire depuis bible_comparison.jsonl.gz')
+    build.add_argument('input')
+    build.add_argument('output')
+    build.add_argument('--delta-base', default=DELTA_AUTO,
+                       help="Version de base des colonnes delta ('auto', 'none' ou nom de version)")
+    verse = subparsers.add_parser('verse', help="Lire un verset dans quelques versions")
+    verse.add_argument('path')
+    verse.add_argument('reference', help="Référence ('Jean 3:16') ou ID de verset")
+    verse.add_argument('--versions', nargs='+', help='Versions à lire (défaut: toutes)')
+    stats = subparsers.add_parser('stats', help='Tailles par version')
+    stats.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        with gzip.open(args.input, 'rt', encoding='utf-8') as f:
+            count, size = write_parallel_versions((json.loads(line) for line in f if line.strip()), args.output,
+                                                  delta_base=None if args.delta_base == 'none' else args.delta_base)
+        print(f"✅ {count} versets -> {args.output} ({size / 1024:.1f} KB)")
+        return
+
+    reader = ParallelVersions.open(args.path)
+    if args.command == 'verse':
+        reference = int(args.reference) if args.reference.isdigit() else args.reference
+        texts = reader.verse(reference, args.versions)
+        print(f"📖 {verse_id_to_reference(reader.ids[reader.position(reference)]) if texts else args.reference}")
+        for name, text in texts.items():
+            print(f"   {name}: {text}")
+    else:
+        print(f"📊 {len(reader)} versets, {len(reader.versions)} versions (blocs de {reader.block_size} versets)")
+        for name, raw_size, size, base in reader.column_sizes():
+            codec = f", delta de {base}" if base else ""
+            print(f"   {name}: {raw_size / 1024:.1f} KB -> {size / 1024:.1f} KB ({size / max(raw_size, 1):.0%}{codec})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Index de complétion (type-ahead) des lemmes de concordance : liste triée
+codée en front-coding, fréquences et meilleures complétions précalculées.
+
+Les lemmes sont triés par clé de recherche (french_lemmas.search_key, octets
+UTF-8) : tous ceux qui commencent par un préfixe forment une plage contiguë.
+Chaque préfixe dont la plage compte plus de scan_limit lemmes (les nœuds
+hauts du trie) reçoit la liste de ses top_n lemmes les plus fréquents ; pour
+les autres, la plage est assez courte pour être triée à la volée.
+
+Disposition du fichier (little-endian) :
+
+    En-tête (HEADER, 36 octets)
+        magic        4s   b'SPFX'
+        version      u16
+        flags        u16
+        term_count   u32
+        bucket_size  u16  lemmes par seau de front-coding
+        top_n        u16  complétions précalculées par préfixe
+        scan_limit   u32  taille maximale d'une plage sans liste précalculée
+        bucket_table u32  début de la table des seaux (u32 : offset de chaque seau)
+        prefix_count u32
+        prefix_table u32  début de la table des préfixes (PREFIX, triée par octets)
+        total_size   u32
+    Seaux : pour chaque lemme, varints (préfixe commun avec la clé précédente,
+        longueur du suffixe) + suffixe, varint fréquence, varint longueur du
+        lemme affiché + octets (0 : identique à la clé). Le premier lemme d'un
+        seau est complet, ce qui permet la dichotomie sur les têtes de seau.
+    Table des préfixes (PREFIX, 12 octets) : key_offset u32, key_len u16,
+        count u16, completions_offset u32 ; complétions par fréquence
+        décroissante : varint fréquence, varint longueur + lemme UTF-8
+
+Une complétion cherche le préfixe dans la table (dichotomie) et lit ses
+top_n complétions telles quelles, sinon trouve la plage dans les seaux et la
+trie : dans les deux cas, le coût ne dépend que de top_n, scan_limit et
+bucket_size, pas de la taille du vocabulaire. Un préfixe à liste
+précalculée renvoie donc au plus top_n complétions, quel que soit limit.
+
+Usage:
+    python tools/prefix_index.py build assets/data/concordance.jsonl.gz assets/data/concordance_prefix.idx
+    python tools/prefix_index.py complete assets/data/concordance_prefix.idx eter
+    python tools/prefix_index.py bench assets/data/concordance_prefix.idx [--queries 10000]
+"""
+
+import heapq
+import struct
+from collections import Counter
+
+from concordance_binary import encode_varint
+from french_lemmas import search_key
+
+MAGIC = b'SPFX'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIHHIIIII')
+PREFIX = struct.Struct('<IHHI')
+OFFSET = struct.Struct('<I')
+
+BUCKET_SIZE = 16
+TOP_N = 10
+SCAN_LIMIT = 64
+BUCKET_CACHE_SIZE = 256
+
+PREFIX_INDEX_FILE = 'concordance_prefix.idx'
+
+
+def read_varint(buffer, position):
+    """Décode un entier LEB128 à position ; renvoie (valeur, position suivante)"""
+    value = shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+class PrefixIndexWriter:
+    """Accumule les fréquences des lemmes puis écrit l'index de complétion"""
+
+    def __init__(self, top_n=TOP_N, scan_limit=SCAN_LIMIT, bucket_size=BUCKET_SIZE):
+        self.top_n = top_n
+        self.scan_limit = max(scan_limit, top_n)
+        self.bucket_size = bucket_size
+        self.frequencies = Counter()
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def add(self, lemma, count=1):
+        self.frequencies[lemma] += count
+
+    def add_entry(self, entry):
+        """Ajoute une occurrence d'entrée de concordance (lemme en première colonne)"""
+        self.frequencies[entry[0]] += 1
+
+    def add_entries(self, entries):
+        for entry in entries:
+            self.frequencies[entry[0]] += 1
+
+    def _terms(self):
+        """(clé UTF-8, lemme, fréquence) triés par clé puis lemme"""
+        terms = [(search_key(lemma).encode('utf-8'), lemma, count) for lemma, count in self.frequencies.items()]
+        terms.sort(key=lambda term: (term[0], term[1]))
+        return terms
+
+    def _prefix_lists(self, terms):
+        """{préfixe (octets): ids des top_n lemmes} pour les plages de plus de scan_limit lemmes"""
+        ranges = {}
+        for index, (key, _, _) in enumerate(terms):
+            text = key.decode('utf-8')
+            for length in range(len(text) + 1):
+                prefix = text[:length]
+                if prefix in ranges:
+                    ranges[prefix][1] = index + 1
+                else:
+                    ranges[prefix] = [index, index + 1]
+        lists = {}
+        for prefix, (start, end) in ranges.items():
+            if end - start > self.scan_limit:
+                lists[prefix.encode('utf-8')] = heapq.nlargest(self.top_n, range(start, end),
+                                                               key=lambda index: (terms[index][2], -index))
+        return lists
+
+    def to_bytes(self):
+        terms = self._terms()
+        buckets = bytearray()
+        bucket_offsets = []
+        previous = b''
+        for index, (key, lemma, count) in enumerate(terms):
+            if index % self.bucket_size == 0:
+                bucket_offsets.append(len(buckets))
+                previous = b''
+            shared = 0
+            limit = min(len(previous), len(key))
+            while shared < limit and previous[shared] == key[shared]:
+                shared += 1
+            encode_varint(shared, buckets)
+            encode_varint(len(key) - shared, buckets)
+            buckets += key[shared:]
+            encode_varint(count, buckets)
+            display = lemma.encode('utf-8')
+            display = b'' if display == key else display
+            encode_varint(len(display), buckets)
+            buckets += display
+            previous = key
+
+        lists = self._prefix_lists(terms)
+        buckets_offset = HEADER.size
+        bucket_table_offset = buckets_offset + len(buckets)
+        prefix_table_offset = bucket_table_offset + len(bucket_offsets) * OFFSET.size
+        blob_offset = prefix_table_offset + len(lists) * PREFIX.size
+        prefix_table = bytearray()
+        blob = bytearray()
+        for prefix in sorted(lists):
+            key_offset = blob_offset + len(blob)
+            blob += prefix
+            completions_offset = blob_offset + len(blob)
+            for term_id in lists[prefix]:
+                _, lemma, count = terms[term_id]
+                encode_varint(count, blob)
+                encoded = lemma.encode('utf-8')
+                encode_varint(len(encoded), blob)
+                blob += encoded
+            prefix_table += PREFIX.pack(key_offset, len(prefix), len(lists[prefix]), completions_offset)
+
+        bucket_table = b''.join(OFFSET.pack(buckets_offset + offset) for offset in bucket_offsets)
+        total_size = blob_offset + len(blob)
+        header = HEADER.pack(MAGIC, VERSION, 0, len(terms), self.bucket_size, self.top_n, self.scan_limit,
+                             bucket_table_offset, len(lists), prefix_table_offset, total_size)
+        return header + bytes(buckets) + bucket_table + bytes(prefix_table) + bytes(blob)
+
+    def write(self, path):
+        """Écrit l'index et renvoie sa taille en octets"""
+        data = self.to_bytes()
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+
+def write_prefix_index(entries, path):
+    """Écrit l'index de complétion d'entrées de concordance ; renvoie (lemmes, octets)"""
+    writer = PrefixIndexWriter()
+    writer.add_entries(entries)
+    return len(writer), writer.write(path)
+
+
+class PrefixIndex:
+    """Lecteur de l'index de complétion (bytes ou mmap)"""
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        (magic, version, _, self.term_count, self.bucket_size, self.top_n, self.scan_limit,
+         self.bucket_table, self.prefix_count, self.prefix_table, _) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Index de complétion invalide (magic {magic!r})")
+        if version != VERSION:
+            raise ValueError(f"Version d'index de complétion non supportée: {version}")
+        self.bucket_count = (self.term_count + self.bucket_size - 1) // self.bucket_size
+        self._buckets = {}
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return self.term_count
+
+    def _bucket(self, index):
+        """Lemmes décodés d'un seau : [(clé UTF-8, lemme, fréquence)], avec un petit cache"""
+        bucket = self._buckets.get(index)
+        if bucket is not None:
+            return bucket
+        buffer = self.buffer
+        position, = OFFSET.unpack_from(buffer, self.bucket_table + index * OFFSET.size)
+        count = min(self.bucket_size, self.term_count - index * self.bucket_size)
+        bucket = []
+        key = b''
+        for _ in range(count):
+            shared, position = read_varint(buffer, position)
+            length, position = read_varint(buffer, position)
+            key = key[:shared] + bytes(buffer[position:position + length])
+            position += length
+            frequency, position = read_varint(buffer, position)
+            length, position = read_varint(buffer, position)
+            lemma = bytes(buffer[position:position + length]) if length else key
+            position += length
+            bucket.append((key, lemma.decode('utf-8'), frequency))
+        if len(self._buckets) >= BUCKET_CACHE_SIZE:
+            self._buckets.clear()
+        self._buckets[index] = bucket
+        return bucket
+
+    def term(self, term_id):
+        """(clé UTF-8, lemme, fréquence) du lemme term_id"""
+        return self._bucket(term_id // self.bucket_size)[term_id % self.bucket_size]
+
+    def _head(self, index):
+        """Clé du premier lemme d'un seau, lue sans décoder le seau"""
+        position, = OFFSET.unpack_from(self.buffer, self.bucket_table + index * OFFSET.size)
+        _, position = read_varint(self.buffer, position)
+        length, position = read_varint(self.buffer, position)
+        return bytes(self.buffer[position:position + length])
+
+    def _lower_bound(self, key):
+        """Indice du premier lemme dont la clé est >= key"""
+        low, high = 0, self.bucket_count
+        while low < high:
+            mid = (low + high) // 2
+            if self._head(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        bucket = max(low - 1, 0)
+        for offset, (term_key, _, _) in enumerate(self._bucket(bucket) if self.bucket_count else []):
+            if term_key >= key:
+                return bucket * self.bucket_size + offset
+        return min((bucket + 1) * self.bucket_size, self.term_count)
+
+    def _completions(self, position, count):
+        completions = []
+        for _ in range(count):
+            frequency, position = read_varint(self.buffer, position)
+            length, position = read_varint(self.buffer, position)
+            completions.append((str(self.buffer[position:position + length], 'utf-8'), frequency))
+            position += length
+        return completions
+
+    def _prefix_entry(self, key):
+        """Complétions précalculées du préfixe [(lemme, fréquence)], ou None"""
+        low, high = 0, self.prefix_count
+        while low < high:
+            mid = (low + high) // 2
+            key_offset, key_len, count, completions_offset = PREFIX.unpack_from(
+                self.buffer, self.prefix_table + mid * PREFIX.size)
+            prefix = bytes(self.buffer[key_offset:key_offset + key_len])
+            if prefix == key:
+                return self._completions(completions_offset, count)
+            if prefix < key:
+                low = mid + 1
+            else:
+                high = mid
+        return None
+
+    def _scan(self, key, limit=None):
+        """Ids des lemmes commençant par key, dans l'ordre trié (au plus limit)"""
+        term_id = self._lower_bound(key)
+        ids = []
+        while term_id < self.term_count and (limit is None or len(ids) < limit):
+            if not self.term(term_id)[0].startswith(key):
+                break
+            ids.append(term_id)
+            term_id += 1
+        return ids
+
+    def complete(self, prefix, limit=TOP_N):
+        """Lemmes commençant par prefix (clé de recherche), par fréquence décroissante : [(lemme, fréquence)]
+
+        Au plus top_n résultats pour un préfixe à liste précalculée (plage de
+        plus de scan_limit lemmes) : limit n'y déclenche jamais de parcours.
+        """
+        key = search_key(prefix).encode('utf-8')
+        completions = self._prefix_entry(key)
+        if completions is not None:
+            return completions[:limit]
+        # Plage courte (<= scan_limit lemmes) : tri à la volée
+        ids = heapq.nlargest(limit, self._scan(key, self.scan_limit),
+                             key=lambda term_id: (self.term(term_id)[2], -term_id))
+        return [self.term(term_id)[1:] for term_id in ids]
+
+    def release(self):
+        """Libère le memoryview (nécessaire avant de fermer un mmap)"""
+        self._buckets.clear()
+        self.buffer.release()
+
+
+def benchmark(index, queries=10000, seed=0, limit=TOP_N):
+    """Temps de complétion (µs) sur des préfixes tirés du vocabulaire : (moyenne, p50, p99, max)"""
+    import random
+    import time
+
+    rng = random.Random(seed)
+    prefixes = []
+    for _ in range(queries):
+        key = index.term(rng.randrange(len(index)))[0].decode('utf-8')
+        prefixes.append(key[:rng.randint(1, max(len(key), 1))])
+    timings = []
+    for prefix in prefixes:
+        index._buckets.clear()  # mesure à froid : aucun seau en cache
+        start = time.perf_counter()
+        index.complete(prefix, limit)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return (sum(timings) / len(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.99)],
+            timings[-1])
+
+
+def main():
+    import argparse
+    import gzip
+    import json
+    import os
+
+    parser = argparse.ArgumentParser(description='Index de complétion des lemmes de concordance')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Construire depuis concordance.jsonl.gz')
+    build.add_argument('input')
+    build.add_argument('output')
+    complete = subparsers.add_parser('complete', help='Compléter un préfixe')
+    complete.add_argument('index')
+    complete.add_argument('prefix')
+    complete.add_argument('--limit', type=int, default=TOP_N)
+    bench = subparsers.add_parser('bench', help='Mesurer le temps de complétion')
+    bench.add_argument('index')
+    bench.add_argument('--queries', type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        with gzip.open(args.input, 'rt', encoding='utf-8') as f:
+            count, size = write_prefix_index((json.loads(line) for line in f if line.strip()), args.output)
+        print(f"✅ {count} lemmes -> {args.output} ({size / 1024:.1f} KB)")
+        return
+
+    index = PrefixIndex.open(args.index)
+    if args.command == 'complete':
+        for lemma, frequency in index.complete(args.prefix, args.limit):
+            print(f"   {lemma} ({frequency})")
+    else:
+        print(f"⏱️  {args.queries} complétions sur {len(index)} lemmes ({os.path.getsize(args.index) / 1024:.1f} KB)")
+        # limit > top_n : les préfixes à liste précalculée ne doivent pas déclencher de parcours
+        for limit in (index.top_n, index.top_n * 5):
+            mean, median, p99, worst = benchmark(index, args.queries, limit=limit)
+            print(f"   limit {limit}: moyenne {mean:.1f} µs, médiane {median:.1f} µs, "
+                  f"p99 {p99:.1f} µs, max {worst:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,24 @@ Script pour traiter le fichier bibles.xlsx et créer un système de comparaison
 
 import pandas as pd
 import json
-import gzip
 import os
-import re
 from pathlib import Path
 
-def process_bible_comparison_excel(excel_path, output_path):
-    """Traite le fichier bibles.xlsx pour créer un système de comparaison"""
+from bible_refs import verse_id
+from bsb_columnar import clean_text_column, split_references
+from jsonl_writer import write_jsonl
+from parallel_versions import DELTA_AUTO, PARALLEL_VERSIONS_FILE, ParallelVersionsWriter
+
+def process_bible_comparison_excel(excel_path, output_path, verse_ids=False, columnar_output=None,
+                                   delta_base=DELTA_AUTO):
+    """Traite le fichier bibles.xlsx pour créer un système de comparaison
+    
+    Avec verse_ids=True, chaque entrée est {'id': verse_id, 'versions': {...}}.
+    Si columnar_output est fourni, les textes y sont aussi écrits en colonnes
+    par version alignées sur les IDs de versets (parallel_versions) ; les
+    versions proches de delta_base (DELTA_AUTO : choisie sur un échantillon,
+    None : aucune) y sont stockées en différences par mots.
+    """
     print(f"🚀 Traitement du système de comparaison de versions bibliques")
     print("=" * 60)
     
@@ -32,46 +43,59 @@ def process_bible_comparison_excel(excel_path, output_path):
             non_null_count = df[col].count()
             print(f"  {i:2d}. {col}: {non_null_count:,} versets")
         
-        # Créer le système de comparaison
-        comparison_data = []
+        # Créer le système de comparaison en colonnes
+        references = clean_text_column(df['Reference'])
+        refs = split_references(references)
         
-        for index, row in df.iterrows():
-            reference = str(row['Reference']).strip()
-            if not reference or reference == 'nan':
-                continue
-            
-            # Parser la référence
-            book, chapter, verse = parse_reference(reference)
-            if not book:
+        # Références non reconnues : conservées telles quelles (chapitre/verset à 0)
+        refs['book'] = refs['book'].where(refs['book'].ne(''), references)
+        
+        # Textes nettoyés par version ('' si absent) et nombre de versions par verset
+        texts = {}
+        version_counts = pd.Series(0, index=df.index)
+        for col in version_columns:
+            texts[col] = clean_text_column(df[col])
+            version_counts += texts[col].ne('')
+        
+        valid = references.ne('') & version_counts.gt(1)  # Au moins 2 versions
+        
+        comparison_data = []
+        columnar_writer = ParallelVersionsWriter(version_columns, delta_base=delta_base) if columnar_output else None
+        columns = [references[valid].tolist(), refs.loc[valid, 'book'].tolist(),
+                   refs.loc[valid, 'chapter'].tolist(), refs.loc[valid, 'verse'].tolist()]
+        version_texts = [texts[col][valid].tolist() for col in version_columns]
+        for (reference, book, chapter, verse), row_texts in zip(zip(*columns), zip(*version_texts)):
+            versions = {col: text for col, text in zip(version_columns, row_texts) if text}
+            if verse_ids or columnar_writer:
+                vid = verse_id(book, chapter, verse)
+                if columnar_writer and vid is not None:
+                    columnar_writer.add(vid, versions)
+            if verse_ids:
+                if vid is not None:
+                    comparison_data.append({'id': vid, 'versions': versions})
                 continue
-            
-            # Collecter toutes les versions pour ce verset
-            versions = {}
-            for col in version_columns:
-                text = row[col]
-                if pd.notna(text) and str(text).strip():
-                    versions[col] = str(text).strip()
-            
-            if len(versions) > 1:  # Au moins 2 versions
-                entry = {
-                    'reference': reference,
-                    'book': book,
-                    'chapter': chapter,
-                    'verse': verse,
-                    'versions': versions
-                }
-                comparison_data.append(entry)
+            comparison_data.append({
+                'reference': reference,
+                'book': book,
+                'chapter': chapter,
+                'verse': verse,
+                'versions': versions
+            })
         
         print(f"✅ {len(comparison_data)} versets avec comparaison générés")
         
         # Sauvegarder en JSONL.gz
-        with gzip.open(output_path, 'wt', encoding='utf-8') as f:
-            for entry in comparison_data:
-                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        write_jsonl(output_path, comparison_data)
         
         print(f"💾 Données de comparaison sauvegardées: {output_path}")
         print(f"📊 Taille du fichier: {os.path.getsize(output_path) / 1024:.1f} KB")
         
+        if columnar_writer:
+            size = columnar_writer.write(columnar_output)
+            print(f"💾 Versions en colonnes sauvegardées: {columnar_output} "
+                  f"({len(columnar_writer)} versets, {size / 1024:.1f} KB)")
+            columnar_writer.report()
+        
         return len(comparison_data)
         
     except Exception as e:
@@ -80,21 +104,6 @@ def process_bible_comparison_excel(excel_path, output_path):
         traceback.print_exc()
         return 0
 
-def parse_reference(reference_text):
-    """Parse une référence biblique comme 'Genesis 1:1'"""
-    if not reference_text or pd.isna(reference_text):
-        return "", 0, 0
-    
-    # Pattern pour capturer livre, chapitre, verset
-    match = re.match(r'^([A-Za-z0-9\s]+?)\s+(\d+):(\d+)', str(reference_text))
-    if match:
-        book = match.group(1).strip()
-        chapter = int(match.group(2))
-        verse = int(match.group(3))
-        return book, chapter, verse
-    
-    return str(reference_text), 0, 0
-
 def create_version_metadata(output_path):
     """Crée les métadonnées des versions disponibles"""
     print(f"🚀 Création des métadonnées des versions")
@@ -200,6 +209,7 @@ def main():
     # Chemins
     excel_path = "/Users/gafardgnane/Downloads/Bibles versions/bibles.xlsx"
     comparison_output = "assets/data/bible_comparison.jsonl.gz"
+    columnar_output = os.path.join("assets/data", PARALLEL_VERSIONS_FILE)
     metadata_output = "assets/data/bible_versions_metadata.json"
     
     # Vérifier que le fichier Excel existe
@@ -211,7 +221,8 @@ def main():
     os.makedirs(os.path.dirname(comparison_output), exist_ok=True)
     
     # Traiter le fichier Excel
-    comparison_count = process_bible_comparison_excel(excel_path, comparison_output)
+    comparison_count = process_bible_comparison_excel(excel_path, comparison_output,
+                                                      columnar_output=columnar_output)
     
     # Créer les métadonnées
     metadata_count = create_version_metadata(metadata_output)
@@ -224,6 +235,7 @@ def main():
     print(f"✅ Versions disponibles: {metadata_count}")
     print(f"📁 Fichiers générés:")
     print(f"   - {comparison_output}")
+    print(f"   - {columnar_output}")
     print(f"   - {metadata_output}")
     print("\n🎉 SYSTÈME DE COMPARAISON DE VERSIONS CRÉÉ !")
 
@@ -5,11 +5,29 @@ Script final pour traiter les vrais fichiers Excel BSB avec la structure correct
 
 import pandas as pd
 import json
-import gzip
 import os
 import re
 from pathlib import Path
 
+from bible_refs import parse_reference, with_verse_ids
+from bsb_excel_stream import (
+    iter_concordance_entries,
+    iter_concordance_rows,
+    iter_topical_entries,
+    iter_topical_rows,
+)
+from build_cache import BuildManifest, tool_version
+from concordance_binary import ConcordanceBinaryWriter
+from french_lemmas import with_search_keys
+from jsonl_writer import JsonlWriter
+from fuzzy_index import FUZZY_INDEX_FILE, FuzzyIndexWriter
+from prefix_index import PREFIX_INDEX_FILE, PrefixIndexWriter
+from verse_index import VerseIndexWriter
+
+# Modules dont le code détermine les sorties (version d'outil du manifeste de build)
+BSB_MODULES = ('process_bsb_final', 'bsb_excel_stream', 'bible_refs', 'verse_index', 'french_lemmas', 'jsonl_writer',
+               'prefix_index', 'fuzzy_index')
+
 def extract_word_from_entry(entry_text):
     """Extrait le mot principal d'une entrée comme '10 (2 Occurrences)'"""
     if not entry_text or pd.isna(entry_text):
@@ -21,80 +39,69 @@ def extract_word_from_entry(entry_text):
         return match.group(1).strip()
     return str(entry_text).strip()
 
-def parse_reference(verse_text):
-    """Parse une référence biblique comme 'Gen 32:15'"""
-    if not verse_text or pd.isna(verse_text):
-        return "", 0, 0
+def process_bsb_concordance_excel(excel_path, output_path, verse_ids=False, binary_output=None, reverse_output=None,
+                                  prefix_output=None, fuzzy_output=None):
+    """Traite le fichier Excel de concordance BSB réel
     
-    # Pattern pour capturer livre, chapitre, verset
-    match = re.match(r'^([A-Za-z0-9\s]+?)\s+(\d+):(\d+)', str(verse_text))
-    if match:
-        book = match.group(1).strip()
-        chapter = int(match.group(2))
-        verse = int(match.group(3))
-        return book, chapter, verse
-    
-    return str(verse_text), 0, 0
-
-def process_bsb_concordance_excel(excel_path, output_path):
-    """Traite le fichier Excel de concordance BSB réel"""
+    Les entrées sont [lemma, surface, book, chapter, verse, pos, key] (key : clé
+    de recherche sans accents), [lemma, surface, verse_id, pos, key] avec verse_ids=True.
+    Si binary_output est fourni, la concordance est aussi écrite au format
+    binaire à listes de versets (concordance_binary). Si reverse_output est
+    fourni, l'index inversé verset -> lemmes y est écrit (verse_index). Si
+    prefix_output est fourni, l'index de complétion des lemmes y est écrit
+    (prefix_index), et l'index de correction orthographique dans fuzzy_output
+    (fuzzy_index).
+    """
     print(f"🚀 Traitement de la concordance BSB depuis {excel_path}")
     
     try:
-        # Lire le fichier Excel
-        df = pd.read_excel(excel_path)
+        # Lire le classeur en streaming (curseur openpyxl en lecture seule)
+        rows = iter_concordance_rows(excel_path)
+        entries = with_search_keys(iter_concordance_entries(rows, extract_word_from_entry, parse_reference))
+        if verse_ids:
+            entries = with_verse_ids(entries, 2)
         
-        print(f"✅ {len(df)} entrées de concordance chargées")
+        # Écrire les entrées au fil de l'eau en JSONL.gz
+        count = 0
+        binary_writer = ConcordanceBinaryWriter() if binary_output else None
+        reverse_writer = VerseIndexWriter(lemma_values=True) if reverse_output else None
+        prefix_writer = PrefixIndexWriter() if prefix_output else None
+        fuzzy_writer = FuzzyIndexWriter() if fuzzy_output else None
+        with JsonlWriter(output_path, index_key=0) as writer:
+            for entry in entries:
+                writer.write(entry)
+                count += 1
+                if binary_writer:
+                    binary_writer.add_entry(entry)
+                if reverse_writer:
+                    reverse_writer.add_concordance_entry(entry)
+                if prefix_writer:
+                    prefix_writer.add_entry(entry)
+                if fuzzy_writer:
+                    fuzzy_writer.add_entry(entry)
         
-        # Renommer les colonnes
-        df.columns = ['Sort', 'Book', 'Chap', 'Word', 'Occ', 'Total', 'Entry', 'Verse', 'Context']
+        print(f"✅ {count} entrées valides générées")
         
-        # Convertir en format JSONL.gz pour le streaming
-        concordance_entries = []
-        current_word = ""
+        print(f"💾 Concordance sauvegardée: {output_path}")
+        print(f"📊 Taille du fichier: {os.path.getsize(output_path) / 1024:.1f} KB")
         
-        for index, row in df.iterrows():
-            # Ignorer la ligne d'en-tête
-            if index == 0:
-                continue
-            
-            # Si c'est une ligne de résumé (Occ = 0), extraire le mot
-            if pd.notna(row['Occ']) and row['Occ'] == 0 and pd.notna(row['Entry']):
-                current_word = extract_word_from_entry(row['Entry'])
-                continue
-            
-            # Si c'est une ligne de données valide
-            if (pd.notna(row['Book']) and pd.notna(row['Verse']) and 
-                pd.notna(row['Occ']) and row['Occ'] > 0 and current_word):
-                
-                # Parser la référence biblique
-                book, chapter, verse = parse_reference(row['Verse'])
-                if not book or chapter == 0 or verse == 0:
-                    continue
-                
-                # Créer l'entrée de concordance
-                entry = [
-                    current_word,  # lemma
-                    current_word,  # surface (même chose pour simplifier)
-                    book,  # book
-                    chapter,  # chapter
-                    verse,  # verse
-                    "n"  # pos (part of speech) - par défaut nom
-                ]
-                
-                concordance_entries.append(entry)
+        if binary_writer:
+            size = binary_writer.write(binary_output)
+            print(f"💾 Concordance binaire sauvegardée: {binary_output} ({size / 1024:.1f} KB)")
         
-        print(f"✅ {len(concordance_entries)} entrées valides générées")
+        if reverse_writer:
+            size = reverse_writer.write(reverse_output)
+            print(f"💾 Index verset -> lemmes sauvegardé: {reverse_output} ({len(reverse_writer)} versets, {size / 1024:.1f} KB)")
         
-        # Sauvegarder en JSONL.gz
-        with gzip.open(output_path, 'wt', encoding='utf-8') as f:
-            for entry in concordance_entries:
-                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        if prefix_writer:
+            size = prefix_writer.write(prefix_output)
+            print(f"💾 Index de complétion sauvegardé: {prefix_output} ({len(prefix_writer)} lemmes, {size / 1024:.1f} KB)")
         
-        print(f"💾 Concordance sauvegardée: {output_path}")
-        print(f"📊 Taille du fichier: {os.path.getsize(output_path) / 1024:.1f} KB")
+        if fuzzy_writer:
+            size = fuzzy_writer.write(fuzzy_output)
+            print(f"💾 Index de correction sauvegardé: {fuzzy_output} ({len(fuzzy_writer)} lemmes, {size / 1024:.1f} KB)")
         
-        return len(concordance_entries)
+        return count
         
     except Exception as e:
         print(f"❌ Erreur lors du traitement: {e}")
@@ -102,59 +109,43 @@ def process_bsb_concordance_excel(excel_path, output_path):
         traceback.print_exc()
         return 0
 
-def process_bsb_topical_excel(excel_path, output_path):
-    """Traite le fichier Excel d'index thématique BSB réel"""
+def process_bsb_topical_excel(excel_path, output_path, topic_ids=None, verse_ids=False, reverse_output=None):
+    """Traite le fichier Excel d'index thématique BSB réel ([topic_id, verse_id, weight] avec verse_ids=True)"""
     print(f"🚀 Traitement de l'index thématique BSB depuis {excel_path}")
     
     try:
-        # Lire le fichier Excel en sautant les premières lignes d'en-tête
-        df = pd.read_excel(excel_path, skiprows=2)
-        
-        print(f"✅ {len(df)} entrées d'index thématique chargées")
+        # Lire le classeur en streaming en sautant les lignes d'en-tête
+        rows = iter_topical_rows(excel_path)
+        entries = iter_topical_entries(rows, parse_reference)
+        if verse_ids:
+            entries = with_verse_ids(entries, 1)
         
-        # Renommer les colonnes
-        df.columns = ['Sort', 'Source', 'Topic', 'Num', 'Verse', 'Context']
+        # Écrire les entrées au fil de l'eau en JSONL.gz
+        count = 0
+        seen_topics = set()
+        # Index inversé verset -> thèmes (verse_index) si reverse_output est fourni
+        reverse_writer = VerseIndexWriter() if reverse_output else None
+        with JsonlWriter(output_path, index_key=0) as writer:
+            for entry in entries:
+                writer.write(entry)
+                count += 1
+                if reverse_writer:
+                    reverse_writer.add_topic_link(entry)
+                # IDs de thèmes dans l'ordre de première apparition, pour topics_min.json sans relire le fichier
+                if topic_ids is not None and entry[0] not in seen_topics:
+                    seen_topics.add(entry[0])
+                    topic_ids.append(entry[0])
         
-        # Convertir en format JSONL.gz pour le streaming
-        topical_entries = []
-        topic_counter = 1
-        
-        for index, row in df.iterrows():
-            # Ignorer les lignes sans données valides
-            if pd.isna(row['Verse']) or pd.isna(row['Num']):
-                continue
-            
-            # Parser la référence biblique
-            book, chapter, verse = parse_reference(row['Verse'])
-            if not book or chapter == 0 or verse == 0:
-                continue
-            
-            # Utiliser le numéro comme ID de thème
-            topic_id = int(row['Num']) if not pd.isna(row['Num']) else topic_counter
-            topic_counter += 1
-            
-            # Créer l'entrée de thème
-            entry = [
-                topic_id,  # topic_id
-                book,  # book
-                chapter,  # chapter
-                verse,  # verse
-                1.0  # weight (par défaut)
-            ]
-            
-            topical_entries.append(entry)
-        
-        print(f"✅ {len(topical_entries)} entrées valides générées")
-        
-        # Sauvegarder en JSONL.gz
-        with gzip.open(output_path, 'wt', encoding='utf-8') as f:
-            for entry in topical_entries:
-                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        print(f"✅ {count} entrées valides générées")
         
         print(f"💾 Index thématique sauvegardé: {output_path}")
         print(f"📊 Taille du fichier: {os.path.getsize(output_path) / 1024:.1f} KB")
         
-        return len(topical_entries)
+        if reverse_writer:
+            size = reverse_writer.write(reverse_output)
+            print(f"💾 Index verset -> thèmes sauvegardé: {reverse_output} ({len(reverse_writer)} versets, {size / 1024:.1f} KB)")
+        
+        return count
         
     except Exception as e:
         print(f"❌ Erreur lors du traitement: {e}")
@@ -209,6 +200,10 @@ def main():
     concordance_output = "assets/data/concordance.jsonl.gz"
     topical_output = "assets/data/topics_links.jsonl.gz"
     topics_min_output = "assets/data/topics_min.json"
+    verse_lemmas_output = "assets/data/verse_lemmas.idx"
+    verse_topics_output = "assets/data/verse_topics.idx"
+    prefix_output = os.path.join("assets/data", PREFIX_INDEX_FILE)
+    fuzzy_output = os.path.join("assets/data", FUZZY_INDEX_FILE)
     
     # Vérifier que les fichiers Excel existent
     if not os.path.exists(concordance_excel):
@@ -222,24 +217,42 @@ def main():
     # Créer le dossier de sortie
     os.makedirs(os.path.dirname(concordance_output), exist_ok=True)
     
+    # Manifeste de build : une cible à jour (mêmes sources, outil et paramètres) est sautée
+    manifest = BuildManifest(os.path.dirname(concordance_output))
+    params = {'verse_ids': False, 'binary': False}
+    concordance_target = ([concordance_excel], [concordance_output, verse_lemmas_output, prefix_output,
+                                              fuzzy_output],
+                          tool_version(*BSB_MODULES, 'concordance_binary'))
+    topical_target = ([topical_excel], [topical_output, verse_topics_output, topics_min_output],
+                      tool_version(*BSB_MODULES))
+    
     # Traiter la concordance
-    concordance_count = process_bsb_concordance_excel(concordance_excel, concordance_output)
+    concordance_count = 0
+    if manifest.is_up_to_date('concordance', *concordance_target, params):
+        print(f"⏭️  Concordance à jour: {concordance_output}")
+    else:
+        concordance_count = process_bsb_concordance_excel(concordance_excel, concordance_output,
+                                                          reverse_output=verse_lemmas_output,
+                                                          prefix_output=prefix_output,
+                                                          fuzzy_output=fuzzy_output)
+        if concordance_count > 0:
+            manifest.record('concordance', *concordance_target, params)
     
     # Traiter l'index thématique
-    topical_count = process_bsb_topical_excel(topical_excel, topical_output)
-    
-    # Générer topics_min.json
-    if topical_count > 0:
-        # Lire les entrées pour générer topics_min.json
-        topical_entries = []
-        with gzip.open(topical_output, 'rt', encoding='utf-8') as f:
-            for line in f:
-                entry = json.loads(line.strip())
-                topical_entries.append(entry)
-        
-        topics_count = generate_topics_min_json(topical_entries, topics_min_output)
+    topical_count = topics_count = 0
+    if manifest.is_up_to_date('topical', *topical_target, params):
+        print(f"⏭️  Index thématique à jour: {topical_output}")
     else:
-        topics_count = 0
+        topic_ids = []
+        topical_count = process_bsb_topical_excel(topical_excel, topical_output, topic_ids,
+                                                  reverse_output=verse_topics_output)
+        
+        # Générer topics_min.json à partir des thèmes collectés en mémoire
+        if topical_count > 0:
+            topics_count = generate_topics_min_json([(topic_id,) for topic_id in topic_ids], topics_min_output)
+            manifest.record('topical', *topical_target, params)
+    
+    manifest.save()
     
     # Résumé final
     print("\n" + "=" * 60)
@@ -252,6 +265,8 @@ def main():
     print(f"   - {concordance_output}")
     print(f"   - {topical_output}")
     print(f"   - {topics_min_output}")
+    print(f"   - {verse_lemmas_output}")
+    print(f"   - {verse_topics_output}")
     print("\n🎉 APPLICATION SÉRIEUSE AVEC CONCORDANCE COMPLÈTE !")
 
 if __name__ == "__main__":
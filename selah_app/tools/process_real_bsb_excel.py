@@ -10,6 +10,13 @@ import gzip
 import os
 from pathlib import Path
 
+from bsb_columnar import (
+    concordance_from_columns,
+    first_present_column,
+    frame_rows,
+    topical_from_columns,
+)
+
 def process_bsb_concordance_excel(excel_path, output_path):
     """Traite le fichier Excel de concordance BSB réel"""
     print(f"🚀 Traitement de la concordance BSB depuis {excel_path}")
@@ -27,24 +34,16 @@ def process_bsb_concordance_excel(excel_path, output_path):
         print("\n🔍 Échantillon des données:")
         print(df.head(3).to_string())
         
-        # Convertir en format JSONL.gz pour le streaming
-        concordance_entries = []
-        
-        for index, row in df.iterrows():
-            # Adapter selon la structure réelle de votre Excel
-            # Ces noms de colonnes sont des exemples - ajustez selon votre fichier
-            entry = [
-                str(row.get('lemma', row.get('mot', row.get('word', ''))).strip(),
-                str(row.get('surface', row.get('forme', row.get('form', ''))).strip(),
-                str(row.get('book', row.get('livre', row.get('book_name', ''))).strip(),
-                int(row.get('chapter', row.get('chapitre', row.get('ch', 0))),
-                int(row.get('verse', row.get('verset', row.get('v', 0))),
-                str(row.get('pos', row.get('type', row.get('part_of_speech', 'n'))).strip()
-            ]
-            
-            # Vérifier que l'entrée est valide
-            if entry[0] and entry[2] and entry[3] > 0 and entry[4] > 0:
-                concordance_entries.append(entry)
+        # Convertir en colonnes (adapter les noms selon la structure réelle de votre Excel)
+        concordance_frame = concordance_from_columns(
+            first_present_column(df, ['lemma', 'mot', 'word'], ''),
+            first_present_column(df, ['surface', 'forme', 'form'], ''),
+            first_present_column(df, ['book', 'livre', 'book_name'], ''),
+            first_present_column(df, ['chapter', 'chapitre', 'ch'], 0),
+            first_present_column(df, ['verse', 'verset', 'v'], 0),
+            first_present_column(df, ['pos', 'type', 'part_of_speech'], 'n'),
+        )
+        concordance_entries = list(frame_rows(concordance_frame))
         
         print(f"✅ {len(concordance_entries)} entrées valides générées")
         
@@ -79,22 +78,15 @@ def process_bsb_topical_excel(excel_path, output_path):
         print("\n🔍 Échantillon des données:")
         print(df.head(3).to_string())
         
-        # Convertir en format JSONL.gz pour le streaming
-        topical_entries = []
-        
-        for index, row in df.iterrows():
-            # Adapter selon la structure réelle de votre Excel
-            entry = [
-                int(row.get('topic_id', row.get('id', row.get('theme_id', 0)))),
-                str(row.get('book', row.get('livre', row.get('book_name', ''))).strip(),
-                int(row.get('chapter', row.get('chapitre', row.get('ch', 0)))),
-                int(row.get('verse', row.get('verset', row.get('v', 0)))),
-                float(row.get('weight', row.get('poids', row.get('score', 1.0))))
-            ]
-            
-            # Vérifier que l'entrée est valide
-            if entry[1] and entry[2] > 0 and entry[3] > 0:
-                topical_entries.append(entry)
+        # Convertir en colonnes (adapter les noms selon la structure réelle de votre Excel)
+        topical_frame = topical_from_columns(
+            first_present_column(df, ['topic_id', 'id', 'theme_id'], 0),
+            first_present_column(df, ['book', 'livre', 'book_name'], ''),
+            first_present_column(df, ['chapter', 'chapitre', 'ch'], 0),
+            first_present_column(df, ['verse', 'verset', 'v'], 0),
+            first_present_column(df, ['weight', 'poids', 'score'], 1.0),
+        )
+        topical_entries = list(frame_rows(topical_frame))
         
         print(f"✅ {len(topical_entries)} entrées valides générées")
         
@@ -10,6 +10,15 @@ import os
 import re
 from pathlib import Path
 
+from bible_refs import parse_reference
+from bsb_excel_stream import (
+    iter_concordance_rows,
+    iter_entry_word_entries,
+    iter_topical_entries,
+    iter_topical_rows,
+)
+from french_lemmas import with_search_keys
+
 def extract_word_from_entry(entry_text):
     """Extrait le mot principal d'une entrée comme '10 (2 Occurrences)'"""
     if not entry_text or pd.isna(entry_text):
@@ -21,81 +30,28 @@ def extract_word_from_entry(entry_text):
         return match.group(1).strip()
     return str(entry_text).strip()
 
-def parse_reference(verse_text):
-    """Parse une référence biblique comme 'Gen 32:15'"""
-    if not verse_text or pd.isna(verse_text):
-        return "", 0, 0
-    
-    # Pattern pour capturer livre, chapitre, verset
-    match = re.match(r'^([A-Za-z0-9\s]+?)\s+(\d+):(\d+)', str(verse_text))
-    if match:
-        book = match.group(1).strip()
-        chapter = int(match.group(2))
-        verse = int(match.group(3))
-        return book, chapter, verse
-    
-    return str(verse_text), 0, 0
-
 def process_bsb_concordance_excel(excel_path, output_path):
     """Traite le fichier Excel de concordance BSB réel"""
     print(f"🚀 Traitement de la concordance BSB depuis {excel_path}")
     
     try:
-        # Lire le fichier Excel en sautant les premières lignes d'en-tête
-        df = pd.read_excel(excel_path, skiprows=1)  # Skip la première ligne d'en-tête
-        
-        print(f"✅ {len(df)} entrées de concordance chargées")
-        
-        # Renommer les colonnes pour plus de clarté
-        df.columns = ['Sort', 'Book', 'Chap', 'Word', 'Occ', 'Total', 'Entry', 'Verse', 'Context']
-        
-        print(f"📊 Colonnes: {list(df.columns)}")
-        
-        # Afficher un échantillon
-        print("\n🔍 Échantillon des données:")
-        print(df.head(3).to_string())
-        
-        # Convertir en format JSONL.gz pour le streaming
-        concordance_entries = []
-        
-        for index, row in df.iterrows():
-            # Ignorer les lignes d'en-tête ou de résumé
-            if pd.isna(row['Book']) or pd.isna(row['Verse']) or row['Occ'] == 0:
-                continue
-            
-            # Extraire le mot de l'entrée
-            word = extract_word_from_entry(row['Entry'])
-            if not word:
-                continue
-            
-            # Parser la référence biblique
-            book, chapter, verse = parse_reference(row['Verse'])
-            if not book or chapter == 0 or verse == 0:
-                continue
-            
-            # Créer l'entrée de concordance
-            entry = [
-                word,  # lemma
-                word,  # surface (même chose pour simplifier)
-                book,  # book
-                chapter,  # chapter
-                verse,  # verse
-                "n"  # pos (part of speech) - par défaut nom
-            ]
-            
-            concordance_entries.append(entry)
+        # Lire le classeur en streaming (curseur openpyxl en lecture seule)
+        rows = iter_concordance_rows(excel_path)
+        entries = with_search_keys(iter_entry_word_entries(rows, extract_word_from_entry, parse_reference))
         
-        print(f"✅ {len(concordance_entries)} entrées valides générées")
-        
-        # Sauvegarder en JSONL.gz
+        # Écrire les entrées au fil de l'eau en JSONL.gz
+        count = 0
         with gzip.open(output_path, 'wt', encoding='utf-8') as f:
-            for entry in concordance_entries:
+            for entry in entries:
                 f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                count += 1
+        
+        print(f"✅ {count} entrées valides générées")
         
         print(f"💾 Concordance sauvegardée: {output_path}")
         print(f"📊 Taille du fichier: {os.path.getsize(output_path) / 1024:.1f} KB")
         
-        return len(concordance_entries)
+        return count
         
     except Exception as e:
         print(f"❌ Erreur lors du traitement: {e}")
@@ -108,60 +64,23 @@ def process_bsb_topical_excel(excel_path, output_path):
     print(f"🚀 Traitement de l'index thématique BSB depuis {excel_path}")
     
     try:
-        # Lire le fichier Excel en sautant les premières lignes d'en-tête
-        df = pd.read_excel(excel_path, skiprows=2)  # Skip les 2 premières lignes d'en-tête
-        
-        print(f"✅ {len(df)} entrées d'index thématique chargées")
-        
-        # Renommer les colonnes pour plus de clarté
-        df.columns = ['Sort', 'Source', 'Topic', 'Num', 'Verse', 'Context']
-        
-        print(f"📊 Colonnes: {list(df.columns)}")
-        
-        # Afficher un échantillon
-        print("\n🔍 Échantillon des données:")
-        print(df.head(3).to_string())
+        # Lire le classeur en streaming en sautant les lignes d'en-tête
+        rows = iter_topical_rows(excel_path)
+        entries = iter_topical_entries(rows, parse_reference)
         
-        # Convertir en format JSONL.gz pour le streaming
-        topical_entries = []
-        topic_counter = 1
-        
-        for index, row in df.iterrows():
-            # Ignorer les lignes sans données valides
-            if pd.isna(row['Verse']) or pd.isna(row['Num']):
-                continue
-            
-            # Parser la référence biblique
-            book, chapter, verse = parse_reference(row['Verse'])
-            if not book or chapter == 0 or verse == 0:
-                continue
-            
-            # Utiliser le numéro comme ID de thème, ou créer un compteur
-            topic_id = int(row['Num']) if not pd.isna(row['Num']) else topic_counter
-            topic_counter += 1
-            
-            # Créer l'entrée de thème
-            entry = [
-                topic_id,  # topic_id
-                book,  # book
-                chapter,  # chapter
-                verse,  # verse
-                1.0  # weight (par défaut)
-            ]
-            
-            topical_entries.append(entry)
-        
-        print(f"✅ {len(topical_entries)} entrées valides générées")
-        
-        # Sauvegarder en JSONL.gz
+        # Écrire les entrées au fil de l'eau en JSONL.gz
+        count = 0
         with gzip.open(output_path, 'wt', encoding='utf-8') as f:
-            for entry in topical_entries:
+            for entry in entries:
                 f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                count += 1
+        
+        print(f"✅ {count} entrées valides générées")
         
         print(f"💾 Index thématique sauvegardé: {output_path}")
         print(f"📊 Taille du fichier: {os.path.getsize(output_path) / 1024:.1f} KB")
         
-        return len(topical_entries)
+        return count
         
     except Exception as e:
         print(f"❌ Erreur lors du traitement: {e}")
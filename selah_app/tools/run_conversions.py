@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Pilote de conversion parallèle des données bibliques.
+
+Les conversions indépendantes (concordance BSB, index thématique BSB,
+comparaison de versions, extraction des mots de chaque bible française)
+sont réparties sur un pool de processus puis leurs résultats sont joints.
+topics_min.json est dérivé des thèmes collectés en mémoire par le job
+d'index thématique, sans relire topics_links.jsonl.gz.
+
+Un manifeste de build (build_cache) permet de sauter les cibles à jour :
+relancer la conversion sans modification des sources ne reconstruit rien,
+et seule une bible modifiée est retokenisée.
+
+Usage:
+    python tools/run_conversions.py [--workers N] [--verse-ids] [--binary] [--skip-bibles] [--force]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bible_refs import with_verse_ids
+from build_cache import BuildManifest, tool_version
+from concordance_binary import write_concordance_binary
+from french_lemmas import FrenchLemmatizer
+from fuzzy_index import FUZZY_INDEX_FILE, FuzzyIndexWriter
+from generate_real_concordance import (
+    BIBLE_FILES,
+    extract_words_from_bible_file,
+    load_partial,
+    merge_bible_words,
+    save_partial,
+    select_vocabulary,
+)
+from jsonl_writer import JsonlWriter, write_jsonl
+from parallel_versions import PARALLEL_VERSIONS_FILE
+from prefix_index import PREFIX_INDEX_FILE, PrefixIndexWriter
+from process_bible_comparison import process_bible_comparison_excel
+from process_bsb_final import (
+    BSB_MODULES,
+    generate_topics_min_json,
+    process_bsb_concordance_excel,
+    process_bsb_topical_excel,
+)
+from verse_index import VERSE_LEMMAS_FILE, VERSE_TOPICS_FILE
+from vocabulary_policy import VocabularyPolicy
+
+SOURCE_DIR = "/Users/gafardgnane/Downloads/Bibles versions"
+
+
+def run_topical_job(excel_path, output_path, verse_ids=False, reverse_output=None):
+    """Job d'index thématique : renvoie le nombre de liens et les IDs de thèmes"""
+    topic_ids = []
+    count = process_bsb_topical_excel(excel_path, output_path, topic_ids, verse_ids, reverse_output)
+    return count, topic_ids
+
+
+def _timed(func, *args):
+    """Exécute un job et renvoie (résultat, durée en secondes)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_jobs(jobs, workers=None):
+    """Exécute les jobs {nom: (fonction, args)} en parallèle et renvoie {nom: (résultat, durée)}"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(_timed, func, *args) for name, (func, args) in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def write_concordance(entries, output_path, prefix_output=None, fuzzy_output=None):
+    """Sauvegarde une concordance en JSONL.gz (et ses index de complétion et de correction) ; renvoie le nombre d'entrées"""
+    lemma_writers = {path: writer for path, writer in ((prefix_output, PrefixIndexWriter()),
+                                                       (fuzzy_output, FuzzyIndexWriter())) if path}
+    if not lemma_writers:
+        return write_jsonl(output_path, entries, index_key=0)
+
+    def counted_entries():
+        for entry in entries:
+            for writer in lemma_writers.values():
+                writer.add_entry(entry)
+            yield entry
+    count = write_jsonl(output_path, counted_entries(), index_key=0)
+    for path, writer in lemma_writers.items():
+        writer.write(path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Conversion parallèle des données bibliques')
+    parser.add_argument('--source-dir', default=SOURCE_DIR, help='Dossier des fichiers Excel sources')
+    parser.add_argument('--out', default='assets/data', help='Répertoire de sortie')
+    parser.add_argument('--workers', type=int, default=None, help='Nombre de processus (défaut: nombre de cœurs)')
+    parser.add_argument('--verse-ids', action='store_true',
+                        help='Émettre des IDs de versets entiers (BBCCCVVV) au lieu de livre/chapitre/verset')
+    parser.add_argument('--binary', action='store_true',
+                        help='Écrire aussi les concordances au format binaire (.bin)')
+    parser.add_argument('--skip-bibles', action='store_true', help='Ne pas extraire les mots des bibles françaises')
+    parser.add_argument('--force', action='store_true', help='Tout reconstruire sans consulter le manifeste de build')
+    VocabularyPolicy.add_arguments(parser)
+    JsonlWriter.add_arguments(parser)
+    args = parser.parse_args()
+    policy = VocabularyPolicy.from_args(args)
+    JsonlWriter.configure(args)
+
+    print("🎯 Conversion parallèle des données bibliques")
+    print("=" * 60)
+
+    os.makedirs(args.out, exist_ok=True)
+    concordance_output = os.path.join(args.out, 'concordance.jsonl.gz')
+    topical_output = os.path.join(args.out, 'topics_links.jsonl.gz')
+    topics_min_output = os.path.join(args.out, 'topics_min.json')
+    comparison_output = os.path.join(args.out, 'bible_comparison.jsonl.gz')
+    columnar_output = os.path.join(args.out, PARALLEL_VERSIONS_FILE)
+    french_concordance_output = os.path.join(args.out, 'concordance_fr.jsonl.gz')
+    concordance_binary_output = os.path.join(args.out, 'concordance.bin') if args.binary else None
+    verse_lemmas_output = os.path.join(args.out, VERSE_LEMMAS_FILE)
+    verse_topics_output = os.path.join(args.out, VERSE_TOPICS_FILE)
+    french_binary_output = os.path.join(args.out, 'concordance_fr.bin')
+    prefix_output = os.path.join(args.out, PREFIX_INDEX_FILE)
+    french_prefix_output = os.path.join(args.out, 'concordance_fr_prefix.idx')
+    fuzzy_output = os.path.join(args.out, FUZZY_INDEX_FILE)
+    french_fuzzy_output = os.path.join(args.out, 'concordance_fr_fuzzy.idx')
+
+    sources = {
+        'concordance': os.path.join(args.source_dir, 'bsb_concordance.xlsx'),
+        'topical': os.path.join(args.source_dir, 'bsb_topical_index.xlsx'),
+        'comparison': os.path.join(args.source_dir, 'bibles.xlsx'),
+    }
+
+    # Cibles : (entrées, sorties, version de l'outil) ; les paramètres sont communs
+    manifest = BuildManifest(args.out, force=args.force)
+    params = {'verse_ids': args.verse_ids, 'binary': args.binary, 'jsonl': JsonlWriter.params(args)}
+    concordance_outputs = [concordance_output, verse_lemmas_output, prefix_output, fuzzy_output]
+    if concordance_binary_output:
+        concordance_outputs.append(concordance_binary_output)
+    targets = {
+        'concordance': ([sources['concordance']], concordance_outputs,
+                        tool_version(*BSB_MODULES, 'concordance_binary')),
+        'topical': ([sources['topical']], [topical_output, verse_topics_output, topics_min_output],
+                    tool_version(*BSB_MODULES)),
+        'comparison': ([sources['comparison']], [comparison_output, columnar_output],
+                       tool_version('process_bible_comparison', 'bsb_columnar', 'bible_refs', 'jsonl_writer',
+                                    'parallel_versions')),
+    }
+    job_functions = {
+        'concordance': (process_bsb_concordance_excel, (sources['concordance'], concordance_output, args.verse_ids,
+                                                        concordance_binary_output, verse_lemmas_output,
+                                                        prefix_output, fuzzy_output)),
+        'topical': (run_topical_job, (sources['topical'], topical_output, args.verse_ids, verse_topics_output)),
+        'comparison': (process_bible_comparison_excel, (sources['comparison'], comparison_output, args.verse_ids,
+                                                        columnar_output)),
+    }
+
+    # Construire la liste des jobs indépendants (cibles absentes ou périmées seulement)
+    jobs = {}
+    skipped = []
+    for name, path in sources.items():
+        if not os.path.exists(path):
+            print(f"⚠️ Fichier source non trouvé, job ignoré: {path}")
+        elif manifest.is_up_to_date(name, *targets[name], params):
+            skipped.append(name)
+        else:
+            jobs[name] = job_functions[name]
+
+    # Un shard par bible : seules les bibles modifiées sont retraitées
+    bible_shards = {}
+    words_tool = tool_version('generate_real_concordance', 'concordance_builder')
+    if not args.skip_bibles:
+        for bible_file in BIBLE_FILES:
+            if not os.path.exists(bible_file):
+                print(f"⚠️ Bible non trouvée, job ignoré: {bible_file}")
+                continue
+            name = f"bible:{bible_file}"
+            bible_shards[name] = manifest.shard_path(f"words_{bible_file}")
+            if manifest.is_up_to_date(name, [bible_file], [bible_shards[name]], words_tool):
+                skipped.append(name)
+            else:
+                jobs[name] = (extract_words_from_bible_file, (bible_file,))
+
+    french_outputs = [french_concordance_output, french_prefix_output, french_fuzzy_output]
+    if args.binary:
+        french_outputs.append(french_binary_output)
+    french_tool = tool_version('generate_real_concordance', 'concordance_builder', 'french_lemmas',
+                               'vocabulary_policy', 'run_conversions', 'jsonl_writer', 'prefix_index',
+                               'fuzzy_index')
+    french_params = dict(params, vocabulary=policy.params())
+    french_needed = bool(bible_shards) and (
+        any(name in jobs for name in bible_shards)
+        or not manifest.is_up_to_date('french', list(bible_shards.values()), french_outputs, french_tool,
+                                      french_params))
+
+    for name in skipped:
+        print(f"⏭️  {name}: à jour, ignoré")
+    if not jobs and not french_needed:
+        print("✅ Tout est à jour, rien à reconstruire")
+        manifest.save()
+        return
+
+    start = time.perf_counter()
+    results = {}
+    if jobs:
+        print(f"🚀 {len(jobs)} jobs sur {args.workers or os.cpu_count()} processus")
+        results = run_jobs(jobs, args.workers)
+
+    # Joindre les résultats et enregistrer les cibles réussies
+    topics_count = 0
+    if 'topical' in results:
+        (topical_count, topic_ids), _ = results['topical']
+        if topical_count > 0:
+            topics_count = generate_topics_min_json([(topic_id,) for topic_id in topic_ids], topics_min_output)
+            manifest.record('topical', *targets['topical'], params)
+    for name in ('concordance', 'comparison'):
+        if name in results and results[name][0] > 0:
+            manifest.record(name, *targets[name], params)
+
+    for name, shard_path in bible_shards.items():
+        if name in results:
+            save_partial(shard_path, results[name][0])
+            manifest.record(name, [name.split(':', 1)[1]], [shard_path], words_tool)
+
+    french_count = 0
+    if french_needed:
+        # Fusion dans l'ordre de BIBLE_FILES pour un résultat déterministe
+        # (les partiels sont chargés un par un, les entrées relues en streaming)
+        partials = (results[name][0] if name in results else load_partial(path)
+                    for name, path in bible_shards.items())
+        with merge_bible_words(partials) as builder:
+            lemmatizer = FrenchLemmatizer()
+            vocabulary = select_vocabulary(builder, policy, lemmatizer)
+
+            def french_entries():
+                entries = builder.entries(lemmatizer=lemmatizer, vocabulary=vocabulary)
+                return with_verse_ids(entries, 2) if args.verse_ids else entries
+            french_count = write_concordance(french_entries(), french_concordance_output, french_prefix_output,
+                                             french_fuzzy_output)
+            if args.binary:
+                write_concordance_binary(french_entries(), french_binary_output)
+        manifest.record('french', list(bible_shards.values()), french_outputs, french_tool, french_params)
+
+    manifest.save()
+
+    # Résumé final
+    print("\n" + "=" * 60)
+    print("📊 RÉSUMÉ FINAL - CONVERSION PARALLÈLE")
+    print("=" * 60)
+    for name, (result, duration) in results.items():
+        print(f"⏱️  {name}: {duration:.1f}s")
+    if 'concordance' in results:
+        print(f"✅ Concordance BSB: {results['concordance'][0]:,} entrées")
+    if 'topical' in results:
+        print(f"✅ Index thématique: {results['topical'][0][0]:,} entrées ({topics_count:,} thèmes)")
+    if 'comparison' in results:
+        print(f"✅ Comparaison de versions: {results['comparison'][0]:,} versets")
+    if french_needed:
+        print(f"✅ Concordance française: {french_count:,} entrées -> {french_concordance_output}")
+    if skipped:
+        print(f"⏭️  {len(skipped)} cibles à jour ignorées")
+    print(f"🕐 Durée totale: {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
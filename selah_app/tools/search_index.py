@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Index de recherche des services Flutter (concordance, thèmes), précalculé
+à la conversion.
+
+L'index est un JSON chargé une fois par le service Dart généré (voir
+dart_services) :
+
+    {
+      "version": 1,
+      "n": 3,
+      "keys":   clés normalisées (minuscules, sans espaces aux bords), triées
+                dans l'ordre des unités UTF-16 (celui de String.compareTo en Dart)
+      "labels": clés d'origine dans le même ordre (absent si identiques)
+      "ngrams": {n-gramme: indices des clés qui le contiennent, en deltas}
+    }
+
+- Préfixe : dichotomie sur keys puis lecture des clés suivantes tant
+  qu'elles commencent par le préfixe, en O(log n + résultats).
+- Sous-chaîne : intersection des listes des n-grammes de la requête (la plus
+  courte d'abord), vérifiée sur les seules clés candidates.
+- Approché : les clés partageant le plus de n-grammes (bords marqués par un
+  espace) avec la requête, classées par coefficient de Dice.
+
+Le coût d'une recherche dépend des listes touchées, plus de la taille du
+vocabulaire. SearchIndex reproduit en Python les requêtes du service Dart.
+
+Usage:
+    python tools/search_index.py build assets/data/bsb_concordance.json assets/data/bsb_concordance_search.json
+    python tools/search_index.py query assets/data/bsb_concordance_search.json lov [--fuzzy]
+"""
+
+import bisect
+import json
+import os
+from collections import Counter, defaultdict
+
+VERSION = 1
+NGRAM_SIZE = 3
+DEFAULT_LIMIT = 20
+MIN_FUZZY_SCORE = 0.3
+
+
+def normalize_key(key):
+    """Forme de recherche d'une clé (identique à toLowerCase().trim() côté Dart)"""
+    return key.lower().strip()
+
+
+def utf16_order(key):
+    """Clé de tri dans l'ordre des unités UTF-16 (String.compareTo en Dart)"""
+    return key.encode('utf-16-be')
+
+
+def ngrams(text, n=NGRAM_SIZE):
+    """n-grammes distincts de text (vide si text est plus court que n)"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def padded_ngrams(text, n=NGRAM_SIZE):
+    """n-grammes de ' text ' : les bords du mot comptent dans la similarité"""
+    return ngrams(f" {text} ", n)
+
+
+def delta_encode(values):
+    previous = 0
+    deltas = []
+    for value in values:
+        deltas.append(value - previous)
+        previous = value
+    return deltas
+
+
+def delta_decode(deltas):
+    total = 0
+    values = []
+    for delta in deltas:
+        total += delta
+        values.append(total)
+    return values
+
+
+def build_search_index(keys, n=NGRAM_SIZE):
+    """Construit l'index (dict sérialisable en JSON) d'un itérable de clés"""
+    entries = sorted(((normalize_key(key), key) for key in keys), key=lambda item: (utf16_order(item[0]), item[1]))
+    normalized = [key for key, _ in entries]
+    postings = defaultdict(list)
+    for index, key in enumerate(normalized):
+        for gram in padded_ngrams(key, n):
+            postings[gram].append(index)
+    index = {'version': VERSION, 'n': n, 'keys': normalized}
+    labels = [label for _, label in entries]
+    if labels != normalized:
+        index['labels'] = labels
+    index['ngrams'] = {gram: delta_encode(values) for gram, values in sorted(postings.items())}
+    return index
+
+
+def search_index_path(data_path):
+    """Chemin de l'index de recherche d'un asset JSON (x.json -> x_search.json)"""
+    root, _ = os.path.splitext(data_path)
+    return f"{root}_search.json"
+
+
+def write_search_index(keys, path, n=NGRAM_SIZE):
+    """Écrit l'index JSON compact des clés ; renvoie (nombre de clés, taille en octets)"""
+    index = build_search_index(keys, n)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    return len(index['keys']), os.path.getsize(path)
+
+
+class SearchIndex:
+    """Requêtes sur un index de recherche (mêmes algorithmes que le service Dart)"""
+
+    def __init__(self, index):
+        if index.get('version') != VERSION:
+            raise ValueError(f"Version d'index de recherche non supportée: {index.get('version')}")
+        self.n = index['n']
+        self.keys = index['keys']
+        self.labels = index.get('labels', self.keys)
+        self._order = [utf16_order(key) for key in self.keys]
+        self._ngrams = index['ngrams']
+        self._decoded = {}
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _postings(self, gram):
+        if gram not in self._decoded:
+            self._decoded[gram] = delta_decode(self._ngrams.get(gram, []))
+        return self._decoded[gram]
+
+    def find(self, key):
+        """Indice de la clé exacte (après normalisation), ou -1"""
+        key = normalize_key(key)
+        index = bisect.bisect_left(self._order, utf16_order(key))
+        return index if index < len(self.keys) and self.keys[index] == key else -1
+
+    def prefix(self, text, limit=DEFAULT_LIMIT):
+        """Clés commençant par text, dans l'ordre trié"""
+        text = normalize_key(text)
+        index = bisect.bisect_left(self._order, utf16_order(text))
+        results = []
+        while index < len(self.keys) and len(results) < limit and self.keys[index].startswith(text):
+            results.append(self.labels[index])
+            index += 1
+        return results
+
+    def contains(self, text, limit=DEFAULT_LIMIT):
+        """Clés contenant text (les requêtes plus courtes qu'un n-gramme se limitent au préfixe)"""
+        text = normalize_key(text)
+        grams = ngrams(text, self.n)
+        if not grams:
+            return self.prefix(text, limit)
+        lists = sorted((self._postings(gram) for gram in grams), key=len)
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            candidates.intersection_update(postings)
+            if not candidates:
+                return []
+        results = []
+        for index in sorted(candidates):
+            if text in self.keys[index]:
+                results.append(self.labels[index])
+                if len(results) >= limit:
+                    break
+        return results
+
+    def fuzzy(self, text, limit=DEFAULT_LIMIT, min_score=MIN_FUZZY_SCORE):
+        """Clés les plus proches de text par n-grammes communs (coefficient de Dice)"""
+        text = normalize_key(text)
+        grams = padded_ngrams(text, self.n)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings(gram))
+        scored = []
+        for index, common in shared.items():
+            key_grams = len(self.keys[index]) + 3 - self.n
+            score = 2 * common / (len(grams) + key_grams)
+            if score >= min_score:
+                scored.append((-score, self.keys[index], index))
+        scored.sort()
+        return [self.labels[index] for _, _, index in scored[:limit]]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Index de recherche des services Flutter')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Construire l'index des clés d'un JSON {clé: valeur}")
+    build.add_argument('input')
+    build.add_argument('output')
+    query = subparsers.add_parser('query', help='Interroger un index')
+    query.add_argument('index')
+    query.add_argument('text')
+    query.add_argument('--fuzzy', action='store_true', help='Recherche approchée')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        with open(args.input, 'r', encoding='utf-8') as f:
+            keys = list(json.load(f))
+        count, size = write_search_index(keys, args.output)
+        print(f"✅ Index de recherche: {args.output} ({count} clés, {size / 1024:.1f} KB)")
+        return
+
+    index = SearchIndex.open(args.index)
+    if args.fuzzy:
+        results = index.fuzzy(args.text)
+    else:
+        results = index.prefix(args.text)
+        results += [key for key in index.contains(args.text) if key not in results][:DEFAULT_LIMIT - len(results)]
+    print(f"🔍 {len(results)} résultats")
+    for result in results:
+        print(f"   {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests du lemmatiseur français : homographes et faux rapprochements.
+
+Usage:
+    python -m pytest tools/test_french_lemmas.py
+"""
+
+from french_lemmas import FrenchLemmatizer, search_key
+
+VOCABULARY = [
+    'enfant', 'enfants', 'enfer', 'mer', 'mers', 'mère', 'mères', 'per', 'père', 'pères',
+    'mari', 'maris', 'est', 'été', 'était', 'étaient', 'nation', 'nations',
+    'aimer', 'aime', 'aimons', 'aimé', 'aimait', 'aimées', 'finir', 'finissons', 'finit',
+]
+
+
+def fitted():
+    return FrenchLemmatizer().fit({word: 2 for word in VOCABULARY})
+
+
+def test_accents_distinguish_homographs():
+    lemmatizer = fitted()
+    assert lemmatizer.lemma('mer') == 'mer'
+    assert lemmatizer.lemma('mère') == 'mère'
+    assert lemmatizer.lemma('mères') == 'mère'
+    assert lemmatizer.lemma('per') == 'per'
+    assert lemmatizer.lemma('père') == 'père'
+
+
+def test_noun_is_not_stripped_to_unrelated_infinitive():
+    lemmatizer = fitted()
+    assert lemmatizer.lemma('enfant') == 'enfant'
+    assert lemmatizer.lemma('enfants') == 'enfant'
+    assert lemmatizer.lemma('enfer') == 'enfer'
+    assert lemmatizer.lemma('mari') == 'mari'
+    assert lemmatizer.lemma('maris') == 'mari'
+
+
+def test_verb_without_attested_infinitive_is_not_stripped():
+    lemmatizer = FrenchLemmatizer().fit({'marier': 1, 'mari': 5})
+    assert lemmatizer.lemma('mari') == 'mari'
+
+
+def test_ambiguous_irregular_forms_stay_themselves():
+    lemmatizer = fitted()
+    assert lemmatizer.lemma('est') == 'est'
+    assert lemmatizer.lemma('été') == 'été'
+    assert lemmatizer.lemma('était') == 'être'
+
+
+def test_attested_verbs_and_plurals_are_grouped():
+    lemmatizer = fitted()
+    for form in ('aime', 'aimons', 'aimé', 'aimait', 'aimées'):
+        assert lemmatizer.lemma(form) == 'aimer'
+    for form in ('finissons', 'finit'):
+        assert lemmatizer.lemma(form) == 'finir'
+    assert lemmatizer.lemma('nations') == 'nation'
+
+
+def test_search_key_folds_after_lemmatization():
+    lemmatizer = fitted()
+    assert lemmatizer.analyze('mères') == ('mère', 'mères', 'mere')
+    assert search_key('Éternel') == 'eternel'
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Index inversés par verset (verset -> thèmes, verset -> lemmes), triés et
+compressés par blocs.
+
+Disposition du fichier (little-endian) :
+
+    En-tête (HEADER, 28 octets)
+        magic        4s   b'SVIX'
+        version      u16
+        flags        u16  bit 0 : valeurs = lemmes (IDs dans le dictionnaire)
+        verse_count  u32
+        block_count  u32
+        index_offset u32  début de la table des blocs
+        dict_offset  u32  début du dictionnaire des lemmes (zlib)
+        dict_size    u32
+    Blocs : zlib(varints) de BLOCK_SIZE versets consécutifs ; pour chaque
+        verset : delta d'ID BBCCCVVV, nombre de valeurs, valeurs triées en deltas
+    Table des blocs (BLOCK, 12 octets par bloc) : first_verse u32, offset u32, length u32
+    Dictionnaire : zlib des lemmes triés séparés par '\\n' (absent pour les thèmes)
+
+Une recherche fait une dichotomie sur la table des blocs (O(log n)), puis
+décompresse et parcourt un seul bloc.
+
+Usage:
+    python tools/verse_index.py topics assets/data/topics_links.jsonl.gz assets/data/verse_topics.idx
+    python tools/verse_index.py lemmas assets/data/concordance.jsonl.gz assets/data/verse_lemmas.idx
+"""
+
+import struct
+import zlib
+
+from bible_refs import verse_id
+from concordance_binary import ConcordanceBinaryWriter, decode_varints, encode_varint
+
+MAGIC = b'SVIX'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIII')
+BLOCK = struct.Struct('<III')
+
+FLAG_LEMMA_VALUES = 1
+BLOCK_SIZE = 128
+
+VERSE_TOPICS_FILE = 'verse_topics.idx'
+VERSE_LEMMAS_FILE = 'verse_lemmas.idx'
+
+
+class VerseIndexWriter:
+    """Accumule (verset, valeur) puis écrit l'index inversé par blocs"""
+
+    def __init__(self, lemma_values=False):
+        self.lemma_values = lemma_values
+        self.values = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, vid, value):
+        self.values.setdefault(vid, set()).add(value)
+
+    def add_topic_link(self, link):
+        """Ajoute un lien [topic_id, book, chapter, verse, weight] ou [topic_id, verse_id, weight]"""
+        vid = verse_id(link[1], link[2], link[3]) if len(link) >= 5 else link[1]
+        if vid is not None:
+            self.add(vid, int(link[0]))
+
+    def add_concordance_entry(self, entry):
+        """Ajoute une entrée [lemma, surface, book, chapter, verse, pos(, key)] ou [lemma, surface, verse_id, pos(, key)]"""
+        vid = verse_id(entry[2], entry[3], entry[4]) if len(entry) >= 6 else entry[2]
+        if vid is not None:
+            self.add(vid, entry[0])
+
+    def to_bytes(self, block_size=BLOCK_SIZE):
+        lemma_ids = {}
+        dictionary = b''
+        if self.lemma_values:
+            lemmas = sorted({lemma for values in self.values.values() for lemma in values})
+            lemma_ids = {lemma: index for index, lemma in enumerate(lemmas)}
+            dictionary = zlib.compress('\n'.join(lemmas).encode('utf-8'), 9)
+
+        verses = sorted(self.values)
+        blocks = bytearray()
+        block_table = bytearray()
+        for start in range(0, len(verses), block_size):
+            chunk = verses[start:start + block_size]
+            raw = bytearray()
+            previous_vid = 0
+            for vid in chunk:
+                values = self.values[vid]
+                values = sorted(lemma_ids[v] for v in values) if self.lemma_values else sorted(values)
+                encode_varint(vid - previous_vid, raw)
+                encode_varint(len(values), raw)
+                previous_value = 0
+                for value in values:
+                    encode_varint(value - previous_value, raw)
+                    previous_value = value
+                previous_vid = vid
+            compressed = zlib.compress(bytes(raw), 9)
+            block_table += BLOCK.pack(chunk[0], HEADER.size + len(blocks), len(compressed))
+            blocks += compressed
+
+        index_offset = HEADER.size + len(blocks)
+        dict_offset = index_offset + len(block_table)
+        flags = FLAG_LEMMA_VALUES if self.lemma_values else 0
+        header = HEADER.pack(MAGIC, VERSION, flags, len(verses), len(block_table) // BLOCK.size,
+                             index_offset, dict_offset, len(dictionary))
+        return header + bytes(blocks) + bytes(block_table) + dictionary
+
+    def write(self, path, block_size=BLOCK_SIZE):
+        """Écrit l'index et renvoie sa taille en octets"""
+        data = self.to_bytes(block_size)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+
+def write_verse_topics(links, path):
+    """Écrit l'index verset -> thèmes ; renvoie (versets, octets)"""
+    writer = VerseIndexWriter()
+    for link in links:
+        writer.add_topic_link(link)
+    return len(writer), writer.write(path)
+
+
+def write_verse_lemmas(entries, path):
+    """Écrit l'index verset -> lemmes ; renvoie (versets, octets)"""
+    writer = VerseIndexWriter(lemma_values=True)
+    for entry in entries:
+        writer.add_concordance_entry(entry)
+    return len(writer), writer.write(path)
+
+
+def write_topic_indexes(links, topics_path, verse_topics_path):
+    """Écrit en une passe les index thème -> versets et verset -> thèmes
+
+    Les liens sont [topic_id, book, chapter, verse, weight] ou [topic_id, verse_id, weight].
+    Renvoie (nombre de thèmes, nombre de versets).
+    """
+    topics = ConcordanceBinaryWriter(int_keys=True)
+    verse_topics = VerseIndexWriter()
+    for link in links:
+        vid = verse_id(link[1], link[2], link[3]) if len(link) >= 5 else link[1]
+        if vid is None:
+            continue
+        topics.add(int(link[0]), vid)
+        verse_topics.add(vid, int(link[0]))
+    topics.write(topics_path)
+    verse_topics.write(verse_topics_path)
+    return len(topics.postings), len(verse_topics)
+
+
+def write_concordance_indexes(entries, concordance_path, verse_lemmas_path):
+    """Écrit en une passe la concordance binaire (lemme -> versets) et l'index verset -> lemmes
+
+    Renvoie (nombre de lemmes, nombre de versets).
+    """
+    concordance = ConcordanceBinaryWriter()
+    verse_lemmas = VerseIndexWriter(lemma_values=True)
+    skipped = 0
+    for entry in entries:
+        if concordance.add_entry(entry):
+            verse_lemmas.add_concordance_entry(entry)
+        else:
+            skipped += 1
+    concordance.write(concordance_path)
+    verse_lemmas.write(verse_lemmas_path)
+    if skipped:
+        print(f"⚠️ {skipped} entrées ignorées (livre non reconnu)")
+    return len(concordance.postings), len(verse_lemmas)
+
+
+class VerseIndex:
+    """Lecteur d'index inversé par verset (bytes ou mmap)"""
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        (magic, version, flags, self.verse_count, self.block_count, self.index_offset,
+         self.dict_offset, self.dict_size) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Index par verset invalide (magic {magic!r})")
+        if version != VERSION:
+            raise ValueError(f"Version d'index par verset non supportée: {version}")
+        self.lemma_values = bool(flags & FLAG_LEMMA_VALUES)
+        self._lemmas = None
+        self._cached_block = (None, None)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return self.verse_count
+
+    def _block_entry(self, index):
+        return BLOCK.unpack_from(self.buffer, self.index_offset + index * BLOCK.size)
+
+    def _find_block(self, vid):
+        """Dernier bloc dont le premier verset est <= vid, ou -1"""
+        low, high = 0, self.block_count
+        while low < high:
+            mid = (low + high) // 2
+            if self._block_entry(mid)[0] <= vid:
+                low = mid + 1
+            else:
+                high = mid
+        return low - 1
+
+    def _decode_block(self, index):
+        if self._cached_block[0] == index:
+            return self._cached_block[1]
+        _, offset, length = self._block_entry(index)
+        varints = decode_varints(zlib.decompress(self.buffer[offset:offset + length]), 0, None)
+        records = {}
+        position = 0
+        vid = 0
+        while position < len(varints):
+            vid += varints[position]
+            count = varints[position + 1]
+            values = []
+            total = 0
+            for delta in varints[position + 2:position + 2 + count]:
+                total += delta
+                values.append(total)
+            records[vid] = values
+            position += 2 + count
+        self._cached_block = (index, records)
+        return records
+
+    def _lemma_table(self):
+        if self._lemmas is None:
+            raw = self.buffer[self.dict_offset:self.dict_offset + self.dict_size]
+            self._lemmas = zlib.decompress(raw).decode('utf-8').split('\n') if self.dict_size else []
+        return self._lemmas
+
+    def lookup(self, vid):
+        """Valeurs (IDs de thèmes ou lemmes) associées au verset, liste vide si absent"""
+        block = self._find_block(vid)
+        if block < 0:
+            return []
+        values = self._decode_block(block).get(vid, [])
+        if self.lemma_values:
+            lemmas = self._lemma_table()
+            return [lemmas[value] for value in values]
+        return values
+
+    def count(self, vid):
+        """Nombre de valeurs associées au verset"""
+        block = self._find_block(vid)
+        return len(self._decode_block(block).get(vid, [])) if block >= 0 else 0
+
+    def release(self):
+        """Libère le memoryview (nécessaire avant de fermer un mmap)"""
+        self.buffer.release()
+
+
+def main():
+    import argparse
+    import gzip
+    import json
+
+    parser = argparse.ArgumentParser(description='Construire un index inversé par verset (verset -> thèmes ou lemmes)')
+    parser.add_argument('kind', choices=['topics', 'lemmas'], help='topics_links ou concordance en entrée')
+    parser.add_argument('input', help='Fichier JSONL.gz (topics_links.jsonl.gz ou concordance.jsonl.gz)')
+    parser.add_argument('output', help="Fichier d'index de sortie (ex: verse_topics.idx)")
+    args = parser.parse_args()
+
+    write = write_verse_topics if args.kind == 'topics' else write_verse_lemmas
+    with gzip.open(args.input, 'rt', encoding='utf-8') as f:
+        verse_count, size = write((json.loads(line) for line in f if line.strip()), args.output)
+
+    print(f"✅ {verse_count} versets -> {args.output} ({size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Politique de vocabulaire des concordances : mots vides, seuil de fréquence
+documentaire et budget de taille.
+
+Chaque lemme candidat est décrit par LemmaStats (occurrences, nombre de
+versets où il apparaît, taille estimée de ses entrées). La politique :
+
+1. écarte les mots vides (articles, pronoms, prépositions...) ;
+2. si max_df est fixé (désactivé par défaut), écarte les lemmes présents
+   dans plus de max_df des versets, qui gonflent les listes sans aider la
+   recherche ; le rapport liste les lemmes ainsi écartés ;
+3. si un budget en octets est fixé, garde les lemmes par utilité par octet
+   décroissante jusqu'à l'épuiser. L'utilité d'un lemme est son pouvoir
+   discriminant (1 + log(N / df)) : un mot rare et peu coûteux passe avant
+   un mot courant dont les listes pèsent lourd.
+
+La taille compressée est estimée avant écriture à partir d'un taux de
+compression mesuré sur un échantillon des entrées.
+"""
+
+import gzip
+import math
+from collections import namedtuple
+
+from french_lemmas import search_key
+
+LemmaStats = namedtuple('LemmaStats', ['count', 'verses', 'size'])
+# Statistiques d'un corpus : {lemme: LemmaStats}, nombre de versets, échantillon de lignes JSONL
+CorpusStats = namedtuple('CorpusStats', ['lemmas', 'total_verses', 'sample'])
+
+DEFAULT_MAX_DF = None
+DEFAULT_COMPRESSION_RATIO = 0.25
+# Nombre de lemmes trop fréquents cités dans le rapport
+REPORT_LIMIT = 50
+
+# Mots vides français (formes repliées, voir french_lemmas.search_key)
+FRENCH_STOP_WORDS = frozenset("""
+    les des une aux par pour sur sous dans avec sans entre vers chez contre depuis pendant avant apres
+    qui que quoi dont quel quelle quels quelles lequel laquelle lesquels lesquelles
+    mais donc car comme quand lorsque puisque ainsi aussi alors encore deja tres trop
+    ceci cela celui celle ceux celles cet cette ces son sa ses mon mes ton tes notre nos votre vos leur leurs
+    moi toi lui elle nous vous ils elles eux meme memes tout tous toute toutes autre autres
+    pas plus moins rien jamais non oui tant peu
+    etre avoir
+""".split())
+
+# Mots vides anglais (concordance BSB)
+ENGLISH_STOP_WORDS = frozenset("""
+    the and for but nor yet that this these those with from into onto upon unto over under about
+    who whom whose which what when where why how all any some each every its his her hers their theirs
+    our ours your yours him them they she you was were are been being have has had not
+""".split())
+
+
+def compression_ratio(lines, level=9):
+    """Taux de compression gzip mesuré sur un échantillon de lignes (taille compressée / brute)"""
+    raw = ''.join(lines).encode('utf-8')
+    if not raw:
+        return DEFAULT_COMPRESSION_RATIO
+    return len(gzip.compress(raw, compresslevel=level)) / len(raw)
+
+
+def format_size(size):
+    return f"{size / 1024 / 1024:.2f} MB" if size >= 1024 * 1024 else f"{size / 1024:.1f} KB"
+
+
+def parse_size(text):
+    """'5MB', '5M', '800KB', '800K' ou '1048576' -> octets"""
+    text = text.strip().upper()
+    for suffix, factor in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024),
+                           ('G', 1024 ** 3), ('M', 1024 ** 2), ('K', 1024), ('B', 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+class VocabularySelection:
+    """Résultat d'une politique : lemmes gardés et raisons des exclusions"""
+
+    def __init__(self, kept, dropped, raw_size, compressed_size, budget):
+        self.kept = kept
+        self.dropped = dropped
+        self.raw_size = raw_size
+        self.compressed_size = compressed_size
+        self.budget = budget
+
+    def report(self):
+        """Affiche la sélection et la taille estimée de l'asset avant écriture"""
+        print(f"📚 Vocabulaire: {len(self.kept)} lemmes gardés")
+        for reason, lemmas in self.dropped.items():
+            if lemmas:
+                print(f"   ✂️  {reason}: {len(lemmas)} lemmes écartés")
+        frequent = self.dropped.get('trop fréquents')
+        if frequent:
+            more = f" ... (+{len(frequent) - REPORT_LIMIT})" if len(frequent) > REPORT_LIMIT else ""
+            print(f"      trop fréquents: {', '.join(sorted(frequent)[:REPORT_LIMIT])}{more}")
+        budget = f" (budget {format_size(self.budget)})" if self.budget else ""
+        print(f"   📦 Taille estimée: {format_size(self.raw_size)} brut, "
+              f"~{format_size(self.compressed_size)} compressé{budget}")
+
+
+class VocabularyPolicy:
+    """Choix des lemmes à garder selon mots vides, fréquence documentaire et budget"""
+
+    def __init__(self, stop_words=FRENCH_STOP_WORDS, max_df=DEFAULT_MAX_DF, byte_budget=None,
+                 min_count=2, max_words=None):
+        self.stop_words = stop_words or frozenset()
+        self.max_df = max_df
+        self.byte_budget = byte_budget
+        self.min_count = min_count
+        self.max_words = max_words
+
+    def utility(self, stats, total_verses):
+        """Pouvoir discriminant du lemme (idf lissé)"""
+        return 1.0 + math.log(max(total_verses, 1) / max(stats.verses, 1))
+
+    def select(self, stats, total_verses, ratio=DEFAULT_COMPRESSION_RATIO):
+        """Applique la politique à {lemme: LemmaStats} ; renvoie une VocabularySelection
+
+        total_verses est le nombre de versets du corpus, ratio le taux de
+        compression estimé (voir compression_ratio) pour le budget compressé.
+        """
+        dropped = {'rares': [], 'mots vides': [], 'trop fréquents': [], 'budget': []}
+        candidates = []
+        for lemma, lemma_stats in stats.items():
+            if lemma_stats.count < self.min_count:
+                dropped['rares'].append(lemma)
+            elif search_key(lemma) in self.stop_words:
+                dropped['mots vides'].append(lemma)
+            elif self.max_df is not None and lemma_stats.verses > self.max_df * total_verses:
+                dropped['trop fréquents'].append(lemma)
+            else:
+                candidates.append(lemma)
+
+        # Utilité par octet décroissante (à égalité, ordre alphabétique pour un résultat stable)
+        candidates.sort(key=lambda lemma: (-self.utility(stats[lemma], total_verses) / max(stats[lemma].size, 1),
+                                           lemma))
+        kept = set()
+        raw_size = 0
+        for lemma in candidates:
+            size = stats[lemma].size
+            over_budget = self.byte_budget is not None and (raw_size + size) * ratio > self.byte_budget
+            if over_budget or (self.max_words is not None and len(kept) >= self.max_words):
+                dropped['budget'].append(lemma)
+                continue
+            kept.add(lemma)
+            raw_size += size
+
+        return VocabularySelection(kept, dropped, raw_size, int(raw_size * ratio), self.byte_budget)
+
+    def select_corpus(self, corpus):
+        """Applique la politique à des CorpusStats (taux de compression mesuré sur leur échantillon)"""
+        return self.select(corpus.lemmas, corpus.total_verses, compression_ratio(corpus.sample))
+
+    def params(self):
+        """Paramètres de la politique (pour le manifeste de build)"""
+        return {'stop_words': bool(self.stop_words), 'max_df': self.max_df, 'budget': self.byte_budget,
+                'min_count': self.min_count, 'max_words': self.max_words}
+
+    @classmethod
+    def add_arguments(cls, parser):
+        """Options communes de ligne de commande (--budget, --max-df, --keep-stop-words)"""
+        parser.add_argument('--budget', type=parse_size, default=None,
+                            help='Taille compressée cible de la concordance (ex: 5MB)')
+        parser.add_argument('--max-df', type=float, default=DEFAULT_MAX_DF,
+                            help='Fraction maximale de versets où un lemme peut apparaître (ex: 0.3, désactivé par défaut)')
+        parser.add_argument('--keep-stop-words', action='store_true', help='Ne pas écarter les mots vides')
+
+    @classmethod
+    def from_args(cls, args, **kwargs):
+        return cls(stop_words=None if args.keep_stop_words else FRENCH_STOP_WORDS,
+                   max_df=args.max_df, byte_budget=args.budget, **kwargs)